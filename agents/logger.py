@@ -1,12 +1,12 @@
 from crewai import Agent
 from tools.notion_tools import get_notion_tools
 
-def create_logger():
-    tools = get_notion_tools()
+def create_logger(tools: list = None, llm=None):
     return Agent(
         role="Job Tracker",
         goal="Log job application information in Notion for future tracking.",
         backstory="A helpful assistant who never forgets to update the job tracker.",
-        tools=tools,
+        tools=tools if tools is not None else get_notion_tools(),
+        llm=llm,
         verbose=True
-    )
\ No newline at end of file
+    )
@@ -1,10 +1,20 @@
 # ai-job-application-manager/agents/manager_agent.py
 
 from smolagents import CodeAgent, LiteLLMModel
+from agents.parallel_prefetch import ParallelToolPrefetcher, PrefetchingExecutor
+
+# Appended to the agent's system prompt when parallel tool calls are enabled
+PARALLEL_TOOLS_INSTRUCTIONS = (
+    "Local lookups that do not depend on each other (for example loading the resume, loading job descriptions "
+    "and finding similar indexed jobs) run concurrently when you write them as separate top-level assignments "
+    "in the same code block. Prefer doing that over spreading independent lookups across several steps."
+)
 
 class ManagerAgent(CodeAgent):
     def __init__(self, model: LiteLLMModel, tools: list,
                  additional_authorized_imports: list = None,
+                 parallel_tool_calls: bool = True,
+                 parallel_safe_tools: set = None,
                  **other_code_agent_kwargs):
 
         # This is a guiding prompt for us or for prepending to tasks if needed.
@@ -26,6 +36,8 @@ If you encounter an error with a tool, report the error clearly.
             del other_code_agent_kwargs['system_prompt']
         if 'system_prompt_text' in other_code_agent_kwargs:
             del other_code_agent_kwargs['system_prompt_text']
+        if parallel_tool_calls:
+            other_code_agent_kwargs.setdefault("instructions", PARALLEL_TOOLS_INSTRUCTIONS)
 
         super().__init__(
             tools=tools,
@@ -33,6 +45,13 @@ If you encounter an error with a tool, report the error clearly.
             additional_authorized_imports=effective_additional_imports,
             **other_code_agent_kwargs # Pass only known, valid kwargs for CodeAgent here
         )
+
+        # Independent, side-effect-free tool calls within one code action are run concurrently
+        # before the code executes; see agents/parallel_prefetch.py.
+        self.tool_prefetcher = None
+        if parallel_tool_calls:
+            self.tool_prefetcher = ParallelToolPrefetcher(self.tools, safe_tools=parallel_safe_tools)
+            self.python_executor = PrefetchingExecutor(self.python_executor, self.tool_prefetcher)
         print(f"[ManagerAgent] Initialized. Custom guidance prompt (for reference): \"{self.custom_guidance_prompt[:70].strip()}...\"")
 
 
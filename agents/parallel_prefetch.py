@@ -0,0 +1,176 @@
+# ai-job-application-manager/agents/parallel_prefetch.py
+import ast
+import copy
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Tools that only read local data and cost nothing, so running them ahead of time (and
+# concurrently) can neither change the outcome of a step nor waste money if the code never
+# reaches the call. Paid LLM tools (analyze_*, draft_*, suggest_*), network tools (scrape_*) and
+# tools with side effects (create_file, append_text_to_notion_page, poll_job_board, index_*)
+# are never prefetched.
+DEFAULT_PARALLEL_SAFE_TOOLS = {
+    "load_resume_text",
+    "load_text_from_file",
+    "find_similar_jobs",
+}
+
+_UNRESOLVED = object()
+
+
+def _call_key(tool_name: str, args: tuple, kwargs: dict) -> str:
+    basis = repr((tool_name, args, sorted(kwargs.items())))
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+class _Prefetched:
+    __slots__ = ("result", "error")
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+
+
+class ParallelToolPrefetcher:
+    """
+    Finds independent tool calls in a code action and runs them concurrently before the code executes.
+
+    A call qualifies when it is a top-level statement of the form `x = tool(...)` or `tool(...)`,
+    the tool is in `safe_tools`, and every argument is a literal, a name already defined by an
+    earlier step, or a name bound to a literal earlier in the same code block. Calls whose
+    arguments depend on another statement of the block keep running in order as usual.
+
+    Results are parked in a cache keyed by tool name and arguments. Each safe tool in `tools` (the
+    agent's own name -> tool dict) is replaced by a copy whose `forward` is wrapped, so that when
+    the executor reaches the call it consumes the parked result instead of calling again; the
+    shared tool objects themselves are left untouched. A step's wall time for its independent calls becomes the longest call
+    instead of the sum.
+    """
+
+    def __init__(self, tools: dict, safe_tools: set = None, max_workers: int = 4):
+        self.tools = tools
+        self.safe_tools = set(DEFAULT_PARALLEL_SAFE_TOOLS if safe_tools is None else safe_tools) & set(tools)
+        self.max_workers = max_workers
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        for name in self.safe_tools:
+            tools[name] = self._wrap(name, tools[name])
+
+    def _wrap(self, name: str, tool):
+        """A copy of the tool whose forward consumes (or, while prefetching, parks) results."""
+        original_forward = tool.forward
+        wrapped = copy.copy(tool)
+        prefetcher = self
+
+        def forward(*args, **kwargs):
+            key = _call_key(name, args, kwargs)
+            if getattr(prefetcher._local, "prefetching", False):
+                try:
+                    result = _Prefetched(result=original_forward(*args, **kwargs))
+                except Exception as e:
+                    result = _Prefetched(error=e)
+                with prefetcher._lock:
+                    prefetcher._cache[key] = result
+                return result
+            with prefetcher._lock:
+                parked = prefetcher._cache.pop(key, None)
+            if parked is None:
+                return original_forward(*args, **kwargs)
+            if parked.error is not None:
+                raise parked.error
+            return parked.result
+
+        wrapped.forward = forward
+        return wrapped
+
+    def _run_prefetch(self, name: str, args: tuple, kwargs: dict):
+        self._local.prefetching = True
+        try:
+            self.tools[name](*args, **kwargs) # Goes through Tool.__call__ -> wrapped forward, which parks the result
+        finally:
+            self._local.prefetching = False
+
+    def find_independent_calls(self, code: str, state: dict) -> list[tuple[str, tuple, dict]]:
+        """Returns (tool_name, args, kwargs) for each prefetchable call in the code action."""
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return []
+
+        block_literals = {} # Names bound to literals earlier in this block, e.g. jd_path = "data/jd.txt"
+        assigned = set()    # Names (re)bound by any other statement in this block
+        calls = []
+
+        def resolve(node):
+            if isinstance(node, ast.Name):
+                if node.id in block_literals:
+                    return block_literals[node.id]
+                if node.id not in assigned and node.id in state:
+                    return state[node.id]
+                return _UNRESOLVED
+            try:
+                return ast.literal_eval(node)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                return _UNRESOLVED
+
+        for stmt in tree.body:
+            value = stmt.value if isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.Expr)) else None
+            if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id in self.safe_tools \
+                    and not any(isinstance(a, ast.Starred) for a in value.args) and all(k.arg for k in value.keywords):
+                args = tuple(resolve(a) for a in value.args)
+                kwargs = {k.arg: resolve(k.value) for k in value.keywords}
+                if _UNRESOLVED not in args and _UNRESOLVED not in kwargs.values():
+                    calls.append((value.func.id, args, kwargs))
+
+            targets = [n.id for n in ast.walk(stmt) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)]
+            if isinstance(stmt, ast.Assign) and len(targets) == 1 and isinstance(stmt.targets[0], ast.Name) \
+                    and resolve(stmt.value) is not _UNRESOLVED and not isinstance(stmt.value, ast.Name):
+                block_literals[targets[0]] = ast.literal_eval(stmt.value)
+                continue
+            for target in targets:
+                block_literals.pop(target, None)
+                assigned.add(target)
+
+        unique = {}
+        for name, args, kwargs in calls:
+            unique.setdefault(_call_key(name, args, kwargs), (name, args, kwargs))
+        return list(unique.values())
+
+    def prefetch(self, code: str, state: dict) -> int:
+        """Runs the independent calls of a code action concurrently. Returns how many were prefetched."""
+        calls = self.find_independent_calls(code, state)
+        if len(calls) < 2: # Nothing to overlap
+            return 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(calls))) as pool:
+            for future in [pool.submit(self._run_prefetch, *call) for call in calls]:
+                future.result()
+        print(f"[ManagerAgent] Ran {len(calls)} independent tool calls in parallel "
+              f"({', '.join(name for name, _, _ in calls)}) in {time.perf_counter() - started:.2f}s.")
+        return len(calls)
+
+    def clear(self):
+        """Drops parked results the code never consumed (e.g. it raised before reaching them)."""
+        with self._lock:
+            self._cache.clear()
+
+
+class PrefetchingExecutor:
+    """Wraps a smolagents Python executor so every code action is prefetched before it runs."""
+
+    def __init__(self, executor, prefetcher: ParallelToolPrefetcher):
+        self._executor = executor
+        self._prefetcher = prefetcher
+
+    def __call__(self, code_action: str):
+        try:
+            self._prefetcher.prefetch(code_action, getattr(self._executor, "state", {}))
+            return self._executor(code_action)
+        finally:
+            self._prefetcher.clear()
+
+    def __getattr__(self, name):
+        return getattr(self._executor, name)
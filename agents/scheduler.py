@@ -1,12 +1,24 @@
 from crewai import Agent
-from tools.calendar_mcp_tool import get_calendar_tools
+from tools.calendar_reminder_tool import create_calendar_reminder
+from utils.crewai_tools import to_crewai_tools
 
-def create_scheduler():
-    tools = get_calendar_tools()
+def get_scheduler_tools(use_mcp_calendar: bool = False) -> list:
+    # The Google Calendar MCP server (mcp/google-calendar-mcp) has to be built separately;
+    # without it, reminders are written as .ics files that any calendar can import.
+    if use_mcp_calendar:
+        try:
+            from tools.calendar_mcp_tool import get_calendar_tools
+            return get_calendar_tools()
+        except Exception as e:
+            print(f"[scheduler] Calendar MCP tools unavailable ({type(e).__name__}: {e}); falling back to .ics reminders.")
+    return to_crewai_tools([create_calendar_reminder])
+
+def create_scheduler(tools: list = None, llm=None, use_mcp_calendar: bool = False):
     return Agent(
         role="Interview Scheduler",
         goal="Schedule job interview preparation sessions or application reminders.",
         backstory="An assistant that manages Abhay's calendar efficiently.",
-        tools=tools,
+        tools=tools if tools is not None else get_scheduler_tools(use_mcp_calendar),
+        llm=llm,
         verbose=True
-    )
\ No newline at end of file
+    )
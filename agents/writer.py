@@ -1,11 +1,12 @@
 from crewai import Agent
-from tools.cover_letter_tool import cover_letter_tool
+from tools.cover_letter_tool import get_cover_letter_tools
 
-def create_writer():
+def create_writer(tools: list = None, llm=None):
     return Agent(
         role="Cover Letter Writer",
         goal="Write tailored cover letters using the job description and resume.",
         backstory="An expert copywriter specializing in resumes and cover letters.",
-        tools=[cover_letter_tool],
+        tools=tools if tools is not None else get_cover_letter_tools(),
+        llm=llm,
         verbose=True
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,93 @@
+# ai-job-application-manager/tools/artifact_tools.py
+import os
+from smolagents import tool
+from utils.artifact_store import get_artifact_store, atomic_write_text
+
+@tool
+def save_job_document(job_id: str, kind: str, content: str, export_path: str = None) -> str:
+    """
+    Saves a generated document (e.g. a cover letter or resume suggestions) for a job in the
+    artifact store. Identical drafts are stored only once, and every saved version of a job's
+    documents can be listed and retrieved later with list_job_documents / get_job_document.
+
+    Args:
+        job_id: A stable identifier for the job, e.g. "Junior Data Scientist @ Innovatech Solutions Inc." or the posting URL.
+        kind: The document type, e.g. "cover_letter" or "resume_suggestions".
+        content: The full text of the document.
+        export_path: (Optional) Also write a readable copy to this file path, e.g. "output_documents/cover_letter_innovatech.txt".
+
+    Returns:
+        A message with the stored version and content hash, or an error message.
+    """
+    if not content or not content.strip():
+        return "Error: No content provided to save."
+    try:
+        entry = get_artifact_store().put(job_id, kind, content, metadata={"export_path": export_path} if export_path else None)
+        message = (f"{kind} for '{job_id}' is unchanged from version {entry['version']} (hash {entry['hash'][:12]})."
+                   if entry["deduplicated"] else
+                   f"Saved {kind} version {entry['version']} for '{job_id}' (hash {entry['hash'][:12]}).")
+        if export_path:
+            atomic_write_text(export_path, content)
+            message += f" Exported to {export_path}."
+        print(f"[save_job_document tool] {message}")
+        return message
+    except Exception as e:
+        error_message = f"Error saving {kind} for '{job_id}': {type(e).__name__} - {str(e)}"
+        print(f"[save_job_document tool] {error_message}")
+        return error_message
+
+@tool
+def list_job_documents(job_id: str) -> list[dict]:
+    """
+    Lists every document saved for a job in the artifact store, oldest first.
+
+    Args:
+        job_id: The job identifier used when the documents were saved.
+
+    Returns:
+        A list of dictionaries with 'kind', 'version', 'hash', 'size' and 'created' (Unix time),
+        or an empty list if nothing was saved for this job.
+    """
+    entries = get_artifact_store().entries(job_id)
+    print(f"[list_job_documents tool] {len(entries)} document(s) on record for '{job_id}'.")
+    return [{key: entry[key] for key in ("kind", "version", "hash", "size", "created")} for entry in entries]
+
+@tool
+def get_job_document(job_id: str, kind: str = "cover_letter", version: int = None) -> str:
+    """
+    Retrieves the text of a document saved for a job in the artifact store.
+
+    Args:
+        job_id: The job identifier used when the document was saved.
+        kind: The document type, e.g. "cover_letter" (default) or "resume_suggestions".
+        version: (Optional) Which version to return; defaults to the latest.
+
+    Returns:
+        The document text, or an error message if there is no such document.
+    """
+    try:
+        content = get_artifact_store().get(job_id, kind, version)
+    except OSError as e:
+        return f"Error reading {kind} for '{job_id}': {e}"
+    if content is None:
+        which = f"version {version} of " if version is not None else ""
+        return f"Error: No {which}{kind} saved for '{job_id}'."
+    return content
+
+if __name__ == '__main__':
+    import tempfile
+    from utils.artifact_store import ArtifactStore
+    import utils.artifact_store as artifact_store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_store._store = ArtifactStore(os.path.join(tmp, "artifacts")) # Keep the demo out of data/
+        job = "Junior Data Scientist @ Innovatech Solutions Inc."
+        print(save_job_document(job, "cover_letter", "Dear Hiring Manager, ... (draft 1)"))
+        print(save_job_document(job, "cover_letter", "Dear Hiring Manager, ... (draft 1)")) # Deduplicated
+        print(save_job_document(job, "cover_letter", "Dear Hiring Manager, ... (draft 2)",
+                                export_path=os.path.join(tmp, "output_documents", "cover_letter_innovatech.txt")))
+        print(save_job_document("Data Analyst @ AnalyzeIt", "cover_letter", "Dear Hiring Manager, ... (draft 2)")) # Same bytes, stored once
+        print(list_job_documents(job))
+        print(get_job_document(job, "cover_letter", version=1))
+        print("Compressed:", artifact_store._store.compress_old(older_than_days=0))
+        print(get_job_document(job, "cover_letter", version=1)) # Transparently read back from .gz
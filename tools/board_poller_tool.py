@@ -0,0 +1,229 @@
+# ai-job-application-manager/tools/board_poller_tool.py
+import os
+import json
+import time
+import hashlib
+import requests
+from urllib.parse import urlparse
+from smolagents import tool
+
+from tools.web_scraping_tools import extract_jobs_from_html, local_file_path_from_url, local_base_url
+from tools.job_index_tool import job_key
+from utils.processed_index import get_processed_index
+
+# Per-board polling state (validators + listing fingerprints), relative to the project root
+DEFAULT_STATE_PATH = os.path.join("data", "board_poll_state.json")
+
+
+def listing_fingerprint(job: dict) -> str:
+    """Hash of every extracted field; a change here means the posting must be re-processed."""
+    basis = json.dumps(job, sort_keys=True, default=str)
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+class BoardPoller:
+    """
+    Polls job boards incrementally. For each board it remembers the HTTP validators
+    (ETag / Last-Modified, or mtime and size for file:// boards), a hash of the last page body,
+    and a fingerprint per listing. A poll then costs:
+      - a conditional GET answered with 304 (nothing downloaded or parsed), or
+      - a download whose body hash matches the last one (nothing parsed), or
+      - a full parse, after which only new or changed listings are emitted.
+    """
+
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH, session: requests.Session = None):
+        self.state_path = state_path
+        self.session = session or requests.Session() # Keep-alive across polls of the same host
+        self.state = {}
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[BoardPoller] Could not read poll state at {state_path} ({e}); starting fresh.")
+
+    def _save(self):
+        dir_name = os.path.dirname(self.state_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path) # Atomic: a crash never leaves half-written state
+
+    def _fetch(self, url: str, board: dict):
+        """
+        Returns (body, base_url, validators), or (None, None, None) when the board reports
+        that nothing changed since the stored validators.
+        """
+        parsed_url = urlparse(url)
+        if parsed_url.scheme == "file":
+            file_path = local_file_path_from_url(url)
+            stat = os.stat(file_path) # Raises FileNotFoundError, handled by poll()
+            validators = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            if board.get("validators") == validators:
+                return None, None, None
+            with open(file_path, "rb") as f:
+                return f.read(), local_base_url(file_path), validators
+
+        if parsed_url.scheme in ["http", "https"]:
+            headers = {}
+            stored = board.get("validators") or {}
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+            response = self.session.get(url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                return None, None, None
+            response.raise_for_status()
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            return response.content, url, validators
+
+        raise ValueError(f"Unsupported URL scheme: '{parsed_url.scheme}'. Poller supports http, https, file.")
+
+    def poll(self, url: str, job_title_keywords: list[str] = None) -> dict:
+        """
+        Polls one board and returns a dict with "status" ("not_modified", "unchanged", "changed"
+        or "error"), "jobs" (new or changed postings, each tagged with a "change" key),
+        and "removed" (number of listings that disappeared since the last poll).
+        """
+        board = self.state.setdefault(url, {})
+        try:
+            body, base_url, validators = self._fetch(url, board)
+        except (requests.exceptions.RequestException, OSError, ValueError) as e:
+            error_msg = f"Polling failed for {url}: {type(e).__name__} - {str(e)}"
+            print(f"[BoardPoller] {error_msg}")
+            return {"status": "error", "error": error_msg, "jobs": [], "removed": 0}
+
+        board["last_polled"] = time.time()
+        if body is None:
+            self._save()
+            print(f"[BoardPoller] {url}: not modified.")
+            return {"status": "not_modified", "jobs": [], "removed": 0}
+
+        body_hash = hashlib.sha1(body).hexdigest()
+        board["validators"] = validators
+        if body_hash == board.get("body_hash"):
+            self._save()
+            print(f"[BoardPoller] {url}: page body unchanged; skipped parsing.")
+            return {"status": "unchanged", "jobs": [], "removed": 0}
+
+        # Only listings returned to the caller get their fingerprint stored: one filtered out by
+        # this poll's keywords keeps its old state, so a later poll with other keywords still
+        # reports it as new or changed.
+        jobs = extract_jobs_from_html(body, base_url)
+        old_fingerprints = board.get("fingerprints", {})
+        new_fingerprints = {}
+        emitted = []
+        withheld = 0
+        for job in jobs:
+            key = job_key(job)
+            fingerprint = listing_fingerprint(job)
+            previous = old_fingerprints.get(key)
+            if job_title_keywords and not any(k.lower() in job.get("title", "").lower() for k in job_title_keywords):
+                if previous is not None:
+                    new_fingerprints[key] = previous
+                if previous != fingerprint:
+                    withheld += 1
+                continue
+            new_fingerprints[key] = fingerprint
+            if previous is None:
+                emitted.append(dict(job, change="new"))
+            elif previous != fingerprint:
+                emitted.append(dict(job, change="changed"))
+
+        current_keys = {job_key(job) for job in jobs}
+        removed = len(set(old_fingerprints) - current_keys)
+        board["fingerprints"] = new_fingerprints
+        # An unchanged page may only be skipped next time (conditional request, body hash) if
+        # nothing on it is still unreported
+        if withheld:
+            board.pop("validators", None)
+            board.pop("body_hash", None)
+        else:
+            board["body_hash"] = body_hash
+        self._save()
+        print(f"[BoardPoller] {url}: {len(emitted)} new/changed of {len(jobs)} listing(s), {removed} removed.")
+        return {"status": "changed", "jobs": emitted, "removed": removed}
+
+
+def run_polling_loop(urls: list[str], interval_seconds: float = 900, on_new_jobs=None,
+                     job_title_keywords: list[str] = None, max_cycles: int = None,
+                     poller: BoardPoller = None):
+    """
+    Polls each board every interval_seconds and calls on_new_jobs(url, jobs) with only the
+    new or changed postings. Runs until interrupted, or for max_cycles cycles if given.
+    """
+    poller = poller or BoardPoller()
+    cycle = 0
+    while max_cycles is None or cycle < max_cycles:
+        cycle_start = time.monotonic()
+        for url in urls:
+            result = poller.poll(url, job_title_keywords)
+            if result["jobs"] and on_new_jobs:
+                on_new_jobs(url, result["jobs"])
+        cycle += 1
+        if max_cycles is not None and cycle >= max_cycles:
+            break
+        time.sleep(max(0.0, interval_seconds - (time.monotonic() - cycle_start)))
+
+
+_default_poller = None
+
+@tool
+def poll_job_board(url: str, job_title_keywords: list[str] = None, include_processed: bool = False) -> list[dict]:
+    """
+    Checks a job board (HTTP/HTTPS or file:///) for postings that are new or changed since the
+    last poll. Uses conditional requests, so boards that have not changed cost almost nothing.
+    Unlike scrape_job_board, postings already seen unchanged are NOT returned again.
+
+    Args:
+        url: The URL (http, https) or local file path (file:///path/to/file.html) of the job board.
+        job_title_keywords: A list of keywords to filter job titles by.
+                            If None or empty, all new/changed jobs are returned.
+        include_processed: If True, also return jobs already processed (completed in a batch run or
+                           logged to Notion). By default those are left out.
+
+    Returns:
+        A list of job dictionaries ('title', 'company', 'url', 'description', plus 'change' set to
+        "new" or "changed"). An empty list means nothing new. Returns a list containing a single
+        error dictionary if polling fails.
+    """
+    global _default_poller
+    if _default_poller is None:
+        _default_poller = BoardPoller()
+    result = _default_poller.poll(url, job_title_keywords)
+    if result["status"] == "error":
+        return [{"error": result["error"]}]
+    if include_processed:
+        return result["jobs"]
+    jobs, processed = get_processed_index().partition(result["jobs"])
+    if processed:
+        print(f"[poll_job_board tool] Skipped {len(processed)} new/changed job(s) already processed.")
+    return jobs
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Poll job boards and print only new or changed postings.")
+    parser.add_argument("urls", nargs="+", help="Board URLs (http, https or file:///...)")
+    parser.add_argument("--interval", type=float, default=900, help="Seconds between polling cycles (default: 900)")
+    parser.add_argument("--keywords", nargs="*", default=None, help="Only emit jobs whose title contains one of these")
+    parser.add_argument("--once", action="store_true", help="Run a single polling cycle and exit")
+    args = parser.parse_args()
+
+    def print_jobs(url, jobs):
+        print(f"\n{len(jobs)} new/changed posting(s) on {url}:")
+        for job in jobs:
+            print(f"  [{job['change']}] {job.get('title')} at {job.get('company')} ({job.get('url')})")
+
+    try:
+        run_polling_loop(args.urls, interval_seconds=args.interval, on_new_jobs=print_jobs,
+                         job_title_keywords=args.keywords, max_cycles=1 if args.once else None)
+    except KeyboardInterrupt:
+        print("\nPolling stopped.")
@@ -0,0 +1,72 @@
+# ai-job-application-manager/tools/calendar_reminder_tool.py
+import os
+import re
+import uuid
+import datetime
+from smolagents import tool
+
+
+def _ics_escape(text: str) -> str:
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+@tool
+def create_calendar_reminder(title: str, start_time: str, duration_minutes: int = 30,
+                             description: str = "", output_dir: str = "output_documents") -> str:
+    """
+    Creates a calendar reminder as an .ics file that can be imported into Google Calendar,
+    Outlook or Apple Calendar. Works offline; use it for application deadlines and interview prep.
+
+    Args:
+        title: The title of the calendar event, e.g. "Follow up: Data Analyst at AnalyzeIt".
+        start_time: When the event starts, in ISO format ("2025-06-01T09:00" or "2025-06-01").
+        duration_minutes: Length of the event in minutes (defaults to 30).
+        description: Optional notes to put in the event body.
+        output_dir: Folder to save the .ics file in (defaults to "output_documents").
+
+    Returns:
+        A success message with the path of the .ics file, or an error message.
+    """
+    try:
+        start = datetime.datetime.fromisoformat(start_time)
+    except ValueError:
+        return f"Error: Could not parse start_time '{start_time}'. Use ISO format like 2025-06-01T09:00."
+    end = start + datetime.timedelta(minutes=duration_minutes or 30)
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//ai-job-application-manager//EN",
+        "BEGIN:VEVENT",
+        f"UID:{uuid.uuid4()}@ai-job-application-manager",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",
+        f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}",
+        f"SUMMARY:{_ics_escape(title)}",
+        f"DESCRIPTION:{_ics_escape(description)}",
+        "BEGIN:VALARM",
+        "TRIGGER:-PT15M",
+        "ACTION:DISPLAY",
+        f"DESCRIPTION:{_ics_escape(title)}",
+        "END:VALARM",
+        "END:VEVENT",
+        "END:VCALENDAR",
+        "",
+    ])
+    slug = re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")[:60] or "reminder"
+    path = os.path.join(output_dir, f"reminder_{slug}_{start.strftime('%Y%m%d')}.ics")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(ics)
+    except OSError as e:
+        error_msg = f"Error writing calendar reminder to {path}: {e}"
+        print(f"[create_calendar_reminder tool] {error_msg}")
+        return error_msg
+    print(f"[create_calendar_reminder tool] Created reminder '{title}' at {path}")
+    return f"Calendar reminder created at {path}"
+
+
+if __name__ == '__main__':
+    print(create_calendar_reminder("Follow up: Data Analyst at AnalyzeIt", "2025-06-01T09:00",
+                                   description="Check application status.", output_dir="test_output"))
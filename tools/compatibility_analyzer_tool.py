@@ -1,11 +1,38 @@
 # ai-job-application-manager/tools/compatibility_analyzer_tool.py
 import os
 import json
+import numpy as np
 from smolagents import tool, LiteLLMModel # For consistency, use LiteLLMModel if agent needs to call other agents/LLMs
 from dotenv import load_dotenv
+from utils.text_features import embed_text
+from utils.llm_gateway import fit_prompt, completion as gateway_completion
+from utils.context_cache import build_resume_prefix, prompt_messages
 # Alternatively, to make a direct call to Gemini without smolagents/LiteLLM for this specific tool:
 # import google.generativeai as genai
 
+def build_analysis_prompt(resume_text: str, job_description_text: str) -> str:
+    """
+    Builds the compatibility analysis prompt (asks for a JSON answer). The shared resume prefix
+    comes first so it can be served from a prefix/context cache (see utils/context_cache.py).
+    """
+    return build_resume_prefix(resume_text) + f"""
+Task: As an expert HR analyst, analyze the resume above against the job description below.
+Please provide a detailed analysis in JSON format with the following keys:
+- "compatibility_score": An estimated score from 0 to 100 representing how well the resume matches the job description.
+- "strengths": A list of strings, where each string highlights a key strength or relevant experience from the resume that matches a requirement in the job description.
+- "weaknesses": A list of strings, identifying key areas where the resume is weaker, or skills/experiences mentioned in the job description that are missing or not prominent in the resume.
+- "keyword_analysis": A list of dictionaries, where each dictionary has "keyword" (a crucial keyword/skill from the JD) and "present_in_resume" (boolean: true if found or strongly implied, false otherwise). List 3-5 most important keywords.
+- "summary": A brief overall summary (2-3 sentences) of the candidate's fit for the role.
+
+Job Description Text:
+---
+{job_description_text}
+---
+
+Provide your analysis strictly in the JSON format described above.
+"""
+
+
 @tool
 def analyze_resume_jd_match(resume_text: str, job_description_text: str) -> dict:
     """
@@ -33,28 +60,10 @@ def analyze_resume_jd_match(resume_text: str, job_description_text: str) -> dict
         # Ensure GEMINI_API_KEY is set in the environment; LiteLLM will pick it up.
         llm_for_analysis = LiteLLMModel(model_id="gemini/gemini-1.5-flash-latest")
         
-        prompt = f"""
-You are an expert HR analyst. Your task is to analyze the provided resume against the job description.
-Please provide a detailed analysis in JSON format with the following keys:
-- "compatibility_score": An estimated score from 0 to 100 representing how well the resume matches the job description.
-- "strengths": A list of strings, where each string highlights a key strength or relevant experience from the resume that matches a requirement in the job description.
-- "weaknesses": A list of strings, identifying key areas where the resume is weaker, or skills/experiences mentioned in the job description that are missing or not prominent in the resume.
-- "keyword_analysis": A list of dictionaries, where each dictionary has "keyword" (a crucial keyword/skill from the JD) and "present_in_resume" (boolean: true if found or strongly implied, false otherwise). List 3-5 most important keywords.
-- "summary": A brief overall summary (2-3 sentences) of the candidate's fit for the role.
-
-Resume Text:
----
-{resume_text}
----
-
-Job Description Text:
----
-{job_description_text}
----
-
-Provide your analysis strictly in the JSON format described above.
-"""
-        print("[analyze_resume_jd_match tool] Sending prompt to LLM for analysis...")
+        prompt, prompt_tokens, trimmed = fit_prompt(build_analysis_prompt, resume_text, job_description_text)
+        if trimmed:
+            print(f"[analyze_resume_jd_match tool] Prompt was over budget; {', '.join(trimmed)}.")
+        print(f"[analyze_resume_jd_match tool] Sending prompt ({prompt_tokens} tokens) to LLM for analysis...")
         # Using the 'completion' method of LiteLLMModel which is a more direct way to get a response
         # The 'run' method is more for agentic loops.
         # Note: The exact method to get a raw completion might vary slightly based on LiteLLMModel's API.
@@ -62,10 +71,10 @@ Provide your analysis strictly in the JSON format described above.
         # If LiteLLMModel doesn't directly expose a simple completion, we might use litellm.completion directly.
 
         # Let's assume LiteLLMModel can make a direct call or we use litellm.completion
-        import litellm
-        response = litellm.completion( # Using litellm.completion directly
+        response = gateway_completion( # litellm.completion, paced under the TPM limit
             model="gemini/gemini-1.5-flash-latest", 
-            messages=[{"role": "user", "content": prompt}],
+            messages=prompt_messages(prompt), # Resume prefix as its own (cacheable) message
+            prompt_tokens=prompt_tokens,
             # api_key=gemini_api_key # litellm.completion picks up GEMINI_API_KEY from env
         )
         
@@ -112,6 +121,89 @@ Provide your analysis strictly in the JSON format described above.
     # except Exception as e:
     #     # ... (error handling as above) ...
 
+def _score_number(value):
+    """The LLM's compatibility_score as a float; it often comes back as a string like "85" or "85%". None if unusable."""
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().rstrip("%").strip())
+        except ValueError:
+            return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+        return None
+    return float(value)
+
+
+def local_match_matrix(resume_texts: list[str], job_description_texts: list[str]) -> np.ndarray:
+    """
+    Cheap, LLM-free compatibility scores for every resume/JD pair, as an (M resumes x N JDs)
+    array of 0-100 scores. Each document is embedded once and all pairs are scored with a
+    single matrix product, so M x N pairs cost M + N embeddings.
+    """
+    if not resume_texts or not job_description_texts:
+        return np.zeros((len(resume_texts), len(job_description_texts)), dtype=np.float32)
+    resume_vectors = np.stack([embed_text(t) for t in resume_texts])
+    jd_vectors = np.stack([embed_text(t) for t in job_description_texts])
+    cosine = resume_vectors @ jd_vectors.T
+    return np.clip(cosine, 0.0, 1.0) * 100.0
+
+
+@tool
+def analyze_resume_jd_matrix(resumes: dict, job_descriptions: dict, refine_top: int = 2) -> dict:
+    """
+    Scores several resume variants against several job descriptions at once and picks,
+    for each job, the resume variant to submit. Every pair first gets a fast local score;
+    only each job's best `refine_top` variants are then analyzed with the LLM
+    (analyze_resume_jd_match), so LLM calls scale with jobs x refine_top, not jobs x resumes.
+
+    Args:
+        resumes: A dictionary mapping a resume label (e.g. its filename) to the full resume text.
+        job_descriptions: A dictionary mapping a job label (e.g. "Data Analyst @ AnalyzeIt") to the full JD text.
+        refine_top: How many of the best locally-scored variants per job to refine with the LLM.
+                    Use 0 to skip the LLM entirely and rank on local scores only.
+
+    Returns:
+        A dictionary with "local_scores" ({job: {resume: score}}) and "recommendations"
+        ({job: {"resume": label, "score": number, "method": "llm" or "local", "analysis": dict}}),
+        or an error dictionary if the inputs are unusable.
+    """
+    if not isinstance(resumes, dict) or not isinstance(job_descriptions, dict) or not resumes or not job_descriptions:
+        return {"error": "Both 'resumes' and 'job_descriptions' must be non-empty dictionaries of label -> text."}
+
+    resume_labels = list(resumes.keys())
+    jd_labels = list(job_descriptions.keys())
+    print(f"[analyze_resume_jd_matrix tool] Scoring {len(resume_labels)} resume(s) x {len(jd_labels)} JD(s) locally...")
+    scores = local_match_matrix([resumes[r] for r in resume_labels], [job_descriptions[j] for j in jd_labels])
+
+    local_scores = {
+        jd: {resume: round(float(scores[i, j]), 1) for i, resume in enumerate(resume_labels)}
+        for j, jd in enumerate(jd_labels)
+    }
+    recommendations = {}
+    refine_top = max(0, min(refine_top or 0, len(resume_labels)))
+
+    for j, jd in enumerate(jd_labels):
+        ranked = list(np.argsort(-scores[:, j]))
+        best = {"resume": resume_labels[ranked[0]], "score": round(float(scores[ranked[0], j]), 1), "method": "local"}
+
+        if refine_top > 0:
+            refined = []
+            for i in ranked[:refine_top]:
+                analysis = analyze_resume_jd_match(resumes[resume_labels[i]], job_descriptions[jd])
+                llm_score = _score_number(analysis.get("compatibility_score")) if isinstance(analysis, dict) else None
+                if llm_score is not None:
+                    refined.append((llm_score, resume_labels[i], analysis))
+                else:
+                    print(f"[analyze_resume_jd_matrix tool] LLM refinement failed for '{resume_labels[i]}' vs '{jd}'; keeping local score.")
+            if refined:
+                llm_score, label, analysis = max(refined, key=lambda r: r[0])
+                best = {"resume": label, "score": llm_score, "method": "llm", "analysis": analysis}
+
+        recommendations[jd] = best
+        print(f"[analyze_resume_jd_matrix tool] '{jd}': submit '{best['resume']}' ({best['method']} score {best['score']}).")
+
+    return {"local_scores": local_scores, "recommendations": recommendations}
+
+
 if __name__ == '__main__':
     load_dotenv()
     print("--- Testing analyze_resume_jd_match tool ---")
@@ -192,4 +284,12 @@ if __name__ == '__main__':
             print("\nKeyword Analysis:")
             for kw in analysis.get("keyword_analysis", []):
                 print(f"- Keyword: {kw.get('keyword')}, Present: {kw.get('present_in_resume')}")
-            print(f"\nSummary: {analysis.get('summary')}")
\ No newline at end of file
+            print(f"\nSummary: {analysis.get('summary')}")
+
+    print("\n--- Testing analyze_resume_jd_matrix (local scores only) ---")
+    matrix = analyze_resume_jd_matrix(
+        resumes={"sample_resume": sample_resume_text, "generic_swe": "Backend engineer: Java, Go, Kubernetes, microservices."},
+        job_descriptions={"Junior Data Scientist": sample_jd_text},
+        refine_top=0,
+    )
+    print(json.dumps(matrix, indent=2))
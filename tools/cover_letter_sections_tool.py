@@ -0,0 +1,333 @@
+# ai-job-application-manager/tools/cover_letter_sections_tool.py
+import os
+import re
+import json
+from smolagents import tool
+from dotenv import load_dotenv
+
+from tools.cover_letter_tool import draft_cover_letter, clean_cover_letter
+from utils.artifact_store import ArtifactStore, get_artifact_store, content_hash
+from utils.context_cache import build_resume_prefix, prompt_messages
+from utils.llm_gateway import fit_prompt, completion as gateway_completion
+
+SECTIONS_KIND = "cover_letter_sections" # Artifact kind of the section record (the letter itself stays "cover_letter")
+SECTION_MAX_TOKENS = 400                # Per section rewritten: one paragraph each keeps calls short
+# Which inputs each section is written from. A section is regenerated only when one of these changes.
+SECTION_DEPENDENCIES = {
+    "salutation": ("company_name",),
+    "intro": ("company_name", "job_title", "candidate_name", "job_description_text"),
+    "body": ("resume_text", "job_description_text", "job_title", "compatibility_analysis"),
+    "closing": ("company_name", "job_title", "candidate_name"),
+    "signoff": ("candidate_name",),
+}
+SECTION_ROLES = {
+    "salutation": "the greeting line",
+    "intro": "the opening paragraph: the position and why the candidate is interested in it",
+    "body": "a body paragraph connecting the candidate's experience to the job's requirements",
+    "closing": "the closing paragraph with a call to action",
+    "signoff": "the sign-off followed by the candidate's name",
+}
+_SALUTATION_RE = re.compile(r"^(dear|to whom|hello|hi|greetings)\b", re.IGNORECASE)
+_SIGNOFF_RE = re.compile(r"^(sincerely|best regards|kind regards|warm regards|regards|best|respectfully|yours|thank you)\b[^\n]{0,20},?\s*$",
+                         re.IGNORECASE | re.MULTILINE)
+
+
+def section_kind(name: str) -> str:
+    """"body_2" -> "body"; other section names are their own kind."""
+    return name.split("_", 1)[0]
+
+
+def split_letter_sections(letter: str) -> list[dict]:
+    """
+    Splits a drafted letter into named sections: salutation, intro, body_1..n, closing, signoff
+    (salutation and sign-off only when present). Paragraphs are separated by blank lines.
+    """
+    text = letter.strip()
+    salutation = signoff = None
+    first_line, _, rest = text.partition("\n")
+    if _SALUTATION_RE.match(first_line) and len(first_line) < 120:
+        salutation, text = first_line.strip(), rest.strip()
+    match = None
+    for match in _SIGNOFF_RE.finditer(text):
+        pass # The last sign-off line wins
+    if match is not None and len(text) - match.start() < 200:
+        signoff, text = text[match.start():].strip(), text[:match.start()].strip()
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    sections = [{"name": "salutation", "text": salutation}] if salutation else []
+    for i, paragraph in enumerate(paragraphs):
+        if i == 0:
+            name = "intro"
+        elif i == len(paragraphs) - 1:
+            name = "closing"
+        else:
+            name = f"body_{i}"
+        sections.append({"name": name, "text": paragraph})
+    if signoff:
+        sections.append({"name": "signoff", "text": signoff})
+    return sections
+
+
+def join_sections(sections: list[dict]) -> str:
+    return "\n\n".join(section["text"] for section in sections)
+
+
+def input_fingerprints(**inputs) -> dict:
+    """Short content hash per input; dicts (the compatibility analysis) are hashed as sorted JSON."""
+    return {name: content_hash(json.dumps(value, sort_keys=True, default=str))[:16] for name, value in inputs.items()}
+
+
+def build_sections_prompt(resume_text: str, job_description_text: str, record: dict, sections: list[dict],
+                          compatibility_analysis: dict = None) -> str:
+    """
+    Prompt that rewrites the given sections in the context of the rest of the letter (resume
+    prefix first), asking for each new section under its [label] so one reply covers them all.
+    """
+    names = [section["name"] for section in sections]
+    labels = ", ".join(f"[{name}]" for name in names)
+    parts = [
+        build_resume_prefix(resume_text),
+        f"Task: You are revising part of {record['candidate_name']}'s cover letter for the position of "
+        f"'{record['job_title']}' at '{record['company_name']}'. Rewrite only the section(s) labelled {labels} "
+        "so that they fit the job description below and still flow with the rest of the letter:",
+    ]
+    parts.extend(f"  - [{section['name']}] is {SECTION_ROLES[section_kind(section['name'])]}." for section in sections)
+    parts.append("Keep each section a similar length. Return each new section on its own, starting with its label "
+                 f"on a line by itself ({labels}), and nothing else.")
+    notes = list(record.get("notes", []))
+    for section in sections:
+        notes += [f"[{section['name']}] {note}" for note in section.get("notes", [])]
+    if notes:
+        parts.append("Earlier revision requests that still apply: " + "; ".join(notes))
+    parts.append("\n--- Current Letter ---")
+    parts.extend(f"[{s['name']}]\n{s['text']}" for s in record["sections"])
+    parts += ["\n--- Job Description ---", job_description_text]
+    if any(section_kind(name) == "body" for name in names) and isinstance(compatibility_analysis, dict) \
+            and compatibility_analysis.get("strengths"):
+        parts.append("\n--- Key Strengths to Emphasize ---")
+        parts.extend(f"- {strength}" for strength in compatibility_analysis["strengths"][:3])
+    parts.append(f"\n--- Write the New {labels} Section(s) Below ---")
+    return "\n".join(parts)
+
+
+def parse_labelled_sections(reply: str, names: list[str]) -> dict:
+    """
+    {name: text} for each "[name]" block of a reply to build_sections_prompt. A reply without
+    labels is taken as the text of the only section asked for, if just one was.
+    """
+    pattern = re.compile(r"^\s*\[(" + "|".join(re.escape(name) for name in names) + r")\]\s*$", re.MULTILINE)
+    matches = list(pattern.finditer(reply))
+    if not matches:
+        return {names[0]: reply.strip()} if len(names) == 1 and reply.strip() else {}
+    parsed = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        text = reply[match.end():following.start() if following else len(reply)].strip()
+        if text:
+            parsed[match.group(1)] = text
+    return parsed
+
+
+def build_revision_prompt(record: dict, section: dict, instruction: str) -> str:
+    """Short edit prompt: one section and the request only, no resume or JD."""
+    return "\n".join([
+        f"You are editing one section of a cover letter for the position of '{record['job_title']}' at '{record['company_name']}'.",
+        f"This section is {SECTION_ROLES[section_kind(section['name'])]}.",
+        f"Revision request: {instruction}",
+        "Rewrite the section accordingly. Keep its facts unless the request says otherwise, and return only the revised text.",
+        f"\n--- Section [{section['name']}] ---",
+        section["text"],
+    ])
+
+
+def _complete(prompt: str, prompt_tokens: int = None, sections: int = 1) -> str:
+    response = gateway_completion(
+        model="gemini/gemini-1.5-flash-latest",
+        messages=prompt_messages(prompt),
+        prompt_tokens=prompt_tokens,
+        max_tokens=SECTION_MAX_TOKENS * sections,
+    )
+    return clean_cover_letter(response.choices[0].message.content)
+
+
+def load_section_record(job_id: str, store: ArtifactStore = None) -> dict:
+    store = store or get_artifact_store()
+    raw = store.get(job_id, SECTIONS_KIND)
+    return json.loads(raw) if raw else None
+
+
+def save_section_record(job_id: str, record: dict, store: ArtifactStore = None) -> str:
+    """Saves the section record and the assembled letter (as the job's "cover_letter"). Returns the letter."""
+    store = store or get_artifact_store()
+    letter = join_sections(record["sections"])
+    store.put(job_id, SECTIONS_KIND, json.dumps(record, sort_keys=True))
+    store.put(job_id, "cover_letter", letter)
+    return letter
+
+
+def draft_sectioned_cover_letter(job_id: str, resume_text: str, job_description_text: str, company_name: str,
+                                 job_title: str, candidate_name: str = "Abhay Padmanabhan",
+                                 compatibility_analysis: dict = None, store: ArtifactStore = None) -> str:
+    """
+    Returns the job's cover letter, doing as little LLM work as possible: the first time, one full
+    draft (draft_cover_letter) split into sections; afterwards, only the sections whose recorded
+    inputs (SECTION_DEPENDENCIES) changed are rewritten, all in one call returning labelled
+    sections. Unchanged inputs cost no LLM call at all. Errors are returned as "Error: ..." strings.
+    """
+    inputs = {"resume_text": resume_text, "job_description_text": job_description_text, "company_name": company_name,
+              "job_title": job_title, "candidate_name": candidate_name, "compatibility_analysis": compatibility_analysis or {}}
+    fingerprints = input_fingerprints(**inputs)
+    record = load_section_record(job_id, store)
+
+    if record is None:
+        letter = draft_cover_letter(resume_text, job_description_text, company_name, job_title, candidate_name, compatibility_analysis)
+        if letter.startswith("Error"):
+            return letter
+        sections = split_letter_sections(letter)
+        for section in sections:
+            section["deps"] = {name: fingerprints[name] for name in SECTION_DEPENDENCIES[section_kind(section["name"])]}
+        record = {"company_name": company_name, "job_title": job_title, "candidate_name": candidate_name,
+                  "notes": [], "sections": sections}
+        print(f"[draft_cover_letter_sections tool] Drafted '{job_id}' as {len(sections)} section(s): "
+              + ", ".join(s["name"] for s in sections))
+        return save_section_record(job_id, record, store)
+
+    stale = [s for s in record["sections"]
+             if any(s["deps"].get(name) != fingerprints[name] for name in SECTION_DEPENDENCIES[section_kind(s["name"])])]
+    if not stale:
+        print(f"[draft_cover_letter_sections tool] Inputs unchanged for '{job_id}'; reusing the stored letter.")
+        return join_sections(record["sections"])
+    if not os.getenv("GEMINI_API_KEY"):
+        return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
+
+    record.update(company_name=company_name, job_title=job_title, candidate_name=candidate_name)
+    print(f"[draft_cover_letter_sections tool] Regenerating {len(stale)} of {len(record['sections'])} section(s) "
+          f"for '{job_id}': " + ", ".join(s["name"] for s in stale))
+    prompt, prompt_tokens, _ = fit_prompt(
+        lambda resume, jd: build_sections_prompt(resume, jd, record, stale, compatibility_analysis),
+        resume_text, job_description_text)
+    try:
+        reply = _complete(prompt, prompt_tokens, sections=len(stale))
+    except Exception as e:
+        error_msg = f"Error during LLM call for sections {', '.join(s['name'] for s in stale)}: {type(e).__name__} - {str(e)}"
+        print(f"[draft_cover_letter_sections tool] {error_msg}")
+        return f"Error: Could not update cover letter. {error_msg}"
+    rewritten = parse_labelled_sections(reply, [s["name"] for s in stale])
+    for section in stale:
+        if section["name"] in rewritten:
+            section["text"] = rewritten[section["name"]]
+            section["deps"] = {name: fingerprints[name] for name in SECTION_DEPENDENCIES[section_kind(section["name"])]}
+    missing = [s["name"] for s in stale if s["name"] not in rewritten]
+    letter = save_section_record(job_id, record, store) # Keep the sections that were rewritten
+    if missing:
+        error_msg = f"The LLM reply did not include section(s) {', '.join(missing)}."
+        print(f"[draft_cover_letter_sections tool] {error_msg}")
+        return f"Error: Could not update cover letter. {error_msg}"
+    return letter
+
+
+@tool
+def draft_cover_letter_sections(
+    job_id: str,
+    resume_text: str,
+    job_description_text: str,
+    company_name: str,
+    job_title: str,
+    candidate_name: str = "Abhay Padmanabhan",
+    compatibility_analysis: dict = None
+) -> str:
+    """
+    Drafts or updates the cover letter for a job, stored section by section (salutation, intro,
+    body_1.., closing, signoff). The first call drafts the whole letter. Calling it again for the
+    same job_id after changing the JD, analysis or names rewrites only the sections that depend on
+    what changed, and returns the stored letter without any LLM call if nothing changed.
+
+    Args:
+        job_id: A stable identifier for the job, e.g. "Junior Data Scientist @ Innovatech Solutions Inc." or the posting URL.
+        resume_text: The full text of the candidate's resume.
+        job_description_text: The full text of the job description.
+        company_name: The name of the company to address the letter to.
+        job_title: The specific job title being applied for.
+        candidate_name: The name of the candidate (defaults to "Abhay Padmanabhan").
+        compatibility_analysis: (Optional) A dictionary containing compatibility insights (e.g., strengths, weaknesses).
+
+    Returns:
+        The full cover letter, or an error message string.
+    """
+    return draft_sectioned_cover_letter(job_id, resume_text, job_description_text, company_name, job_title,
+                                        candidate_name, compatibility_analysis)
+
+
+@tool
+def revise_cover_letter_section(job_id: str, instruction: str, section: str = None) -> str:
+    """
+    Edits a stored cover letter (from draft_cover_letter_sections) with short LLM calls that see only
+    the section being edited, e.g. to change the tone or rework one paragraph. The request is
+    remembered and applied again if that section is later regenerated.
+
+    Args:
+        job_id: The job identifier used when the letter was drafted.
+        instruction: What to change, e.g. "Make it more enthusiastic" or "Mention my Tableau dashboard project".
+        section: (Optional) The section to edit: "salutation", "intro", "body_1", "body_2", ..., "closing",
+                 "signoff", or "body" for all body paragraphs. If omitted, every paragraph except the
+                 salutation and sign-off is edited.
+
+    Returns:
+        The full revised cover letter, or an error message string.
+    """
+    record = load_section_record(job_id)
+    if record is None:
+        return f"Error: No sectioned cover letter saved for '{job_id}'. Draft it with draft_cover_letter_sections first."
+    if section:
+        targets = [s for s in record["sections"] if s["name"] == section or section_kind(s["name"]) == section]
+    else:
+        targets = [s for s in record["sections"] if section_kind(s["name"]) in ("intro", "body", "closing")]
+    if not targets:
+        return (f"Error: The letter for '{job_id}' has no section '{section}'. "
+                f"Available: {', '.join(s['name'] for s in record['sections'])}.")
+    if not os.getenv("GEMINI_API_KEY"):
+        return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
+
+    print(f"[revise_cover_letter_section tool] Revising {', '.join(s['name'] for s in targets)} of '{job_id}': {instruction}")
+    for target in targets:
+        try:
+            target["text"] = _complete(build_revision_prompt(record, target, instruction))
+        except Exception as e:
+            error_msg = f"Error during LLM call for section '{target['name']}': {type(e).__name__} - {str(e)}"
+            print(f"[revise_cover_letter_section tool] {error_msg}")
+            save_section_record(job_id, record)
+            return f"Error: Could not revise cover letter. {error_msg}"
+        if section:
+            target.setdefault("notes", []).append(instruction)
+    if not section:
+        record.setdefault("notes", []).append(instruction)
+    return save_section_record(job_id, record)
+
+
+if __name__ == '__main__':
+    import tempfile
+    import litellm
+    import utils.artifact_store as artifact_store
+    from utils.llm_stub import install_stub
+
+    load_dotenv()
+    install_stub() # Offline demo; the stub answers every prompt with the same short letter
+    calls = []
+    stubbed = litellm.completion
+    litellm.completion = lambda *args, **kwargs: calls.append(kwargs["messages"][-1]["content"]) or stubbed(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_store._store = ArtifactStore(os.path.join(tmp, "artifacts")) # Keep the demo out of data/
+        job = "Junior Data Scientist @ Innovatech Solutions Inc."
+        resume = "Abhay Padmanabhan\nSKILLS\nPython, SQL, Tableau"
+        jd = "Seeking a Junior Data Scientist with Python and SQL."
+        for label, kwargs in (("First draft", {}), ("Same inputs", {}),
+                              ("JD tweaked", {"job_description_text": jd + " Tableau is a plus."})):
+            before = len(calls)
+            args = dict(job_id=job, resume_text=resume, job_description_text=jd, company_name="Innovatech Solutions Inc.",
+                        job_title="Junior Data Scientist")
+            args.update(kwargs)
+            draft_cover_letter_sections(**args)
+            print(f"--> {label}: {len(calls) - before} LLM call(s)\n")
+        before = len(calls)
+        revise_cover_letter_section(job, "Make it sound more enthusiastic.", section="intro")
+        print(f"--> Intro revision: {len(calls) - before} LLM call(s), prompt of {len(calls[-1])} chars\n")
+        print([s["name"] for s in load_section_record(job)["sections"]])
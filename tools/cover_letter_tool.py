@@ -3,7 +3,60 @@ import os
 import json # Though we might not strictly need to parse JSON from LLM here
 from smolagents import tool
 from dotenv import load_dotenv
-import litellm # For making direct LLM calls
+from utils.llm_gateway import fit_prompt, completion as gateway_completion
+from utils.context_cache import build_resume_prefix, prompt_messages
+
+def build_cover_letter_prompt(
+    resume_text: str,
+    job_description_text: str,
+    company_name: str,
+    job_title: str,
+    candidate_name: str = "Abhay Padmanabhan",
+    compatibility_analysis: dict = None
+) -> str:
+    """
+    Builds the cover letter prompt. Shared by draft_cover_letter and the streaming API server.
+    The shared resume prefix comes first; everything specific to this job follows it.
+    """
+    prompt_parts = [
+        build_resume_prefix(resume_text),
+        f"Task: As a professional cover letter writing assistant for {candidate_name}, draft a compelling and tailored cover letter for the position of '{job_title}' at '{company_name}'.",
+        "The tone should be professional, enthusiastic, and confident.",
+        "The cover letter should highlight how the candidate's skills and experiences from the resume align with the requirements in the job description.",
+        "Structure the letter with an introduction, body paragraphs (2-3), and a conclusion with a call to action.",
+        "Ensure it is concise and impactful, typically 3-4 paragraphs long.",
+        "\n--- Job Description ---",
+        job_description_text,
+    ]
+
+    if compatibility_analysis and isinstance(compatibility_analysis, dict):
+        prompt_parts.append("\n--- Resume/JD Compatibility Analysis Insights (use these to strengthen the letter) ---")
+        if compatibility_analysis.get("strengths"):
+            prompt_parts.append("Key Strengths to Emphasize:")
+            for strength in compatibility_analysis["strengths"][:3]: # Use top 3 strengths
+                prompt_parts.append(f"- {strength}")
+        if compatibility_analysis.get("weaknesses"):
+            prompt_parts.append("\nAddress or reframe these potential perceived weaknesses if possible (subtly):")
+            for weakness in compatibility_analysis["weaknesses"][:2]: # Address top 1-2 weaknesses if sensible
+                prompt_parts.append(f"- {weakness}")
+        if compatibility_analysis.get("summary"):
+             prompt_parts.append(f"\nOverall Fit Summary: {compatibility_analysis.get('summary')}")
+    
+    prompt_parts.append("\n--- Draft the Cover Letter Below ---")
+    return "\n".join(prompt_parts)
+
+
+def clean_cover_letter(cover_letter_draft: str) -> str:
+    """Basic cleanup: LLMs sometimes add "Here is the cover letter:" before the letter itself."""
+    cover_letter_draft = cover_letter_draft.strip()
+    if cover_letter_draft.lower().startswith("here is the cover letter:") or \
+       cover_letter_draft.lower().startswith("here's the cover letter:"):
+        cover_letter_draft = cover_letter_draft.split(":", 1)[1].strip()
+    if cover_letter_draft.lower().startswith("here is a draft of the cover letter:") or \
+       cover_letter_draft.lower().startswith("here's a draft of the cover letter:"):
+        cover_letter_draft = cover_letter_draft.split(":", 1)[1].strip()
+    return cover_letter_draft
+
 
 @tool
 def draft_cover_letter(
@@ -37,55 +90,23 @@ def draft_cover_letter(
     if not gemini_api_key:
         return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
 
-    # Construct the prompt for the LLM
-    prompt_parts = [
-        f"You are a professional cover letter writing assistant for {candidate_name}.",
-        f"Draft a compelling and tailored cover letter for the position of '{job_title}' at '{company_name}'.",
-        "The tone should be professional, enthusiastic, and confident.",
-        "The cover letter should highlight how the candidate's skills and experiences from the resume align with the requirements in the job description.",
-        "Structure the letter with an introduction, body paragraphs (2-3), and a conclusion with a call to action.",
-        "Ensure it is concise and impactful, typically 3-4 paragraphs long.",
-        "\n--- Candidate's Resume ---",
-        resume_text,
-        "\n--- Job Description ---",
-        job_description_text,
-    ]
-
-    if compatibility_analysis and isinstance(compatibility_analysis, dict):
-        prompt_parts.append("\n--- Resume/JD Compatibility Analysis Insights (use these to strengthen the letter) ---")
-        if compatibility_analysis.get("strengths"):
-            prompt_parts.append("Key Strengths to Emphasize:")
-            for strength in compatibility_analysis["strengths"][:3]: # Use top 3 strengths
-                prompt_parts.append(f"- {strength}")
-        if compatibility_analysis.get("weaknesses"):
-            prompt_parts.append("\nAddress or reframe these potential perceived weaknesses if possible (subtly):")
-            for weakness in compatibility_analysis["weaknesses"][:2]: # Address top 1-2 weaknesses if sensible
-                prompt_parts.append(f"- {weakness}")
-        if compatibility_analysis.get("summary"):
-             prompt_parts.append(f"\nOverall Fit Summary: {compatibility_analysis.get('summary')}")
-    
-    prompt_parts.append("\n--- Draft the Cover Letter Below ---")
-    prompt = "\n".join(prompt_parts)
+    prompt, prompt_tokens, trimmed = fit_prompt(
+        lambda resume, jd: build_cover_letter_prompt(resume, jd, company_name, job_title, candidate_name, compatibility_analysis),
+        resume_text, job_description_text)
+    if trimmed:
+        print(f"[draft_cover_letter tool] Prompt was over budget; {', '.join(trimmed)}.")
 
     try:
-        print("[draft_cover_letter tool] Sending prompt to LLM for cover letter drafting...")
+        print(f"[draft_cover_letter tool] Sending prompt ({prompt_tokens} tokens) to LLM for cover letter drafting...")
         
-        response = litellm.completion(
+        response = gateway_completion( # litellm.completion, paced under the TPM limit
             model="gemini/gemini-1.5-flash-latest", # Or use a more powerful model like gemini-1.5-pro for better writing
-            messages=[{"role": "user", "content": prompt}],
+            messages=prompt_messages(prompt), # Resume prefix as its own (cacheable) message
+            prompt_tokens=prompt_tokens,
             # temperature=0.7 # Adjust temperature for creativity vs. factuality if needed
         )
         
-        cover_letter_draft = response.choices[0].message.content.strip()
-        
-        # Basic cleanup: LLMs sometimes add "Here is the cover letter:"
-        if cover_letter_draft.lower().startswith("here is the cover letter:") or \
-           cover_letter_draft.lower().startswith("here's the cover letter:"):
-            cover_letter_draft = cover_letter_draft.split(":", 1)[1].strip()
-        if cover_letter_draft.lower().startswith("here is a draft of the cover letter:") or \
-           cover_letter_draft.lower().startswith("here's a draft of the cover letter:"):
-            cover_letter_draft = cover_letter_draft.split(":", 1)[1].strip()
-
+        cover_letter_draft = clean_cover_letter(response.choices[0].message.content)
 
         print(f"[draft_cover_letter tool] Successfully drafted cover letter. Length: {len(cover_letter_draft)}")
         return cover_letter_draft
@@ -97,6 +118,15 @@ def draft_cover_letter(
         # traceback.print_exc()
         return f"Error: Could not draft cover letter. {error_msg}"
 
+def get_cover_letter_tools(bound_args: dict = None) -> list:
+    """
+    CrewAI-compatible cover letter tools (used by agents/writer.py): drafting, plus create_file
+    so the writer can save its draft. bound_args pre-fills e.g. resume_text / job_description_text.
+    """
+    from utils.crewai_tools import to_crewai_tools # Imported lazily so the smolagents workflow does not need crewai
+    from tools.file_tools import create_file
+    return to_crewai_tools([draft_cover_letter, create_file], bound_args)
+
 if __name__ == '__main__':
     load_dotenv()
     print("--- Testing draft_cover_letter tool ---")
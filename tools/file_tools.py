@@ -1,12 +1,14 @@
 # ai-job-application-manager/tools/file_tools.py
 import os
 from smolagents import tool
+from utils.artifact_store import atomic_write_text
 
 @tool
 def create_file(path: str, content: str) -> str:
     """
     Creates a file at the specified path with the given content.
-    If directories in the path do not exist, they will be created.
+    If directories in the path do not exist, they will be created. The file is replaced
+    atomically, so an existing file is never left half-written.
 
     Args:
         path: The filesystem path (including filename) where the file will be created.
@@ -16,11 +18,7 @@ def create_file(path: str, content: str) -> str:
         A string indicating success or failure.
     """
     try:
-        dir_name = os.path.dirname(path)
-        if dir_name: # Only create directories if a path component exists
-            os.makedirs(dir_name, exist_ok=True)
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        atomic_write_text(path, content) # Creates missing directories too
         return f"File created successfully at {path}"
     except Exception as e:
         return f"Error creating file at {path}: {e}"
@@ -2,15 +2,17 @@
 import os
 from smolagents import tool
 from dotenv import load_dotenv
+from utils.document_ingestion import get_document_loader
 
 @tool
 def load_text_from_file(file_path: str) -> str:
     """
     Loads the text content from a specified file.
-    Use this to load job descriptions or other text inputs saved in files.
+    Use this to load job descriptions or other text inputs saved in files
+    (.txt, .md, .pdf, .docx or saved .html pages).
 
     Args:
-        file_path: The relative (to project root) or absolute path to the text file.
+        file_path: The relative (to project root) or absolute path to the file.
 
     Returns:
         The text content of the file as a string, or an error message string if not found/readable.
@@ -28,9 +30,9 @@ def load_text_from_file(file_path: str) -> str:
         return error_msg
     
     try:
-        with open(actual_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        print(f"[load_text_from_file tool] Successfully loaded text. Length: {len(content)} characters.")
+        # Extracted text is cached per (path, size, mtime), so repeated loads are instant
+        content, source = get_document_loader().load(actual_path)
+        print(f"[load_text_from_file tool] Successfully loaded text ({source}). Length: {len(content)} characters.")
         return content
     except Exception as e:
         error_msg = f"Error reading file at {actual_path}: {str(e)}"
@@ -0,0 +1,298 @@
+# ai-job-application-manager/tools/job_index_tool.py
+import os
+import json
+import hashlib
+import numpy as np
+from smolagents import tool
+
+from utils.text_features import EMBEDDING_DIM, embed_text, split_resume_sections
+
+# Where the index lives (relative to the project root, like the data/ files the other tools read)
+DEFAULT_INDEX_DIR = os.path.join("data", "job_index")
+_INITIAL_CAPACITY = 1024
+
+
+def job_key(job: dict) -> str:
+    """Stable identity for a posting: its URL when it has a real one, otherwise a hash of its text."""
+    url = (job.get("url") or "").strip()
+    if url and url != "N/A":
+        return url
+    basis = "|".join(str(job.get(k, "")).strip().lower() for k in ("title", "company", "description"))
+    return "sha1:" + hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+class JobIndex:
+    """
+    An append-only vector index over job descriptions and resume sections.
+
+    Vectors live in a memory-mapped float32 file (``vectors.f32``) that grows by doubling,
+    and per-row metadata lives in ``meta.jsonl``. Re-adding an entry with the same key
+    overwrites its vector in place, so re-scraping a board does not bloat the index. Removed
+    entries keep their row as a tombstone (``"deleted": true``) until the key is added again.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, dim: int = EMBEDDING_DIM):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.vectors_path = os.path.join(index_dir, "vectors.f32")
+        self.meta_path = os.path.join(index_dir, "meta.jsonl")
+        os.makedirs(index_dir, exist_ok=True)
+
+        self.meta = []
+        self.key_to_row = {}
+        self._kind_masks = {} # kind -> boolean row mask, rebuilt lazily after writes
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry.get("key") in self.key_to_row: # A later line updates an earlier row
+                        self.meta[self.key_to_row[entry["key"]]] = entry
+                        continue
+                    self.key_to_row[entry.get("key")] = len(self.meta)
+                    self.meta.append(entry)
+
+        capacity = _INITIAL_CAPACITY
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // (4 * dim))
+        while capacity < len(self.meta):
+            capacity *= 2
+        self._open(capacity)
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def _open(self, capacity: int):
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        if mode == "r+" and os.path.getsize(self.vectors_path) < capacity * self.dim * 4:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        self.vectors.flush()
+        del self.vectors
+        self._open(new_capacity)
+
+    def add(self, items: list[tuple[str, str, dict]]) -> int:
+        """
+        Adds or updates entries. Each item is (key, text, metadata).
+        Returns the number of entries written.
+        """
+        if not items:
+            return 0
+        self._kind_masks.clear()
+        new_keys = {key for key, _, _ in items if key not in self.key_to_row}
+        self._ensure_capacity(len(self.meta) + len(new_keys))
+
+        with open(self.meta_path, "a", encoding="utf-8") as meta_file:
+            for key, text, metadata in items:
+                row = self.key_to_row.get(key)
+                if row is None:
+                    row = len(self.meta)
+                    self.key_to_row[key] = row
+                    self.meta.append(None)
+                self.vectors[row] = embed_text(text, self.dim)
+                entry = dict(metadata, key=key)
+                self.meta[row] = entry
+                meta_file.write(json.dumps(entry) + "\n")
+        self.vectors.flush()
+        return len(items)
+
+    def remove(self, keys: list[str]) -> int:
+        """Removes entries by key; they no longer appear in searches. Returns how many were removed."""
+        rows = [(key, self.key_to_row[key]) for key in keys
+                if key in self.key_to_row and not self.meta[self.key_to_row[key]].get("deleted")]
+        if not rows:
+            return 0
+        self._kind_masks.clear()
+        with open(self.meta_path, "a", encoding="utf-8") as meta_file:
+            for key, row in rows:
+                self.vectors[row] = 0.0
+                self.meta[row] = {"key": key, "deleted": True}
+                meta_file.write(json.dumps(self.meta[row]) + "\n")
+        self.vectors.flush()
+        return len(rows)
+
+    def add_jobs(self, jobs: list[dict]) -> int:
+        """Indexes scraped job dicts (as returned by scrape_job_board). Error entries are skipped."""
+        items = []
+        for job in jobs or []:
+            if not isinstance(job, dict) or job.get("error"):
+                continue
+            text = " ".join(str(job.get(k, "")) for k in ("title", "company", "description"))
+            metadata = {
+                "kind": "job",
+                "title": job.get("title"),
+                "company": job.get("company"),
+                "url": job.get("url"),
+                "description": job.get("description"),
+            }
+            items.append((job_key(job), text, metadata))
+        return self.add(items)
+
+    def add_resume_sections(self, resume_text: str, source: str = "resume") -> int:
+        """
+        Indexes each section of a resume separately so queries can match the most relevant part.
+        Sections indexed earlier for the same source that the new version no longer has are removed.
+        """
+        items = []
+        for i, (heading, body) in enumerate(split_resume_sections(resume_text)):
+            metadata = {"kind": "resume_section", "source": source, "heading": heading, "text": body}
+            items.append((f"resume:{source}:{i}", body, metadata))
+        current = {key for key, _, _ in items}
+        self.remove([key for key in self.key_to_row if key.startswith(f"resume:{source}:") and key not in current])
+        return self.add(items)
+
+    def search(self, query_text: str, top_k: int = 5, kind: str = None) -> list[dict]:
+        """
+        Returns the top_k entries by cosine similarity to query_text, best first.
+        Optionally restricts results to one kind ("job" or "resume_section").
+        """
+        n = len(self.meta)
+        if n == 0 or top_k <= 0:
+            return []
+        query = embed_text(query_text, self.dim)
+        scores = np.asarray(self.vectors[:n] @ query) # Vectors are unit length, so dot == cosine
+
+        mask = self._kind_masks.get(kind) # kind None: every entry not removed
+        if mask is None:
+            mask = np.fromiter(((m.get("kind") == kind) if kind else not m.get("deleted") for m in self.meta),
+                               dtype=bool, count=n)
+            self._kind_masks[kind] = mask
+        scores = np.where(mask, scores, -np.inf)
+
+        k = min(top_k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for row in top:
+            if not np.isfinite(scores[row]):
+                continue
+            results.append(dict(self.meta[row], similarity=round(float(scores[row]), 4)))
+        return results
+
+
+_default_index = None
+
+def get_job_index() -> JobIndex:
+    """Returns the process-wide index at DEFAULT_INDEX_DIR, opening it on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = JobIndex()
+    return _default_index
+
+
+@tool
+def index_job_postings(jobs: list[dict]) -> str:
+    """
+    Adds job postings to the local similarity index so they can later be found with find_similar_jobs.
+    Accepts the list returned by scrape_job_board directly; error entries are ignored.
+
+    Args:
+        jobs: A list of job dictionaries with 'title', 'company', 'url' and 'description' keys.
+
+    Returns:
+        A string indicating how many postings were indexed, or an error message.
+    """
+    try:
+        index = get_job_index()
+        count = index.add_jobs(jobs)
+        print(f"[index_job_postings tool] Indexed {count} posting(s). Index size: {len(index)}.")
+        return f"Indexed {count} job posting(s). The index now holds {len(index)} entries."
+    except Exception as e:
+        error_msg = f"Error indexing job postings: {type(e).__name__} - {str(e)}"
+        print(f"[index_job_postings tool] {error_msg}")
+        return error_msg
+
+
+@tool
+def index_resume_sections(resume_text: str, source: str = "resume") -> str:
+    """
+    Adds each section of a resume (split on blank lines) to the local similarity index,
+    so job descriptions can be matched against the most relevant resume sections.
+
+    Args:
+        resume_text: The full text of the resume.
+        source: A label for this resume (e.g. its filename); re-indexing the same source replaces its sections.
+
+    Returns:
+        A string indicating how many sections were indexed, or an error message.
+    """
+    try:
+        count = get_job_index().add_resume_sections(resume_text, source=source)
+        print(f"[index_resume_sections tool] Indexed {count} section(s) from '{source}'.")
+        return f"Indexed {count} resume section(s) from '{source}'."
+    except Exception as e:
+        error_msg = f"Error indexing resume sections: {type(e).__name__} - {str(e)}"
+        print(f"[index_resume_sections tool] {error_msg}")
+        return error_msg
+
+
+@tool
+def find_similar_jobs(query_text: str, top_k: int = 5, kind: str = "job") -> list[dict]:
+    """
+    Finds the indexed job postings (or resume sections) most similar to the given text.
+    Runs fully offline against the local index; use it for "jobs like this one" or to
+    match a resume or JD against previously scraped postings.
+
+    Args:
+        query_text: The text to search with, e.g. a job description or a resume.
+        top_k: The maximum number of results to return (defaults to 5).
+        kind: "job" to search postings, "resume_section" to search resume sections, or "" for both.
+
+    Returns:
+        A list of dictionaries (best match first), each with the stored fields and a 'similarity'
+        score between -1 and 1. Returns a list containing a single error dictionary on failure.
+    """
+    try:
+        results = get_job_index().search(query_text, top_k=top_k, kind=kind or None)
+        print(f"[find_similar_jobs tool] Returning {len(results)} result(s).")
+        return results
+    except Exception as e:
+        error_msg = f"Error searching the job index: {type(e).__name__} - {str(e)}"
+        print(f"[find_similar_jobs tool] {error_msg}")
+        return [{"error": error_msg}]
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+
+    print("--- Testing the local job index ---")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = JobIndex(index_dir=tmp_dir)
+        index.add_jobs([
+            {"title": "Data Analyst", "company": "AnalyzeIt Inc.", "url": "https://example.com/jobs/1",
+             "description": "SQL, Python and Tableau dashboards for marketing analytics."},
+            {"title": "Software Engineer", "company": "TestCorp", "url": "https://example.com/jobs/2",
+             "description": "Backend services in Python and Go, Kubernetes, AWS."},
+            {"title": "Project Manager", "company": "LeadTheWay LLC", "url": "https://example.com/jobs/3",
+             "description": "Agile delivery of tech projects with cross-functional teams."},
+        ])
+        for hit in index.search("Looking for a data analyst with SQL and Tableau", top_k=2):
+            print(f"  {hit['similarity']:.3f}  {hit['title']} at {hit['company']}")
+
+        # Rough latency check at scale: 100k synthetic postings
+        n = 100_000
+        print(f"\nFilling index with {n} synthetic postings...")
+        words = ["python", "sql", "tableau", "aws", "react", "java", "spark", "nlp", "agile", "docker",
+                 "analyst", "engineer", "manager", "scientist", "marketing", "finance", "sales", "cloud"]
+        rng = np.random.default_rng(0)
+        batch = []
+        for i in range(n):
+            text = " ".join(rng.choice(words, size=12))
+            batch.append({"title": f"Job {i}", "company": "Synthetic", "url": f"synthetic://{i}", "description": text})
+        index.add_jobs(batch)
+        start = time.perf_counter()
+        for _ in range(20):
+            index.search("python sql data analyst", top_k=10)
+        elapsed_ms = (time.perf_counter() - start) / 20 * 1000
+        print(f"Index size: {len(index)}. Mean top-10 query time: {elapsed_ms:.1f} ms")
@@ -2,14 +2,18 @@
 import os
 from dotenv import load_dotenv
 from smolagents import tool
-from notion_client import Client, APIResponseError
+import notion_client # Looked up as notion_client.Client at call time so utils/cassette.py can record/replay it
+from notion_client import APIResponseError
 import json # Added for more robust error parsing if needed
+from utils.processed_index import get_processed_index
 
 @tool
 def append_text_to_notion_page(page_id: str, text_to_append: str) -> str:
     """
     Appends text content as new paragraph blocks to the end of a specific Notion page.
-    Each line in text_to_append will become a new paragraph.
+    Each line in text_to_append will become a new paragraph. Jobs named in the entry (posting
+    URLs, a "--- <title> at <company> ---" header or "Company:" / "Job Title:" lines) are
+    recorded as processed, so scraping tools stop returning them.
 
     Args:
         page_id: The ID of the Notion page to append content to.
@@ -22,7 +26,7 @@ def append_text_to_notion_page(page_id: str, text_to_append: str) -> str:
     if not notion_api_key:
         return "Error: NOTION_API_KEY environment variable not set."
 
-    notion = Client(auth=notion_api_key)
+    notion = notion_client.Client(auth=notion_api_key)
     
     content_blocks = []
     if not text_to_append or not text_to_append.strip():
@@ -46,6 +50,12 @@ def append_text_to_notion_page(page_id: str, text_to_append: str) -> str:
         print(f"[append_text_to_notion_page tool] Attempting to append {len(content_blocks)} block(s) to Page ID: '{page_id}'")
         notion.blocks.children.append(block_id=page_id, children=content_blocks)
         print(f"[append_text_to_notion_page tool] Successfully appended content to page {page_id}.")
+        try:
+            recorded = get_processed_index().add_from_log_text(text_to_append)
+            if recorded:
+                print(f"[append_text_to_notion_page tool] Recorded {recorded} job fingerprint(s) as processed.")
+        except Exception as index_error: # The log entry is written; a local index failure must not turn that into an error
+            print(f"[append_text_to_notion_page tool] Could not update the processed-jobs index: {index_error}")
         return f"Successfully appended content to Notion page {page_id}."
     except APIResponseError as e:
         error_detail = "Unknown API error"
@@ -65,6 +75,11 @@ def append_text_to_notion_page(page_id: str, text_to_append: str) -> str:
         print(f"[append_text_to_notion_page tool] {error_message}")
         return error_message
 
+def get_notion_tools(bound_args: dict = None) -> list:
+    """CrewAI-compatible versions of the Notion tools (used by agents/logger.py)."""
+    from utils.crewai_tools import to_crewai_tools # Imported lazily so the smolagents workflow does not need crewai
+    return to_crewai_tools([append_text_to_notion_page], bound_args)
+
 if __name__ == '__main__':
     load_dotenv()
     import datetime # <<< --- ADD THIS IMPORT HERE ---
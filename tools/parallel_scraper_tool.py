@@ -0,0 +1,200 @@
+# ai-job-application-manager/tools/parallel_scraper_tool.py
+import os
+import queue
+import threading
+import requests
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from smolagents import tool
+
+from tools.web_scraping_tools import extract_jobs_from_html, local_file_path_from_url, local_base_url, drop_processed_jobs
+from utils.job_records import JOB_FIELDS, JobCollection, JobRecord
+
+# Worker processes ship jobs back as tuples in JOB_FIELDS order. Tuples pickle noticeably
+# smaller and faster than dicts when thousands of jobs cross the process boundary.
+_FETCHERS_DONE = object()
+
+
+def _fetch_page(url: str, session: requests.Session):
+    """Fetch stage (I/O-bound, runs on threads). Returns (url, body, base_url, error)."""
+    try:
+        parsed_url = urlparse(url)
+        if parsed_url.scheme == "file":
+            file_path = local_file_path_from_url(url)
+            with open(file_path, "rb") as f:
+                return url, f.read(), local_base_url(file_path), None
+        if parsed_url.scheme in ["http", "https"]:
+            response = session.get(url, timeout=10)
+            response.raise_for_status()
+            return url, response.content, url, None
+        return url, None, None, f"Unsupported URL scheme: '{parsed_url.scheme}'. Tool supports http, https, file."
+    except (requests.exceptions.RequestException, OSError) as e:
+        return url, None, None, f"Fetching {url} failed: {type(e).__name__} - {str(e)}"
+
+
+def _parse_page(url: str, body: bytes, base_url: str, job_title_keywords: list[str] = None):
+    """Parse stage (CPU-bound, runs in worker processes). Returns (url, compact_jobs, error)."""
+    try:
+        jobs = extract_jobs_from_html(body, base_url, job_title_keywords)
+        return url, [tuple(job.get(f) for f in JOB_FIELDS) for job in jobs], None
+    except Exception as e:
+        return url, [], f"Parsing {url} failed: {type(e).__name__} - {str(e)}"
+
+
+def _expand(compact_job: tuple) -> JobRecord:
+    return JobRecord(*compact_job) # JobRecord's positional arguments follow JOB_FIELDS
+
+
+def scrape_pages_parallel(urls: list[str], job_title_keywords: list[str] = None, max_workers: int = None,
+                          fetch_threads: int = 8, queue_size: int = None):
+    """
+    Fetches and parses many job board pages, yielding (url, jobs, error) as each page finishes;
+    jobs are JobRecord objects.
+
+    Fetching runs on `fetch_threads` threads; parsing runs in a ProcessPoolExecutor with
+    `max_workers` processes (defaults to the CPU count), so HTML parsing is not serialized
+    by the GIL. The two stages are joined by a bounded queue of `queue_size` pages, and no more
+    than `queue_size` parses are in flight, so fetching overlaps parsing while memory stays
+    bounded no matter how many URLs are passed in. If the caller stops iterating early, the
+    fetch threads stop taking URLs and exit, and parses not yet started are cancelled.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    queue_size = queue_size or max_workers * 4
+    fetch_threads = max(1, min(fetch_threads, len(urls) or 1))
+    pages = queue.Queue(maxsize=queue_size)
+    url_iter = iter(urls)
+    url_lock = threading.Lock()
+    stop = threading.Event() # Set once the consumer is gone
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.2) # Blocks while the parse stage is behind
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetcher():
+        session = requests.Session()
+        try:
+            while not stop.is_set():
+                with url_lock:
+                    url = next(url_iter, None)
+                if url is None or not put(_fetch_page(url, session)):
+                    break
+            put(_FETCHERS_DONE)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_threads)]
+    for t in threads:
+        t.start()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            pending = set()
+            finished_fetchers = 0
+            while finished_fetchers < len(threads):
+                item = pages.get()
+                if item is _FETCHERS_DONE:
+                    finished_fetchers += 1
+                    continue
+                url, body, base_url, error = item
+                if error:
+                    yield url, [], error
+                    continue
+                pending.add(pool.submit(_parse_page, url, body, base_url, job_title_keywords))
+                if len(pending) >= queue_size:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                else:
+                    done = {f for f in pending if f.done()}
+                    pending -= done
+                for future in done:
+                    url, compact_jobs, error = future.result()
+                    yield url, [_expand(j) for j in compact_jobs], error
+            for future in wait(pending).done:
+                url, compact_jobs, error = future.result()
+                yield url, [_expand(j) for j in compact_jobs], error
+        finally: # Also runs when the generator is closed or dropped, or the consumer raised
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def collect_job_boards(urls: list[str], job_title_keywords: list[str] = None, **parallel_options) -> JobCollection:
+    """scrape_pages_parallel gathered into one JobCollection; failed pages land in `.errors` with their URL."""
+    collection = JobCollection()
+    pages_done = 0
+    for url, jobs, error in scrape_pages_parallel(urls, job_title_keywords, **parallel_options):
+        pages_done += 1
+        if error:
+            print(f"[scrape_job_boards tool] {error}")
+            collection.add_error(error, url)
+        collection.extend(jobs)
+    print(f"[scrape_job_boards tool] Processed {pages_done} page(s); extracted {len(collection)} jobs.")
+    return collection
+
+
+@tool
+def scrape_job_boards(urls: list[str], job_title_keywords: list[str] = None, include_processed: bool = False) -> list[dict]:
+    """
+    Scrapes many job board pages (HTTP/HTTPS or file:///) at once, fetching concurrently and
+    parsing in parallel worker processes. Prefer this over calling scrape_job_board in a loop
+    when there are more than a handful of pages.
+
+    Args:
+        urls: The list of page URLs (http, https) or local file paths (file:///path/to/file.html).
+        job_title_keywords: A list of keywords to filter job titles by.
+                            If None or empty, all jobs found are returned.
+        include_processed: If True, also return jobs already processed (completed in a batch run or
+                           logged to Notion). By default those are left out.
+
+    Returns:
+        A list of job dictionaries (same fields as scrape_job_board). Pages that fail are reported
+        as error dictionaries ({"error": ..., "url": ...}) at the start of the list; other pages still return jobs.
+    """
+    collection = collect_job_boards(urls, job_title_keywords)
+    if not include_processed:
+        drop_processed_jobs(collection, "scrape_job_boards")
+    return collection.to_dicts()
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    import tempfile
+    import contextlib
+
+    # Benchmark: parse throughput vs worker count over generated fixture pages
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    listings_per_page = 25
+    listing = """
+        <div class="job-listing">
+            <h2 class="job-title">{title} {i}</h2>
+            <p class="company-name">Company {c}</p>
+            <a href="/jobs/{p}-{i}">View job</a>
+            <div class="job-description">{desc}</div>
+        </div>"""
+    desc = "We need someone with Python, SQL and cloud experience to build data products. " * 6
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        urls = []
+        for p in range(n_pages):
+            body = "".join(listing.format(title="Data Analyst", i=i, c=i % 7, p=p, desc=desc) for i in range(listings_per_page))
+            path = os.path.join(tmp_dir, f"page_{p}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"<html><body><h1>Jobs</h1>{body}</body></html>")
+            urls.append("file://" + os.path.abspath(path))
+
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+        print(f"Parsing {n_pages} fixture pages x {listings_per_page} listings on {cpu_count} CPU(s)")
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                job_count = sum(len(jobs) for _, jobs, _ in scrape_pages_parallel(urls, max_workers=workers))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  workers={workers:2d}: {elapsed:6.2f}s  {n_pages / elapsed:7.1f} pages/s  "
+                  f"speedup {baseline / elapsed:4.2f}x  ({job_count} jobs)")
@@ -2,15 +2,16 @@
 import os
 from smolagents import tool
 from dotenv import load_dotenv # For testing this file directly
+from utils.document_ingestion import get_document_loader
 
 @tool
 def load_resume_text(file_path: str = "data/abhay_padmanabhan.txt") -> str:
     """
-    Loads the text content from a specified resume file.
+    Loads the text content from a specified resume file (.txt, .md, .pdf, .docx or .html).
     Defaults to "data/abhay_padmanabhan.txt" if no path is provided.
 
     Args:
-        file_path: The relative or absolute path to the resume text file.
+        file_path: The relative or absolute path to the resume file.
 
     Returns:
         The text content of the resume file as a string, or an error message string if not found/readable.
@@ -36,9 +37,9 @@ def load_resume_text(file_path: str = "data/abhay_padmanabhan.txt") -> str:
         return error_msg
     
     try:
-        with open(actual_path, 'r', encoding='utf-8') as f:
-            resume_content = f.read()
-        print(f"[load_resume_text tool] Successfully loaded resume. Length: {len(resume_content)} characters.")
+        # Extracted text is cached per (path, size, mtime), so repeated loads are instant
+        resume_content, source = get_document_loader().load(actual_path)
+        print(f"[load_resume_text tool] Successfully loaded resume ({source}). Length: {len(resume_content)} characters.")
         return resume_content
     except Exception as e:
         error_msg = f"Error reading resume file at {actual_path}: {str(e)}"
@@ -1,40 +1,44 @@
 # ai-job-application-manager/tools/resume_tuner_tool.py
 import os
+import re
 import json # For potential future structured output, though text is fine for now
+import threading
+import numpy as np
 from smolagents import tool
 from dotenv import load_dotenv
-import litellm
+from utils.llm_gateway import fit_prompt, strip_boilerplate, completion as gateway_completion
+from utils.context_cache import build_resume_prefix, prompt_messages
+from utils.text_features import embed_text
 
-@tool
-def suggest_resume_improvements(
-    resume_text: str, 
-    job_description_text: str, 
-    compatibility_analysis: dict
-) -> str:
-    """
-    Suggests specific improvements to a resume to better align it with a given 
-    job description, based on a provided compatibility analysis.
-
-    Args:
-        resume_text: The full text of the candidate's current resume.
-        job_description_text: The full text of the job description.
-        compatibility_analysis: A dictionary containing compatibility insights 
-                                (e.g., compatibility_score, strengths, weaknesses, keyword_analysis).
+CLUSTER_SIMILARITY = 0.15      # JDs whose requirement keywords (TF-IDF) are at least this close share one set of suggestions
+COVERED_SIMILARITY = 0.5       # A requirement this close to one already listed for the cluster is covered by it
+MAX_CLUSTER_REQUIREMENTS = 15
+MAX_DELTA_ITEMS = 5
+_BULLET_RE = re.compile(r"^\s*(?:[-*\u2022\u00b7\u25aa]|\d+[.)])\s*")
+_FIELD_LINE_RE = re.compile(r"^(job title|title|company|location|salary|job type|employment type|date posted)\s*:", re.IGNORECASE)
+_KEYWORD_RE = re.compile(r"[a-z][a-z0-9+#]*")
+# Function words plus the vocabulary every posting uses ("strong experience working in a team"),
+# which would otherwise make unrelated roles look alike
+_STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does each etc for
+from has have having how if in into is it its may more most must new of on or our out over per plus should so such
+than that the their them then there these they this those through to under up us use using via was we well were
+what when where which while who will with within without would you your
+ability able activities applicant apply background based best candidate closely company day degree demonstrated
+desired duties environment excellent experience experienced familiarity fast field good great hands help ideal
+including join knack knowledge large least like looking minimum need nice opportunity paced part position preferred
+proficiency proficient proven qualifications related required requirement responsibilities responsible role skill
+solid strong successful team tool understanding various way work working world year
+""".split())
 
-    Returns:
-        A string containing actionable suggestions for improving the resume, 
-        or an error message string if suggestions cannot be generated.
+def build_resume_suggestions_prompt(resume_text: str, job_description_text: str, compatibility_analysis: dict) -> str:
+    """
+    Builds the resume suggestions prompt. Shared by suggest_resume_improvements and the streaming
+    API server. The shared resume prefix comes first; everything specific to this job follows it.
     """
-    print(f"[suggest_resume_improvements tool] Received resume (len: {len(resume_text)}), JD (len: {len(job_description_text)}), and analysis.")
-
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
-
-    # Construct the prompt for the LLM
     prompt_parts = [
-        "You are an expert resume writing consultant and career coach.",
-        "Your task is to provide specific, actionable suggestions to improve the provided resume to better match the given job description.",
+        build_resume_prefix(resume_text),
+        "Task: As an expert resume writing consultant and career coach, provide specific, actionable suggestions to improve the resume above to better match the given job description.",
         "Use the insights from the 'Compatibility Analysis' to guide your suggestions.",
         "Focus on:",
         "  - How to rephrase existing bullet points or add new ones to highlight relevant skills and achievements.",
@@ -42,8 +46,6 @@ def suggest_resume_improvements(
         "  - Addressing any weaknesses or gaps identified in the compatibility analysis by suggesting how to present existing experience more effectively or by identifying areas for skill development (if applicable).",
         "  - Ensuring the resume clearly demonstrates the candidate's suitability for the role described in the job description.",
         "Provide clear, bullet-pointed suggestions. Start with a brief overall recommendation.",
-        "\n--- Candidate's Current Resume ---",
-        resume_text,
         "\n--- Target Job Description ---",
         job_description_text,
         "\n--- Compatibility Analysis Insights ---"
@@ -67,14 +69,48 @@ def suggest_resume_improvements(
         prompt_parts.append("Compatibility analysis data was not in the expected format or was missing.")
 
     prompt_parts.append("\n--- Provide Resume Improvement Suggestions Below (as bullet points) ---")
-    prompt = "\n".join(prompt_parts)
+    return "\n".join(prompt_parts)
+
+
+@tool
+def suggest_resume_improvements(
+    resume_text: str, 
+    job_description_text: str, 
+    compatibility_analysis: dict
+) -> str:
+    """
+    Suggests specific improvements to a resume to better align it with a given 
+    job description, based on a provided compatibility analysis.
+
+    Args:
+        resume_text: The full text of the candidate's current resume.
+        job_description_text: The full text of the job description.
+        compatibility_analysis: A dictionary containing compatibility insights 
+                                (e.g., compatibility_score, strengths, weaknesses, keyword_analysis).
+
+    Returns:
+        A string containing actionable suggestions for improving the resume, 
+        or an error message string if suggestions cannot be generated.
+    """
+    print(f"[suggest_resume_improvements tool] Received resume (len: {len(resume_text)}), JD (len: {len(job_description_text)}), and analysis.")
+
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
+
+    prompt, prompt_tokens, trimmed = fit_prompt(
+        lambda resume, jd: build_resume_suggestions_prompt(resume, jd, compatibility_analysis),
+        resume_text, job_description_text)
+    if trimmed:
+        print(f"[suggest_resume_improvements tool] Prompt was over budget; {', '.join(trimmed)}.")
 
     try:
-        print("[suggest_resume_improvements tool] Sending prompt to LLM for resume suggestions...")
+        print(f"[suggest_resume_improvements tool] Sending prompt ({prompt_tokens} tokens) to LLM for resume suggestions...")
         
-        response = litellm.completion(
+        response = gateway_completion( # litellm.completion, paced under the TPM limit
             model="gemini/gemini-1.5-flash-latest", # Consider gemini-1.5-pro for more nuanced suggestions
-            messages=[{"role": "user", "content": prompt}],
+            messages=prompt_messages(prompt), # Resume prefix as its own (cacheable) message
+            prompt_tokens=prompt_tokens,
             # temperature=0.5 # Suggestions should be fairly grounded
         )
         
@@ -88,6 +124,194 @@ def suggest_resume_improvements(
         print(f"[suggest_resume_improvements tool] {error_msg}")
         return f"Error: Could not generate resume suggestions. {error_msg}"
 
+def extract_requirements(job_description_text: str) -> list[str]:
+    """
+    The requirement-bearing sentences of a JD: every bullet or sentence of three or more words,
+    minus boilerplate paragraphs, headings and "Company: ..." style header fields.
+    """
+    requirements = []
+    for line in strip_boilerplate(job_description_text or "").splitlines():
+        line = _BULLET_RE.sub("", line).strip()
+        if not line or line.endswith(":") or _FIELD_LINE_RE.match(line):
+            continue
+        for sentence in re.split(r"(?<=[.;!?])\s+", line):
+            sentence = sentence.strip(" .;")
+            if len(sentence.split()) >= 3:
+                requirements.append(sentence)
+    return list(dict.fromkeys(requirements))
+
+
+def requirement_keywords(text: str) -> list[str]:
+    """Lower-cased words of the text minus stopwords and generic JD vocabulary, with plural 's' stripped."""
+    keywords = []
+    for word in _KEYWORD_RE.findall((text or "").lower()):
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        if len(word) > 1 and word not in _STOPWORDS:
+            keywords.append(word)
+    return keywords
+
+
+def keyword_vectors(job_description_texts: list[str]) -> np.ndarray:
+    """
+    One L2-normalised TF-IDF row per JD over the keywords of its requirements, with IDF taken
+    from the JDs themselves: terms most postings share count for little, so paraphrased postings
+    of one role type match on their specific skills and tools rather than on shared wording.
+    """
+    keywords = [requirement_keywords("\n".join(extract_requirements(jd)) or jd) for jd in job_description_texts]
+    vocabulary = {word: i for i, word in enumerate(sorted({word for words in keywords for word in words}))}
+    counts = np.zeros((len(keywords), len(vocabulary)), dtype=np.float32)
+    for row, words in enumerate(keywords):
+        for word in words:
+            counts[row, vocabulary[word]] += 1
+    tf = np.where(counts > 0, 1.0 + np.log(np.maximum(counts, 1.0)), 0.0) # Sublinear term frequency
+    idf = np.log((1.0 + len(keywords)) / (1.0 + (counts > 0).sum(axis=0))) + 1.0
+    vectors = tf * idf
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def cluster_job_descriptions(job_description_texts: list[str], threshold: float = CLUSTER_SIMILARITY) -> list[list[int]]:
+    """
+    Groups JDs by the similarity of their requirement keywords (see keyword_vectors). Single
+    pass: each JD joins the cluster whose centroid it is closest to if that is at least
+    `threshold` cosine similarity, otherwise it starts a new cluster. Returns lists of indices.
+    """
+    clusters, centroid_sums = [], []
+    for i, vector in enumerate(keyword_vectors(job_description_texts)):
+        if clusters:
+            sums = np.array(centroid_sums)
+            similarities = sums @ vector / np.maximum(np.linalg.norm(sums, axis=1), 1e-9)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                clusters[best].append(i)
+                centroid_sums[best] = centroid_sums[best] + vector
+                continue
+        clusters.append([i])
+        centroid_sums.append(vector)
+    return clusters
+
+
+def build_cluster_suggestions_prompt(resume_text: str, requirements_text: str, posting_count: int) -> str:
+    """Resume suggestions prompt for a group of similar postings, described by their shared requirements."""
+    return "\n".join([
+        build_resume_prefix(resume_text),
+        "Task: As an expert resume writing consultant and career coach, provide specific, actionable suggestions to improve the resume above for a type of role as a whole.",
+        f"The candidate is applying to {posting_count} similar job posting(s) for this type of role.",
+        "The requirements below are the ones these postings have in common, most common first.",
+        "Focus on:",
+        "  - How to rephrase existing bullet points or add new ones to highlight relevant skills and achievements.",
+        "  - Incorporating the important keywords from these requirements naturally into the resume.",
+        "  - Requirements the resume does not yet demonstrate, and how to present existing experience to cover them.",
+        "Do not tailor the suggestions to any single company.",
+        "Provide clear, bullet-pointed suggestions. Start with a brief overall recommendation.",
+        "\n--- Requirements Shared by the Target Postings ---",
+        requirements_text,
+        "\n--- Provide Resume Improvement Suggestions Below (as bullet points) ---",
+    ])
+
+
+class ClusteredSuggestions:
+    """
+    Resume suggestions for many pending JDs at once. The JDs are clustered by requirement
+    similarity up front; the LLM is asked for suggestions once per cluster (on first use, from the
+    cluster's most common requirements), and each posting then gets those suggestions plus a
+    short posting-specific delta built locally from its requirements that the cluster does not
+    cover and the missing keywords in its compatibility analysis. LLM calls therefore scale with
+    the number of distinct role types rather than the number of postings. Thread-safe.
+    """
+
+    def __init__(self, resume_text: str, job_descriptions: dict, threshold: float = CLUSTER_SIMILARITY):
+        self.resume_text = resume_text
+        job_ids = list(job_descriptions)
+        self.clusters = []
+        self._cluster_of = {}
+        for members in cluster_job_descriptions([job_descriptions[job_id] for job_id in job_ids], threshold):
+            cluster = {"job_ids": [job_ids[i] for i in members], "suggestions": None, "lock": threading.Lock()}
+            cluster["requirements"] = self._shared_requirements([job_descriptions[job_ids[i]] for i in members])
+            cluster["vectors"] = np.array([embed_text(r) for r in cluster["requirements"]])
+            for i in members:
+                self._cluster_of[job_ids[i]] = len(self.clusters)
+            self.clusters.append(cluster)
+        self.stats = {"jobs": len(job_ids), "clusters": len(self.clusters), "llm_calls": 0}
+        print(f"[clustered suggestions] {len(job_ids)} JD(s) grouped into {len(self.clusters)} cluster(s).")
+
+    @staticmethod
+    def _shared_requirements(job_description_texts: list[str]) -> list[str]:
+        # Rank every requirement line by how many of the cluster's JDs ask for something similar
+        per_jd = [extract_requirements(jd) for jd in job_description_texts]
+        lines = [line for requirements in per_jd for line in requirements]
+        if not lines:
+            return []
+        vectors = np.array([embed_text(line) for line in lines])
+        owners = np.array([i for i, requirements in enumerate(per_jd) for _ in requirements])
+        similar = vectors @ vectors.T >= COVERED_SIMILARITY
+        support = [len(set(owners[similar[i]])) for i in range(len(lines))]
+        chosen = []
+        for i in sorted(range(len(lines)), key=lambda i: -support[i]):
+            if not any(similar[i, j] for j in chosen):
+                chosen.append(i)
+            if len(chosen) == MAX_CLUSTER_REQUIREMENTS:
+                break
+        return [lines[i] for i in chosen]
+
+    def cluster_suggestions(self, index: int) -> str:
+        """The cluster's shared suggestions, generated on first use. Errors are returned, not cached."""
+        cluster = self.clusters[index]
+        with cluster["lock"]:
+            if cluster["suggestions"] is not None:
+                return cluster["suggestions"]
+            if not os.getenv("GEMINI_API_KEY"):
+                return "Error: GEMINI_API_KEY not found in environment for LLM call within tool."
+            prompt, prompt_tokens, trimmed = fit_prompt(
+                lambda resume, requirements: build_cluster_suggestions_prompt(resume, requirements, len(cluster["job_ids"])),
+                self.resume_text, "\n".join(f"- {r}" for r in cluster["requirements"]))
+            if trimmed:
+                print(f"[clustered suggestions] Prompt was over budget; {', '.join(trimmed)}.")
+            try:
+                print(f"[clustered suggestions] Generating suggestions for cluster {index} "
+                      f"({len(cluster['job_ids'])} posting(s), {prompt_tokens} prompt tokens)...")
+                response = gateway_completion(
+                    model="gemini/gemini-1.5-flash-latest",
+                    messages=prompt_messages(prompt), # Resume prefix as its own (cacheable) message
+                    prompt_tokens=prompt_tokens,
+                )
+                self.stats["llm_calls"] += 1
+                cluster["suggestions"] = response.choices[0].message.content.strip()
+                return cluster["suggestions"]
+            except Exception as e:
+                error_msg = f"Error during LLM call in clustered suggestions: {type(e).__name__} - {str(e)}"
+                print(f"[clustered suggestions] {error_msg}")
+                return f"Error: Could not generate resume suggestions. {error_msg}"
+
+    def posting_delta(self, index: int, job_description_text: str, compatibility_analysis: dict = None,
+                      base_suggestions: str = "") -> str:
+        """Posting-specific additions to the cluster suggestions, built without an LLM call."""
+        cluster = self.clusters[index]
+        items = []
+        for requirement in extract_requirements(job_description_text):
+            vector = embed_text(requirement)
+            if not len(cluster["vectors"]) or float(np.max(cluster["vectors"] @ vector)) < COVERED_SIMILARITY:
+                items.append(f"This posting also asks for: {requirement}. Show it explicitly if your experience supports it.")
+        if isinstance(compatibility_analysis, dict):
+            covered = base_suggestions.lower()
+            for item in compatibility_analysis.get("keyword_analysis") or []:
+                keyword = str(item.get("keyword") or "")
+                if keyword and not item.get("present_in_resume") and keyword.lower() not in covered:
+                    items.append(f"Work the keyword '{keyword}' into the resume where it is accurate; this posting looks for it.")
+        if not items:
+            return "Specific to this posting: no changes beyond the suggestions above."
+        return "Specific to this posting:\n" + "\n".join(f"- {item}" for item in items[:MAX_DELTA_ITEMS])
+
+    def suggest(self, job_id: str, job_description_text: str, compatibility_analysis: dict = None) -> str:
+        """Cluster suggestions plus this posting's delta. JDs not known at construction get a regular per-job call."""
+        index = self._cluster_of.get(job_id)
+        if index is None:
+            return suggest_resume_improvements(self.resume_text, job_description_text, compatibility_analysis or {})
+        base = self.cluster_suggestions(index)
+        if base.startswith("Error"):
+            return base
+        return base + "\n\n" + self.posting_delta(index, job_description_text, compatibility_analysis, base)
+
 if __name__ == '__main__':
     load_dotenv()
     print("--- Testing suggest_resume_improvements tool ---")
@@ -1,27 +1,207 @@
 # ai-job-application-manager/tools/web_scraping_tools.py
 import os
+import re
+import json
+import html
 from smolagents import tool
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
-@tool
-def scrape_job_board(url: str, job_title_keywords: list[str] = None) -> list[dict]:
-    """
-    Scrapes a job board URL (HTTP/HTTPS) or a local HTML file (file:///) for job postings.
-    Optionally filters by keywords in the job title (case-insensitive).
+from utils.job_records import JobCollection
+from utils.processed_index import get_processed_index
 
-    Args:
-        url: The URL (http, https) or local file path (file:///path/to/file.html) of the job board.
-        job_title_keywords: A list of keywords to filter job titles by. 
-                            If None or empty, all jobs found are returned.
+# Matches <script type="application/ld+json"> blocks without building a DOM
+_JSON_LD_RE = re.compile(
+    r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
 
-    Returns:
-        A list of dictionaries, where each dictionary contains 'title', 'company', 
-        'url', and 'description'. Returns a list containing a single error dictionary
-        if a significant error occurs.
+def local_file_path_from_url(url: str) -> str:
+    """Converts a file:// URL into a local filesystem path (handling Windows drive letters)."""
+    # On macOS/Linux, path is parsed_url.path. On Windows, it often starts with an extra '/'
+    file_path = urlparse(url).path
+    if os.name == 'nt' and file_path.startswith('/') and len(file_path) > 2 and file_path[2] == ':':
+        file_path = file_path[1:] # Remove leading '/' for paths like /C:/...
+    return file_path
+
+
+def local_base_url(file_path: str) -> str:
+    """Base URL for resolving relative links found in a local HTML file: the file's directory."""
+    if os.name == 'nt': # Ensure correct formatting for Windows file URIs as base
+        return 'file:///' + os.path.dirname(os.path.abspath(file_path)).replace(os.sep, '/') + '/'
+    return 'file://' + os.path.dirname(os.path.abspath(file_path)) + '/'
+
+
+def _plain_text(value) -> str:
+    """Strips HTML tags and entities from a JSON-LD text field (descriptions are often HTML)."""
+    if not isinstance(value, str):
+        return ""
+    text = _TAG_RE.sub(" ", html.unescape(value))
+    return re.sub(r"[ \t\r\f\v]+", " ", text).replace(" \n", "\n").strip()
+
+
+def _json_ld_name(value) -> str:
+    if isinstance(value, dict):
+        return value.get("name") or ""
+    if isinstance(value, list) and value:
+        return _json_ld_name(value[0])
+    return value if isinstance(value, str) else ""
+
+
+def _json_ld_location(posting: dict) -> str:
+    locations = posting.get("jobLocation")
+    if isinstance(locations, dict):
+        locations = [locations]
+    parts = []
+    for location in locations or []:
+        address = location.get("address", {}) if isinstance(location, dict) else {}
+        if isinstance(address, str):
+            parts.append(address)
+            continue
+        fields = [address.get("addressLocality"), address.get("addressRegion"), _json_ld_name(address.get("addressCountry"))]
+        text = ", ".join(f for f in fields if f)
+        if text:
+            parts.append(text)
+    if str(posting.get("jobLocationType", "")).upper() == "TELECOMMUTE":
+        parts.append("Remote")
+    return "; ".join(parts) if parts else "Location N/A"
+
+
+def _json_ld_salary(posting: dict):
+    salary = posting.get("baseSalary") or posting.get("estimatedSalary")
+    if isinstance(salary, list):
+        salary = salary[0] if salary else None
+    if not isinstance(salary, dict):
+        return None
+    value = salary.get("value")
+    result = {"currency": salary.get("currency")}
+    if isinstance(value, dict):
+        result.update({
+            "min": value.get("minValue"),
+            "max": value.get("maxValue"),
+            "value": value.get("value"),
+            "unit": value.get("unitText"),
+        })
+    else:
+        result["value"] = value
+    return {k: v for k, v in result.items() if v is not None}
+
+
+def _iter_json_ld_postings(data):
+    """Yields every JobPosting object in a JSON-LD document (top level, lists and @graph)."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_json_ld_postings(item)
+    elif isinstance(data, dict):
+        types = data.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "JobPosting" in types:
+            yield data
+        if "@graph" in data:
+            yield from _iter_json_ld_postings(data["@graph"])
+
+
+def extract_jobs_from_json_ld(html_content, base_url_for_links: str) -> list[dict]:
     """
+    Fast path: extracts schema.org JobPosting records from application/ld+json script blocks
+    with a regex scan and json.loads, without building a DOM. Descriptions are returned in full,
+    along with posting dates, location, employment type and salary when the board provides them.
+    Returns an empty list when the page has no JobPosting JSON-LD.
+    """
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", errors="replace")
+    if "ld+json" not in html_content: # Cheap pre-check before running the regex
+        return []
+
     jobs = []
+    for match in _JSON_LD_RE.finditer(html_content):
+        raw = match.group(1).strip()
+        if raw.startswith("<!--"): # Some CMSs wrap the JSON in an HTML comment
+            raw = raw[4:].rsplit("-->", 1)[0]
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            continue # Malformed block; others on the page may still be fine
+        for posting in _iter_json_ld_postings(data):
+            link = posting.get("url") or posting.get("sameAs")
+            job = {
+                "title": _plain_text(posting.get("title")) or "Job Title N/A",
+                "company": _json_ld_name(posting.get("hiringOrganization")) or "Company N/A",
+                "url": urljoin(base_url_for_links, link) if isinstance(link, str) else "N/A",
+                "description": _plain_text(posting.get("description")) or "No description available.",
+                "location": _json_ld_location(posting),
+                "date_posted": posting.get("datePosted"),
+                "valid_through": posting.get("validThrough"),
+                "employment_type": posting.get("employmentType"),
+                "salary": _json_ld_salary(posting),
+            }
+            jobs.append({k: v for k, v in job.items() if v is not None})
+    return jobs
+
+
+def _extract_jobs_with_selectors(html_content, base_url_for_links: str) -> list[dict]:
+    """Fallback path for boards without JSON-LD: the div.job-listing markup of test_jobs.html."""
+    jobs = []
+    soup = BeautifulSoup(html_content, 'html.parser')
+    # These selectors are for the test_jobs.html structure. Adapt for real sites.
+    job_elements = soup.find_all('div', class_='job-listing') 
+
+    if not job_elements:
+        print(f"[scrape_job_board tool] No job elements found with class 'job-listing' on {base_url_for_links}.")
+        return jobs
+
+    print(f"[scrape_job_board tool] Found {len(job_elements)} potential job elements.")
+    for i, job_elem in enumerate(job_elements):
+        title_elem = job_elem.find('h2', class_='job-title')
+        company_elem = job_elem.find('p', class_='company-name')
+        link_elem = job_elem.find('a', href=True)
+        description_elem = job_elem.find('div', class_='job-description')
+
+        title = title_elem.text.strip() if title_elem else f"Job Title N/A {i+1}"
+        company = company_elem.text.strip() if company_elem else "Company N/A"
+        
+        job_url_path = "N/A"
+        if link_elem and link_elem.get('href'):
+            job_url_path = urljoin(base_url_for_links, link_elem['href'])
+        
+        description = description_elem.text.strip() if description_elem else "No description available."
+
+        jobs.append({
+            "title": title,
+            "company": company,
+            "url": job_url_path,
+            "description": description
+        })
+    return jobs
+
+
+def extract_jobs_from_html(html_content, base_url_for_links: str, job_title_keywords: list[str] = None) -> list[dict]:
+    """
+    Parses job listings out of a job board page. Shared by scrape_job_board and the board poller.
+    Tries the JSON-LD fast path first and falls back to the CSS-selector path when the page
+    has no JobPosting data. Returns a (possibly empty) list of job dictionaries; parsing errors
+    propagate to the caller.
+    """
+    jobs = extract_jobs_from_json_ld(html_content, base_url_for_links)
+    if jobs:
+        print(f"[scrape_job_board tool] Found {len(jobs)} JobPosting record(s) in JSON-LD.")
+    else:
+        jobs = _extract_jobs_with_selectors(html_content, base_url_for_links)
+
+    if job_title_keywords:
+        jobs = [job for job in jobs if any(keyword.lower() in job["title"].lower() for keyword in job_title_keywords)]
+    return jobs
+
+
+def fetch_job_board(url: str, job_title_keywords: list[str] = None, index_results: bool = False) -> JobCollection:
+    """
+    Does the work behind scrape_job_board, returning a JobCollection: compact job records in
+    `.jobs` and any failure in `.errors`, so callers that handle many postings (batch runs,
+    large crawls) never hold them as per-job dictionaries.
+    """
+    collection = JobCollection()
     html_content = ""
     base_url_for_links = url 
 
@@ -29,21 +209,17 @@ def scrape_job_board(url: str, job_title_keywords: list[str] = None) -> list[dic
         parsed_url = urlparse(url)
         if parsed_url.scheme == "file":
             print(f"[scrape_job_board tool] Reading local file: {url}")
-            # On macOS/Linux, path is parsed_url.path. On Windows, it often starts with an extra '/'
-            file_path = parsed_url.path
-            if os.name == 'nt' and file_path.startswith('/') and len(file_path) > 2 and file_path[2] == ':':
-                file_path = file_path[1:] # Remove leading '/' for paths like /C:/...
+            file_path = local_file_path_from_url(url)
             
             if not os.path.exists(file_path):
                 error_msg = f"Local file not found: {file_path}"
                 print(f"[scrape_job_board tool] {error_msg}")
-                return [{"error": error_msg}]
+                collection.add_error(error_msg)
+                return collection
             with open(file_path, 'r', encoding='utf-8') as f:
                 html_content = f.read()
             # For local files, set base_url for resolving relative links to the file's directory
-            base_url_for_links = 'file://' + os.path.dirname(os.path.abspath(file_path)) + '/'
-            if os.name == 'nt': # Ensure correct formatting for Windows file URIs as base
-                 base_url_for_links = 'file:///' + os.path.dirname(os.path.abspath(file_path)).replace(os.sep, '/') + '/'
+            base_url_for_links = local_base_url(file_path)
 
 
         elif parsed_url.scheme in ["http", "https"]:
@@ -55,59 +231,67 @@ def scrape_job_board(url: str, job_title_keywords: list[str] = None) -> list[dic
         else:
             error_msg = f"Unsupported URL scheme: '{parsed_url.scheme}'. Tool supports http, https, file."
             print(f"[scrape_job_board tool] {error_msg}")
-            return [{"error": error_msg}]
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-        # These selectors are for the test_jobs.html structure. Adapt for real sites.
-        job_elements = soup.find_all('div', class_='job-listing') 
-
-        if not job_elements:
-            print(f"[scrape_job_board tool] No job elements found with class 'job-listing' on {url}.")
-            return [] # Return empty list if no matching elements, not an error.
+            collection.add_error(error_msg)
+            return collection
 
-        print(f"[scrape_job_board tool] Found {len(job_elements)} potential job elements.")
-        for i, job_elem in enumerate(job_elements):
-            title_elem = job_elem.find('h2', class_='job-title')
-            company_elem = job_elem.find('p', class_='company-name')
-            link_elem = job_elem.find('a', href=True)
-            description_elem = job_elem.find('div', class_='job-description')
-
-            title = title_elem.text.strip() if title_elem else f"Job Title N/A {i+1}"
-            company = company_elem.text.strip() if company_elem else "Company N/A"
-            
-            job_url_path = "N/A"
-            if link_elem and link_elem.get('href'):
-                job_url_path = urljoin(base_url_for_links, link_elem['href'])
-            
-            description = description_elem.text.strip() if description_elem else "No description available."
-            
-            if job_title_keywords:
-                matches_keywords = any(keyword.lower() in title.lower() for keyword in job_title_keywords)
-                if not matches_keywords:
-                    continue
-
-            jobs.append({
-                "title": title,
-                "company": company,
-                "url": job_url_path,
-                "description": description[:250] + "..." if len(description) > 250 else description
-            })
-        
+        # Returns an empty list if no matching elements are found; that is not an error.
+        jobs = extract_jobs_from_html(html_content, base_url_for_links, job_title_keywords)
         print(f"[scrape_job_board tool] Successfully extracted {len(jobs)} jobs matching criteria.")
-        return jobs
+        if index_results and jobs:
+            from tools.job_index_tool import get_job_index # Imported lazily: numpy is only needed when indexing
+            indexed = get_job_index().add_jobs(jobs)
+            print(f"[scrape_job_board tool] Added {indexed} jobs to the local similarity index.")
+        collection.extend(jobs)
 
     except requests.exceptions.RequestException as e:
         print(f"[scrape_job_board tool] HTTP request failed for {url}: {str(e)}")
-        return [{"error": f"HTTP request failed for {url}: {str(e)}"}]
+        collection.add_error(f"HTTP request failed for {url}: {str(e)}")
     except FileNotFoundError:
         error_msg = f"Local file not found (FileNotFoundError) for path derived from: {url}"
         print(f"[scrape_job_board tool] {error_msg}")
-        return [{"error": error_msg}]
+        collection.add_error(error_msg)
     except Exception as e:
         print(f"[scrape_job_board tool] An error occurred during scraping {url}: {type(e).__name__} - {str(e)}")
         # import traceback # Uncomment for full traceback during debugging
         # traceback.print_exc()
-        return [{"error": f"An unexpected error ({type(e).__name__}) occurred during scraping {url}: {str(e)}"}]
+        collection.add_error(f"An unexpected error ({type(e).__name__}) occurred during scraping {url}: {str(e)}")
+    return collection
+
+def drop_processed_jobs(collection: JobCollection, tool_name: str = "scrape_job_board") -> JobCollection:
+    """Removes jobs already processed (applied to and logged) from the collection, in place."""
+    collection.jobs, processed = get_processed_index().partition(collection.jobs)
+    if processed:
+        print(f"[{tool_name} tool] Skipped {len(processed)} job(s) already processed: "
+              + ", ".join(f"{job.title} at {job.company}" for job in processed[:5]) + (" ..." if len(processed) > 5 else ""))
+    return collection
+
+@tool
+def scrape_job_board(url: str, job_title_keywords: list[str] = None, index_results: bool = False,
+                     include_processed: bool = False) -> list[dict]:
+    """
+    Scrapes a job board URL (HTTP/HTTPS) or a local HTML file (file:///) for job postings.
+    Optionally filters by keywords in the job title (case-insensitive).
+
+    Args:
+        url: The URL (http, https) or local file path (file:///path/to/file.html) of the job board.
+        job_title_keywords: A list of keywords to filter job titles by. 
+                            If None or empty, all jobs found are returned.
+        index_results: If True, the extracted jobs are also added to the local similarity
+                       index used by find_similar_jobs.
+        include_processed: If True, also return jobs already processed (completed in a batch run or
+                           logged to Notion). By default those are left out.
+
+    Returns:
+        A list of dictionaries, where each dictionary contains 'title', 'company', 
+        'url', and 'description'. When the page embeds schema.org JobPosting JSON-LD, jobs
+        also carry 'location', 'date_posted', 'valid_through', 'employment_type' and 'salary'
+        where available. Returns a list containing a single error dictionary
+        if a significant error occurs.
+    """
+    collection = fetch_job_board(url, job_title_keywords, index_results)
+    if not include_processed:
+        drop_processed_jobs(collection)
+    return collection.to_dicts()
 
 if __name__ == '__main__':
     project_root_for_test_html = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -162,4 +346,34 @@ if __name__ == '__main__':
             print(f"  Title: {job.get('title')}, Company: {job.get('company')}, URL: {job.get('url')}")
     else:
         print("No filtered jobs found from local file or an error occurred:")
-        if scraped_jobs_filtered: print(scraped_jobs_filtered)
\ No newline at end of file
+        if scraped_jobs_filtered: print(scraped_jobs_filtered)
+
+    print(f"\nTesting the JSON-LD fast path against the selector path")
+    import time
+    posting_ld = {
+        "@context": "https://schema.org", "@type": "JobPosting",
+        "title": "Machine Learning Engineer", "datePosted": "2025-05-01", "validThrough": "2025-06-30",
+        "employmentType": "FULL_TIME", "url": "/jobs/mle-42",
+        "description": "<p>Build and ship <b>ML models</b> in Python.</p><p>" + "Details. " * 200 + "</p>",
+        "hiringOrganization": {"@type": "Organization", "name": "TestCorp"},
+        "jobLocation": {"@type": "Place", "address": {"addressLocality": "San Francisco", "addressRegion": "CA", "addressCountry": "US"}},
+        "baseSalary": {"@type": "MonetaryAmount", "currency": "USD",
+                       "value": {"@type": "QuantitativeValue", "minValue": 150000, "maxValue": 190000, "unitText": "YEAR"}},
+    }
+    ld_block = '<script type="application/ld+json">' + json.dumps(posting_ld) + '</script>'
+    ld_page = "<html><head>" + ld_block + "</head><body>" + test_html_content * 20 + "</body></html>"
+    ld_jobs = extract_jobs_from_json_ld(ld_page, "https://example.com/")
+    print(json.dumps({k: (v[:60] + "..." if k == "description" else v) for k, v in ld_jobs[0].items()}, indent=2))
+    print(f"Full description length: {len(ld_jobs[0]['description'])} characters")
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        extract_jobs_from_json_ld(ld_page, "https://example.com/")
+    json_ld_ms = (time.perf_counter() - start) / runs * 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        _extract_jobs_with_selectors(ld_page, "https://example.com/")
+    selector_ms = (time.perf_counter() - start) / runs * 1000
+    print(f"JSON-LD path: {json_ld_ms:.3f} ms/page, selector path: {selector_ms:.3f} ms/page "
+          f"({selector_ms / max(json_ld_ms, 1e-9):.0f}x)")
@@ -0,0 +1,205 @@
+# ai-job-application-manager/ui/dashboard.py
+import os
+import json
+import html
+import argparse
+import datetime
+from urllib.parse import urlencode
+from aiohttp import web
+
+from utils.job_stats import get_job_stats, DEFAULT_PAGE_SIZE
+from utils.artifact_store import get_artifact_store
+
+STATUSES = ("ok", "error", "deferred")
+_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 1.5rem; color: #222; }
+h1 { margin-bottom: .25rem; } h2 { margin-top: 2rem; font-size: 1.1rem; }
+.cards { display: flex; gap: 1rem; flex-wrap: wrap; }
+.card { border: 1px solid #ddd; border-radius: 6px; padding: .6rem 1rem; min-width: 8rem; }
+.card b { display: block; font-size: 1.4rem; }
+table { border-collapse: collapse; font-size: .9rem; }
+th, td { border-bottom: 1px solid #eee; padding: .25rem .6rem; text-align: left; vertical-align: top; }
+td.num, th.num { text-align: right; }
+.bar { background: #4a7bd0; height: .9rem; display: inline-block; }
+.row { display: flex; gap: 3rem; flex-wrap: wrap; }
+.ok { color: #1a7f37; } .error { color: #c0392b; } .deferred { color: #8a6d00; }
+pre { white-space: pre-wrap; background: #f7f7f7; padding: .75rem; max-width: 60rem; }
+"""
+
+
+def _e(value) -> str:
+    return html.escape("" if value is None else str(value))
+
+
+def _when(timestamp) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else ""
+
+
+def _page(title: str, body: str) -> web.Response:
+    return web.Response(content_type="text/html", text=(
+        f"<!doctype html><html><head><meta charset='utf-8'><title>{_e(title)}</title><style>{_STYLE}</style></head>"
+        f"<body>{body}</body></html>"))
+
+
+def _bad_request(message: str, api: bool):
+    if api:
+        return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+    return web.HTTPBadRequest(text=message)
+
+
+def _jobs_query(request: web.Request, api: bool = False) -> dict:
+    query = request.query
+    try:
+        limit = int(query.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise _bad_request("limit must be a whole number.", api)
+    return {"limit": limit, "cursor": query.get("cursor") or None, "sort": query.get("sort") or "recent",
+            "status": query.get("status") or None, "company": query.get("company") or None}
+
+
+def _jobs_page(request: web.Request, query: dict, api: bool = False) -> dict:
+    try:
+        return request.app["stats"].jobs_page(**query)
+    except ValueError as e: # Unknown sort, or a cursor that was not handed out by a previous page
+        raise _bad_request(str(e), api)
+
+
+def _link(**params) -> str:
+    return "/?" + urlencode({key: value for key, value in params.items() if value})
+
+
+async def index(request: web.Request):
+    stats = request.app["stats"]
+    overview = stats.overview()
+    query = _jobs_query(request)
+    page = _jobs_page(request, query)
+    filters = {key: query[key] for key in ("sort", "status", "company")}
+
+    cards = [("Jobs", overview["jobs"])] + [(status, overview["statuses"].get(status, 0)) for status in STATUSES]
+    cards += [("Companies", overview["company_total"]), ("LLM tokens", f"{overview['llm_spend']['tokens']:,}"),
+              ("LLM spend", f"${overview['llm_spend']['cost_usd']:.4f}")]
+    parts = ["<h1>Job applications</h1>",
+             "<div class='cards'>" + "".join(f"<div class='card'>{_e(label)}<b>{_e(value)}</b></div>" for label, value in cards) + "</div>"]
+
+    peak = max((bucket["jobs"] for bucket in overview["score_histogram"]), default=0) or 1
+    histogram = "".join(f"<tr><td>{b['from']}-{b['to']}</td><td class='num'>{b['jobs']}</td>"
+                        f"<td><span class='bar' style='width:{b['jobs'] / peak * 20:.2f}rem'></span></td></tr>"
+                        for b in overview["score_histogram"])
+    companies = "".join(f"<tr><td><a href='{_e(_link(company=c['company']))}'>{_e(c['company'])}</a></td>"
+                        f"<td class='num'>{c['jobs']}</td><td class='num'>{c['ok']}</td><td class='num'>{c['error']}</td>"
+                        f"<td class='num'>{_e(c['avg_score'])}</td></tr>" for c in overview["companies"])
+    daily = "".join(f"<tr><td>{_e(d['day'])}</td><td class='num'>{d['jobs']}</td><td class='num'>{d['ok']}</td>"
+                    f"<td class='num'>{d['error']}</td><td class='num'>{d['tokens']:,}</td><td class='num'>${d['cost_usd']:.4f}</td></tr>"
+                    for d in overview["daily"])
+    parts.append(
+        "<div class='row'>"
+        f"<div><h2>Compatibility scores</h2><table>{histogram}</table></div>"
+        "<div><h2>Top companies</h2><table><tr><th>Company</th><th class='num'>Jobs</th><th class='num'>OK</th>"
+        f"<th class='num'>Errors</th><th class='num'>Avg score</th></tr>{companies}</table></div>"
+        "<div><h2>Last 30 days</h2><table><tr><th>Day</th><th class='num'>Jobs</th><th class='num'>OK</th>"
+        f"<th class='num'>Errors</th><th class='num'>Tokens</th><th class='num'>Spend</th></tr>{daily}</table></div>"
+        "</div>")
+
+    status_options = "".join(f"<option value='{s}'{' selected' if s == query['status'] else ''}>{s}</option>"
+                             for s in ("",) + STATUSES)
+    sort_options = "".join(f"<option value='{s}'{' selected' if s == query['sort'] else ''}>{label}</option>"
+                           for s, label in (("recent", "newest first"), ("score", "best score first")))
+    parts.append(
+        "<h2>Jobs</h2><form method='get' action='/'>"
+        f"Status <select name='status'>{status_options}</select> "
+        f"Company <input name='company' value='{_e(query['company'])}'> "
+        f"Sort <select name='sort'>{sort_options}</select> <button>Show</button> <a href='/'>reset</a></form>")
+    rows = "".join(
+        f"<tr><td>{_e(_when(job['completed']))}</td><td><a href='/job?{_e(urlencode({'id': job['id']}))}'>{_e(job['title'])}</a></td>"
+        f"<td>{_e(job['company'])}</td><td class='num'>{_e(job['score'])}</td>"
+        f"<td class='{_e(job['status'])}'>{_e(job['status'])}</td><td class='num'>{job['tokens']:,}</td>"
+        f"<td>{_e((job['error'] or '')[:120])}</td></tr>" for job in page["jobs"])
+    parts.append("<table><tr><th>Completed</th><th>Title</th><th>Company</th><th class='num'>Score</th><th>Status</th>"
+                 f"<th class='num'>Tokens</th><th>Error</th></tr>{rows}</table>")
+    navigation = [f"<a href='{_e(_link(**filters))}'>first page</a>"] if query["cursor"] else []
+    if page["next_cursor"]:
+        navigation.append(f"<a href='{_e(_link(cursor=page['next_cursor'], **filters))}'>next page &rarr;</a>")
+    parts.append("<p>" + " &middot; ".join(navigation) + "</p>")
+    return _page("Job applications", "".join(parts))
+
+
+async def job_detail(request: web.Request):
+    job_id = request.query.get("id", "")
+    job = request.app["stats"].job(job_id)
+    if job is None:
+        raise web.HTTPNotFound(text=f"No job {job_id!r} on record.")
+    analysis = job.get("analysis") if isinstance(job.get("analysis"), dict) else {}
+    parts = [f"<p><a href='/'>&larr; all jobs</a></p><h1>{_e(job.get('title'))} at {_e(job.get('company'))}</h1>", "<table>"]
+    for label, value in (("Status", job.get("status")), ("Failed stage", job.get("stage")), ("Error", job.get("error")),
+                         ("Compatibility score", analysis.get("compatibility_score")), ("Local pre-score", job.get("pre_score")),
+                         ("Posting", job.get("url") or job.get("source")), ("Completed", _when(job.get("completed"))),
+                         ("LLM usage", json.dumps(job.get("llm_usage")) if job.get("llm_usage") else None),
+                         ("Processing time", f"{job['elapsed_s']} s" if job.get("elapsed_s") is not None else None)):
+        if value not in (None, ""):
+            parts.append(f"<tr><th>{label}</th><td>{_e(value)}</td></tr>")
+    parts.append("</table>")
+    for key in ("strengths", "weaknesses"):
+        if analysis.get(key):
+            parts.append(f"<h2>{key.title()}</h2><ul>" + "".join(f"<li>{_e(item)}</li>" for item in analysis[key]) + "</ul>")
+    for kind, title in (("cover_letter", "Cover letter"), ("resume_suggestions", "Resume suggestions")):
+        text = request.app["artifacts"]().get(job_id, kind)
+        if text:
+            parts.append(f"<h2>{title}</h2><pre>{_e(text)}</pre>")
+    return _page(f"{job.get('title')} at {job.get('company')}", "".join(parts))
+
+
+async def api_overview(request: web.Request):
+    return web.json_response(request.app["stats"].overview())
+
+
+async def api_jobs(request: web.Request):
+    return web.json_response(_jobs_page(request, _jobs_query(request, api=True), api=True))
+
+
+async def api_job(request: web.Request):
+    job = request.app["stats"].job(request.query.get("id", ""))
+    if job is None:
+        raise web.HTTPNotFound(text=json.dumps({"error": "Unknown job ID."}), content_type="application/json")
+    return web.json_response(job, dumps=lambda obj: json.dumps(obj, default=str))
+
+
+def create_app(stats=None) -> web.Application:
+    """
+    The dashboard reads the aggregate tables and keyset-paginated job pages kept by
+    utils/job_stats.py (filled in as batch runs and workers finish jobs), never the raw logs.
+    """
+    app = web.Application()
+    app["stats"] = stats or get_job_stats()
+    app["artifacts"] = get_artifact_store # Opened on the first job detail view; picks up later saves by other processes
+    app.add_routes([web.get("/", index), web.get("/job", job_detail), web.get("/api/overview", api_overview),
+                    web.get("/api/jobs", api_jobs), web.get("/api/job", api_job)])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local web dashboard of processed jobs, scores, status and LLM spend.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--import", dest="import_paths", metavar="RESULTS_JSONL", nargs="*", default=[],
+                        help="First add the records of existing batch result files (e.g. results.jsonl) to the stats.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the aggregate tables from the stored job rows first.")
+    args = parser.parse_args()
+
+    stats = get_job_stats()
+    for path in args.import_paths:
+        imported = 0
+        completed = os.path.getmtime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("id"):
+                    stats.record(record, completed=completed)
+                    imported += 1
+        print(f"[dashboard] Imported {imported} record(s) from {path}.")
+    if args.rebuild:
+        print(f"[dashboard] Rebuilt the aggregates from {stats.rebuild_aggregates()} job(s).")
+    print(f"[dashboard] Serving on http://{args.host}:{args.port}/")
+    web.run_app(create_app(stats), host=args.host, port=args.port)
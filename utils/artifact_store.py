@@ -0,0 +1,198 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import contextlib
+try:
+    import fcntl
+except ImportError: # Windows: manifest appends are still whole lines, just without a cross-process lock
+    fcntl = None
+
+DEFAULT_ARTIFACT_DIR = os.path.join("data", "artifacts")
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Writes to a temp file in the target directory, fsyncs, then renames over `path`, so readers never see a partial file."""
+    dir_name = os.path.dirname(path) or "."
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path: str, content: str):
+    atomic_write_bytes(path, content.encode("utf-8"))
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated documents (cover letters, resume suggestions, ...).
+
+    Each distinct text is written once to ``objects/<aa>/<sha256>`` (``.gz`` once compressed),
+    no matter how many times or for how many jobs it is saved. ``manifest.jsonl`` is an
+    append-only index of (job, kind, hash) entries; it is replayed into a dict on open, so
+    listing or fetching a job's drafts is a dictionary lookup rather than a directory scan.
+    Several processes (batch runs, workers) may share a store: `put` appends under a file lock
+    after reading the entries the others added since this process last read the manifest.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARTIFACT_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self._lock = threading.Lock()
+        self._jobs = {} # job_id -> list of entries, oldest first
+        self._offset = 0 # Bytes of the manifest read into _jobs so far
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._refresh_locked()
+        self._manifest = open(self.manifest_path, "a", encoding="utf-8")
+
+    def _refresh_locked(self):
+        """Reads the complete manifest lines appended (by any process) since the last read."""
+        try:
+            if os.path.getsize(self.manifest_path) <= self._offset:
+                return
+            with open(self.manifest_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1 # A line still being written is picked up by a later read
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue # A line truncated by a crash; its object (if any) is simply unreferenced
+            self._jobs.setdefault(entry["job_id"], []).append(entry)
+        self._offset += end
+
+    @contextlib.contextmanager
+    def _manifest_file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.manifest_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, job_id: str, kind: str, content: str, metadata: dict = None) -> dict:
+        """
+        Stores `content` as a `kind` artifact of `job_id` and returns its manifest entry.
+        Identical content is written to disk only once, and saving the same draft again for the
+        same job and kind returns the existing entry instead of adding a new version.
+        """
+        digest = content_hash(content)
+        with self._lock, self._manifest_file_lock():
+            self._refresh_locked() # Another process may have saved this job's drafts meanwhile
+            for entry in reversed(self._jobs.get(job_id, [])):
+                if entry["kind"] == kind:
+                    if entry["hash"] == digest:
+                        return dict(entry, deduplicated=True)
+                    break
+            path = self._object_path(digest)
+            if not (os.path.exists(path) or os.path.exists(path + ".gz")):
+                atomic_write_text(path, content)
+            entry = {"job_id": job_id, "kind": kind, "hash": digest, "size": len(content),
+                     "version": sum(1 for e in self._jobs.get(job_id, []) if e["kind"] == kind) + 1,
+                     "created": time.time(), "metadata": metadata or {}}
+            self._manifest.write(json.dumps(entry) + "\n")
+            self._manifest.flush()
+            self._offset = os.fstat(self._manifest.fileno()).st_size # Nothing else was appended while locked
+            self._jobs.setdefault(job_id, []).append(entry)
+            return dict(entry, deduplicated=False)
+
+    def entries(self, job_id: str, kind: str = None) -> list[dict]:
+        """Manifest entries for a job (optionally one kind), oldest first, including other processes' saves."""
+        with self._lock:
+            self._refresh_locked()
+            entries = self._jobs.get(job_id, [])
+            return [dict(e) for e in entries if kind is None or e["kind"] == kind]
+
+    def jobs(self) -> list[str]:
+        with self._lock:
+            self._refresh_locked()
+            return list(self._jobs)
+
+    def read(self, digest: str) -> str:
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def get(self, job_id: str, kind: str, version: int = None) -> str:
+        """Text of a job's artifact: the latest version by default. Returns None if there is none."""
+        entries = self.entries(job_id, kind)
+        if not entries:
+            return None
+        if version is None:
+            return self.read(entries[-1]["hash"])
+        for entry in entries:
+            if entry["version"] == version:
+                return self.read(entry["hash"])
+        return None
+
+    def compress_old(self, older_than_days: float = 30.0) -> int:
+        """
+        Gzips stored drafts older than the given age, except each job's latest version of each
+        kind, which stays uncompressed for fast reads. Returns how many objects were compressed.
+        """
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            latest, old = set(), set()
+            for entries in self._jobs.values():
+                newest_by_kind = {}
+                for entry in entries:
+                    newest_by_kind[entry["kind"]] = entry["hash"]
+                    if entry["created"] < cutoff:
+                        old.add(entry["hash"])
+                latest.update(newest_by_kind.values())
+        compressed = 0
+        for digest in old - latest: # An object shared with someone's latest draft stays readable as-is
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                atomic_write_bytes(path + ".gz", gzip.compress(f.read()))
+            os.remove(path)
+            compressed += 1
+        return compressed
+
+    def close(self):
+        with self._lock:
+            self._manifest.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide store rooted at ARTIFACT_STORE_DIR (default data/artifacts)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(os.getenv("ARTIFACT_STORE_DIR", DEFAULT_ARTIFACT_DIR))
+        return _store
@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import hashlib
+import importlib
+import threading
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+# Request fields that identify nothing about the call itself (or differ per session) and must not leak into cassettes
+_UNKEYED_KWARGS = {"api_key", "api_base", "base_url", "timeout", "num_retries", "extra_headers", "cached_content"}
+
+
+class CassetteMiss(RuntimeError):
+    """Raised in replay mode when a call has no recorded interaction."""
+
+
+# Packages whose exception types a replay may import; a cassette naming any other module gets a
+# ReplayedError, so replaying a shared or untrusted cassette never runs arbitrary import-time code
+REPLAYABLE_ERROR_PACKAGES = ("builtins", "litellm", "openai", "httpx", "requests", "notion_client")
+
+
+class ReplayedError(RuntimeError):
+    """Stands in for a recorded exception whose type cannot be imported in the replaying process."""
+
+
+def _replayed_exception(error: dict) -> Exception:
+    """
+    The recorded exception again: its own type when it comes from REPLAYABLE_ERROR_PACKAGES and
+    can be built from a message, otherwise a subclass of it that only takes the message (so
+    `except` clauses and isinstance checks on the original type still match), or ReplayedError
+    for types from other packages and types that are gone.
+    """
+    message = f"{error['message']} (replayed)"
+    cls = None
+    module = error.get("module") or "builtins"
+    try:
+        if module.split(".")[0] not in REPLAYABLE_ERROR_PACKAGES:
+            raise ImportError(f"Not importing {module} from a cassette.")
+        cls = importlib.import_module(module)
+        for name in error["type"].split("."):
+            cls = getattr(cls, name)
+    except (ImportError, AttributeError, KeyError, ValueError):
+        cls = None
+    if not (isinstance(cls, type) and issubclass(cls, Exception)):
+        return ReplayedError(f"{error.get('type')}: {message}")
+    try:
+        return cls(message)
+    except Exception: # Needs more than a message (e.g. litellm's and notion_client's errors)
+        pass
+    def __init__(self, text):
+        Exception.__init__(self, text)
+        self.message = text
+
+    def __getattr__(self, name): # Attributes the real constructor would have set (status_code, ...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return None
+
+    try:
+        replayed = type(cls.__name__, (cls,), {"__module__": cls.__module__, "__init__": __init__,
+                                               "__getattr__": __getattr__, "__str__": lambda self: self.message,
+                                               "__repr__": lambda self: f"{cls.__name__}({self.message!r})"})
+        return replayed(message)
+    except TypeError: # A type that cannot be subclassed
+        return ReplayedError(f"{error['type']}: {message}")
+
+
+def _to_jsonable(obj):
+    """Plain JSON data from litellm/pydantic responses, SimpleNamespace stubs and containers of them."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, SimpleNamespace):
+        return {k: _to_jsonable(v) for k, v in vars(obj).items()}
+    if isinstance(obj, dict):
+        return {k: _to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_jsonable(v) for v in obj]
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
+def request_key(kind: str, request: dict) -> str:
+    basis = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Records LLM (litellm.completion) and Notion (notion_client.Client) request/response pairs to a
+    JSONL cassette, or replays them without touching the network.
+
+    Modes:
+      - "record": calls go through live and every interaction is appended to the cassette.
+      - "replay": calls are answered from the cassette; a call with no recording raises CassetteMiss.
+      - "auto":   replays what is recorded and records (live) whatever is missing.
+    Interactions are matched on a hash of the request (model, messages and options for the LLM;
+    method, path, query and body for Notion). Identical requests are replayed in the order they
+    were recorded, and the last one is reused if a session makes the same call more often.
+    `latency_scale` sets replay timing: 0 answers immediately, 1.0 sleeps for the recorded time.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected record, replay or auto).")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "repeated": 0, "missed": 0}
+        self._lock = threading.Lock()
+        self._recorded = defaultdict(deque) # request key -> interactions not replayed yet
+        self._last = {}                     # request key -> last interaction replayed
+        if mode == "record" and os.path.exists(path):
+            os.remove(path) # A fresh recording replaces the old cassette
+        if mode != "record" and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # A line truncated by a crash during recording
+                    self._recorded[entry["key"]].append(entry)
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {path}")
+        self._file = None
+        if mode != "replay":
+            dir_name = os.path.dirname(path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._recorded.values())
+
+    def _find(self, key: str):
+        with self._lock:
+            if self._recorded[key]:
+                entry = self._recorded[key].popleft()
+                self._last[key] = entry
+                self.stats["replayed"] += 1
+                return entry
+            if key in self._last:
+                self.stats["repeated"] += 1
+                return self._last[key]
+            self.stats["missed"] += 1
+            return None
+
+    def _record(self, kind: str, key: str, request: dict, response=None, error: Exception = None, elapsed: float = 0.0):
+        entry = {"kind": kind, "key": key, "request": request, "elapsed_s": round(elapsed, 4)}
+        if error is not None:
+            entry["error"] = {"module": type(error).__module__, "type": type(error).__qualname__, "message": str(error)}
+        else:
+            entry["response"] = response
+        with self._lock:
+            self.stats["recorded"] += 1
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+
+    def call(self, kind: str, request: dict, live_call, rebuild=lambda data: data):
+        """
+        Answers one call: replays the recorded interaction for `request` if there is one,
+        otherwise (record/auto mode) runs live_call() and records its result or exception.
+        `rebuild` turns recorded JSON back into the response object callers expect.
+        """
+        key = request_key(kind, request)
+        if self.mode != "record":
+            entry = self._find(key)
+            if entry is not None:
+                if self.latency_scale:
+                    time.sleep(entry.get("elapsed_s", 0.0) * self.latency_scale)
+                if "error" in entry:
+                    raise _replayed_exception(entry["error"])
+                return rebuild(entry["response"])
+            if self.mode == "replay":
+                raise CassetteMiss(f"No recorded {kind} interaction matches this request (cassette: {self.path}).")
+        started = time.perf_counter()
+        try:
+            response = live_call()
+        except Exception as e:
+            self._record(kind, key, request, error=e, elapsed=time.perf_counter() - started)
+            raise
+        self._record(kind, key, request, response=_to_jsonable(response), elapsed=time.perf_counter() - started)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _llm_request(args: tuple, kwargs: dict) -> dict:
+    request = {k: v for k, v in kwargs.items() if k not in _UNKEYED_KWARGS}
+    if args: # litellm.completion(model, messages, ...) called positionally
+        request.update(zip(("model", "messages"), args))
+    return _to_jsonable(request)
+
+
+def _rebuild_llm_response(data, stream: bool):
+    import litellm
+    if stream:
+        return iter([litellm.ModelResponseStream(**chunk) for chunk in data])
+    return litellm.ModelResponse(**data)
+
+
+def install_cassette(cassette: Cassette) -> dict:
+    """
+    Routes litellm.completion and notion_client.Client through `cassette` process-wide.
+    Returns the originals so `uninstall_cassette` can restore them.
+    """
+    import litellm
+    import notion_client
+
+    originals = {"completion": litellm.completion, "Client": notion_client.Client}
+    original_completion = litellm.completion
+
+    def cassette_completion(*args, **kwargs):
+        stream = bool(kwargs.get("stream"))
+
+        def live_call():
+            response = original_completion(*args, **kwargs)
+            return list(response) if stream else response # Streams are recorded chunk by chunk
+
+        response = cassette.call("llm", _llm_request(args, kwargs), live_call,
+                                 rebuild=lambda data: _rebuild_llm_response(data, stream))
+        return iter(response) if stream and isinstance(response, list) else response
+
+    class CassetteNotionClient(originals["Client"]):
+        def request(self, path, method, query=None, body=None, form_data=None, auth=None):
+            request = {"path": path, "method": method, "query": query, "body": body}
+            return cassette.call("notion", _to_jsonable(request),
+                                 lambda: super(CassetteNotionClient, self).request(path, method, query, body, form_data, auth))
+
+    litellm.completion = cassette_completion
+    notion_client.Client = CassetteNotionClient
+    if cassette.mode == "replay":
+        # The tools refuse to run without keys; replay never uses them
+        os.environ.setdefault("GEMINI_API_KEY", "cassette")
+        os.environ.setdefault("NOTION_API_KEY", "cassette")
+    print(f"[cassette] {cassette.mode.capitalize()} mode using {cassette.path} ({len(cassette)} recorded interaction(s)).")
+    return originals
+
+
+def uninstall_cassette(cassette: Cassette, originals: dict):
+    import litellm
+    import notion_client
+    litellm.completion = originals["completion"]
+    notion_client.Client = originals["Client"]
+    cassette.close()
+    print(f"[cassette] Closed {cassette.path}: {cassette.stats}")
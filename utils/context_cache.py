@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from utils.artifact_store import atomic_write_text
+from utils.llm_budget import estimate_cost
+
+DEFAULT_CONTEXT_CACHE_PATH = os.path.join("data", "context_caches.json")
+DEFAULT_CONTEXT_CACHE_TTL_SECONDS = 3600
+CACHED_INPUT_PRICE_RATIO = 0.25 # Gemini bills cached input tokens at a quarter of the normal input price
+_EXPIRY_MARGIN_SECONDS = 60     # Handles this close to expiry are replaced rather than reused
+
+# Shared by every resume-based prompt (analysis, cover letter, resume suggestions): static
+# instructions, then the resume. It is identical across calls for the same resume version, so
+# providers can serve it from a prefix/context cache; everything job-specific comes after it.
+RESUME_PREFIX_INSTRUCTIONS = "\n".join([
+    "You are an expert career assistant: an HR analyst, cover letter writer and resume consultant.",
+    "The candidate's resume follows. After it comes one task about a specific job description;",
+    "answer only that task, in exactly the format the task asks for.",
+])
+RESUME_PREFIX_START = "--- Candidate's Resume ---"
+RESUME_PREFIX_END = "--- End of Candidate's Resume ---"
+
+
+def build_resume_prefix(resume_text: str) -> str:
+    return f"{RESUME_PREFIX_INSTRUCTIONS}\n\n{RESUME_PREFIX_START}\n{resume_text}\n{RESUME_PREFIX_END}\n"
+
+
+def split_prompt(prompt: str) -> tuple[str, str]:
+    """(cacheable prefix, task) of a prompt built on build_resume_prefix; ("", prompt) for any other prompt."""
+    end = prompt.find(RESUME_PREFIX_END) if prompt.startswith(RESUME_PREFIX_INSTRUCTIONS) else -1
+    if end < 0:
+        return "", prompt
+    cut = end + len(RESUME_PREFIX_END) + 1
+    return prompt[:cut], prompt[cut:]
+
+
+def prompt_messages(prompt: str) -> list[dict]:
+    """Chat messages for a prompt: the resume prefix as its own system message, the task as the user message."""
+    prefix, task = split_prompt(prompt)
+    if not prefix:
+        return [{"role": "user", "content": prompt}]
+    return [{"role": "system", "content": prefix}, {"role": "user", "content": task.strip()}]
+
+
+class GeminiContextCacheBackend:
+    """Creates explicit Gemini context caches through google-genai (installed with crewai[google-genai])."""
+
+    def create(self, model: str, prefix: str, ttl_seconds: int) -> str:
+        from google import genai
+        from google.genai import types
+        client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+        cache = client.caches.create(
+            model=model.split("/", 1)[-1],
+            config=types.CreateCachedContentConfig(system_instruction=prefix, ttl=f"{int(ttl_seconds)}s",
+                                                   display_name="resume-" + hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]),
+        )
+        return cache.name
+
+
+class ContextCacheRegistry:
+    """
+    One provider context cache per (model, prompt prefix), i.e. per resume version. Handles are
+    created on first use, reused by every later call until shortly before their TTL runs out,
+    and persisted in `path` so separate runs share them. A prefix the provider refuses to cache
+    (e.g. below its minimum size, or a model without explicit caching) is remembered for the
+    process and sent normally, where providers with implicit prefix caching still benefit.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONTEXT_CACHE_PATH, ttl_seconds: int = DEFAULT_CONTEXT_CACHE_TTL_SECONDS,
+                 backend=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or GeminiContextCacheBackend()
+        self._lock = threading.Lock()
+        self._failed = set()
+        self._entries = {}
+        self.stats = {"created": 0, "reused": 0, "failed": 0, "invalidated": 0}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+
+    @staticmethod
+    def key(model: str, prefix: str) -> str:
+        return model + ":" + hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+    def handle_for(self, model: str, prefix: str) -> str:
+        """The cache handle for this prefix, creating it if needed; None if it cannot be cached."""
+        key = self.key(model, prefix)
+        with self._lock: # Held while creating, so concurrent calls for a new resume create one cache
+            entry = self._entries.get(key)
+            if entry and entry["expires"] - _EXPIRY_MARGIN_SECONDS > time.time():
+                self.stats["reused"] += 1
+                return entry["name"]
+            if key in self._failed:
+                return None
+            try:
+                name = self.backend.create(model, prefix, self.ttl_seconds)
+            except Exception as e:
+                self._failed.add(key)
+                self.stats["failed"] += 1
+                print(f"[context cache] Could not create a context cache for {model} ({type(e).__name__} - {e}); "
+                      "sending the prefix uncached.")
+                return None
+            self._entries[key] = {"name": name, "model": model, "expires": time.time() + self.ttl_seconds}
+            self._entries = {k: v for k, v in self._entries.items() if v["expires"] > time.time()}
+            self.stats["created"] += 1
+            if self.path:
+                atomic_write_text(self.path, json.dumps(self._entries))
+            print(f"[context cache] Created {name} for the current resume ({model}).")
+            return name
+
+    def invalidate(self, model: str, prefix: str):
+        """Forgets the handle for this prefix (e.g. the provider no longer has it); the next call creates a new one."""
+        key = self.key(model, prefix)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self.stats["invalidated"] += 1
+            if self.path:
+                atomic_write_text(self.path, json.dumps(self._entries))
+            print(f"[context cache] Dropped {entry['name']} ({model}).")
+
+
+class PrefixCacheStats:
+    """Input tokens served from a prefix/context cache, and latency with vs without a cache hit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.cached_tokens = 0
+            self.cost_saved = 0.0
+            self._latency = {"hit": [0, 0.0], "miss": [0, 0.0]} # calls, total seconds
+
+    def record(self, model: str, prompt_tokens: int, cached_tokens: int, elapsed: float):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.cost_saved += estimate_cost(model, cached_tokens, 0) * (1 - CACHED_INPUT_PRICE_RATIO)
+            bucket = self._latency["hit" if cached_tokens else "miss"]
+            bucket[0] += 1
+            bucket[1] += elapsed
+
+    def summary(self) -> dict:
+        with self._lock:
+            def mean(bucket):
+                return round(bucket[1] / bucket[0], 3) if bucket[0] else None
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_share": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+                "est_cost_saved_usd": round(self.cost_saved, 6),
+                "mean_latency_s": {"cache_hit": mean(self._latency["hit"]), "cache_miss": mean(self._latency["miss"])},
+            }
+
+
+def cached_tokens_from(response) -> int:
+    """Prompt tokens the provider reports as served from cache (litellm usage.prompt_tokens_details)."""
+    details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return int(details.get("cached_tokens") or 0)
+    return int(getattr(details, "cached_tokens", 0) or 0)
+
+
+prefix_cache_stats = PrefixCacheStats()
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def context_caching_enabled() -> bool:
+    return os.getenv("GEMINI_CONTEXT_CACHE", "").lower() in ("1", "true", "yes")
+
+
+def get_context_cache() -> ContextCacheRegistry:
+    """Process-wide registry; TTL from GEMINI_CONTEXT_CACHE_TTL (seconds, default 3600)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ContextCacheRegistry(
+                ttl_seconds=int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", DEFAULT_CONTEXT_CACHE_TTL_SECONDS)))
+        return _registry
+
+
+if __name__ == "__main__":
+    # Benchmark against the local stub: the same analysis / cover letter / suggestions prompts for
+    # several JDs, sent as one flat message (the old layout), with the stable resume prefix as its
+    # own message (implicit prefix caching), and with an explicit context-cache handle.
+    import sys
+    from utils import llm_stub
+    from utils.context_cache import prefix_cache_stats # The instance llm_gateway records into, not this __main__ copy
+    from utils.llm_gateway import completion, LLM_MODEL_ID
+    from tools.compatibility_analyzer_tool import build_analysis_prompt
+    from tools.cover_letter_tool import build_cover_letter_prompt
+    from tools.resume_tuner_tool import build_resume_suggestions_prompt
+
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    llm_stub.install_stub(latency=0.2)
+    with open(os.path.join("data", "abhay_padmanabhan.txt"), "r", encoding="utf-8") as f:
+        resume = f.read()
+    prompts = []
+    for i in range(n_jobs):
+        jd = f"Job Title: Data Analyst {i}\nCompany: Company {i}\n- SQL and Python for analysis.\n- Tableau dashboards."
+        prompts += [build_analysis_prompt(resume, jd),
+                    build_cover_letter_prompt(resume, jd, f"Company {i}", f"Data Analyst {i}"),
+                    build_resume_suggestions_prompt(resume, jd, llm_stub.STUB_ANALYSIS)]
+    layouts = (("one flat message (previous layout)", lambda p: [{"role": "user", "content": p}], "0"),
+               ("stable prefix, implicit caching", prompt_messages, "0"),
+               ("stable prefix + context cache", prompt_messages, "1"))
+    print(f"{len(prompts)} calls ({n_jobs} jobs x 3 tools) against the stub LLM (0.2 s per uncached call):")
+    for label, to_messages, caching in layouts:
+        os.environ["GEMINI_CONTEXT_CACHE"] = caching
+        llm_stub._stub_prefixes.clear()
+        prefix_cache_stats.reset()
+        started = time.perf_counter()
+        for prompt in prompts:
+            completion(LLM_MODEL_ID, to_messages(prompt))
+        print(f"  {label:36s} {time.perf_counter() - started:5.2f}s  {prefix_cache_stats.summary()}")
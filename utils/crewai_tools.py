@@ -0,0 +1,51 @@
+from typing import Any, Optional
+from pydantic import Field, create_model
+from crewai.tools import BaseTool
+
+# smolagents input types (JSON schema names) -> Python types for the CrewAI args schema
+_JSON_TYPES = {"string": str, "integer": int, "number": float, "boolean": bool, "array": list, "object": dict, "any": Any}
+
+
+def to_crewai_tool(smol_tool, bound_args: dict = None) -> BaseTool:
+    """
+    Exposes a smolagents tool to CrewAI agents, reusing its name, description and inputs.
+
+    `bound_args` pre-fills arguments (e.g. the resume and JD text of the job being processed):
+    they are removed from the schema the CrewAI agent sees and injected on every call, so the
+    agent's LLM never has to copy long documents into a tool call.
+    """
+    bound_args = bound_args or {}
+    fields = {}
+    for arg, schema in smol_tool.inputs.items():
+        if arg in bound_args:
+            continue
+        py_type = _JSON_TYPES.get(schema.get("type"), Any)
+        if schema.get("nullable"):
+            fields[arg] = (Optional[py_type], Field(default=None, description=schema.get("description", "")))
+        else:
+            fields[arg] = (py_type, Field(..., description=schema.get("description", "")))
+    args_model = create_model(f"{smol_tool.name}_args", **fields)
+
+    description = smol_tool.description
+    if bound_args:
+        description += f"\n(Already filled in for you: {', '.join(bound_args)}.)"
+
+    class SmolagentsCrewAITool(BaseTool):
+        name: str = smol_tool.name
+        description: str = ""
+        args_schema: type = args_model
+
+        def _run(self, **kwargs) -> Any:
+            call_kwargs = {k: v for k, v in kwargs.items() if v is not None} # Let the tool apply its own defaults
+            return smol_tool(**bound_args, **call_kwargs)
+
+    return SmolagentsCrewAITool(description=description)
+
+
+def to_crewai_tools(smol_tools: list, bound_args: dict = None) -> list[BaseTool]:
+    """Wraps several smolagents tools; each only receives the bound arguments it actually accepts."""
+    bound_args = bound_args or {}
+    return [
+        to_crewai_tool(t, {k: v for k, v in bound_args.items() if k in t.inputs})
+        for t in smol_tools
+    ]
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import hashlib
+import zipfile
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+import xml.etree.ElementTree as ET
+
+from utils.artifact_store import atomic_write_text
+
+DEFAULT_INGEST_CACHE_DIR = os.path.join("data", "ingest_cache")
+EXTRACTOR_VERSION = 1          # Bump to invalidate cached extractions after changing an extractor
+MEMORY_CACHE_MAX_CHARS = 32 * 2**20 # Least recently loaded texts are evicted from memory beyond this total
+STREAM_CHUNK_BYTES = 1 << 20
+HTML_EXTENSIONS = {".html", ".htm", ".xhtml"}
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header", "footer",
+               "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote"}
+
+
+class UnsupportedDocument(ValueError):
+    """Raised when a format's optional extraction dependency is not installed."""
+
+
+def _read_text_file(path: str) -> str:
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    return text.replace("\r\n", "\n").replace("\r", "\n") # Same newlines as a text-mode read
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects visible text, one line per block element, skipping scripts and styles."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def _extract_html(path: str) -> str:
+    # Streamed through the incremental parser in chunks, so no DOM is built for large pages
+    parser = _HTMLTextExtractor()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), ""):
+            parser.feed(chunk)
+    parser.close()
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(parser.parts).splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _extract_docx(path: str) -> str:
+    # word/document.xml is parsed incrementally straight out of the zip; finished paragraphs are freed
+    paragraphs, current = [], []
+    with zipfile.ZipFile(path) as archive:
+        with archive.open("word/document.xml") as xml_stream:
+            for _, elem in ET.iterparse(xml_stream, events=("end",)):
+                if elem.tag == _W_NS + "t":
+                    current.append(elem.text or "")
+                elif elem.tag == _W_NS + "tab":
+                    current.append("\t")
+                elif elem.tag in (_W_NS + "br", _W_NS + "cr"):
+                    current.append("\n")
+                elif elem.tag == _W_NS + "p":
+                    paragraphs.append("".join(current))
+                    current = []
+                    elem.clear()
+    return "\n".join(paragraphs).strip()
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        from pdfminer.high_level import extract_text
+    except ImportError:
+        raise UnsupportedDocument("PDF support needs the 'pdfminer.six' package (pip install pdfminer.six).")
+    with open(path, "rb") as f: # pdfminer reads the file lazily, page by page
+        return extract_text(f).strip()
+
+
+_EXTRACTORS = {".pdf": _extract_pdf, ".docx": _extract_docx}
+_EXTRACTORS.update({ext: _extract_html for ext in HTML_EXTENSIONS})
+
+
+class DocumentLoader:
+    """
+    Text extraction for plain-text, .html, .docx and .pdf files with a two-level cache keyed on
+    (absolute path, size, mtime): an in-memory LRU of up to `memory_max_chars` characters for
+    repeated loads within a process, and one JSON file per source document under `cache_dir`
+    so expensive extractions (PDF, DOCX, HTML) are reused across runs. Editing or replacing a file changes its size/mtime and so
+    invalidates its entry; plain-text files are only cached in memory.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_INGEST_CACHE_DIR, memory_max_chars: int = MEMORY_CACHE_MAX_CHARS):
+        self.cache_dir = cache_dir
+        self.memory_max_chars = memory_max_chars
+        self._memory = OrderedDict() # abs path -> (size, mtime_ns, text), least recently used first
+        self._memory_chars = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "extractions": 0}
+
+    def _disk_path(self, abs_path: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(abs_path.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, path: str) -> tuple[str, str]:
+        """
+        Returns (text, source) where source is "memory", "disk" or "extracted".
+        Files with no dedicated extractor are read as UTF-8 text. Raises OSError for unreadable
+        files and UnsupportedDocument when an optional extraction dependency is missing.
+        """
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._memory.get(abs_path)
+            if cached and cached[:2] == signature:
+                self._memory.move_to_end(abs_path)
+                self.stats["memory_hits"] += 1
+                return cached[2], "memory"
+
+        ext = os.path.splitext(abs_path)[1].lower()
+        extractor = _EXTRACTORS.get(ext)
+
+        source = "extracted"
+        text = None
+        if extractor is not None and self.cache_dir:
+            text = self._read_disk_cache(abs_path, signature)
+            source = "disk" if text is not None else source
+        if text is None:
+            text = extractor(abs_path) if extractor is not None else _read_text_file(abs_path)
+            if extractor is not None and self.cache_dir:
+                atomic_write_text(self._disk_path(abs_path), json.dumps(
+                    {"path": abs_path, "size": signature[0], "mtime_ns": signature[1],
+                     "version": EXTRACTOR_VERSION, "text": text}))
+
+        with self._lock:
+            previous = self._memory.pop(abs_path, None)
+            if previous:
+                self._memory_chars -= len(previous[2])
+            if len(text) <= self.memory_max_chars:
+                self._memory[abs_path] = (*signature, text)
+                self._memory_chars += len(text)
+                while self._memory_chars > self.memory_max_chars:
+                    _, (_, _, evicted) = self._memory.popitem(last=False)
+                    self._memory_chars -= len(evicted)
+            self.stats["disk_hits" if source == "disk" else "extractions"] += 1
+        return text, source
+
+    def _read_disk_cache(self, abs_path: str, signature: tuple) -> str:
+        try:
+            with open(self._disk_path(abs_path), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if (entry.get("size"), entry.get("mtime_ns")) != signature or entry.get("version") != EXTRACTOR_VERSION:
+            return None
+        return entry.get("text")
+
+
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_document_loader() -> DocumentLoader:
+    """Process-wide loader shared by load_resume_text and load_text_from_file."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = DocumentLoader(os.getenv("INGEST_CACHE_DIR", DEFAULT_INGEST_CACHE_DIR))
+        return _loader
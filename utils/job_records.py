@@ -0,0 +1,153 @@
+import sys
+import zlib
+
+JOB_FIELDS = ("title", "company", "url", "description", "location", "date_posted",
+              "valid_through", "employment_type", "salary")
+# Fields with few distinct values across a crawl; every record shares one copy of each value
+INTERNED_FIELDS = ("company", "location", "date_posted", "valid_through", "employment_type")
+COMPRESS_MIN_CHARS = 200 # Shorter descriptions would grow under zlib, so they are kept as str
+
+
+class JobRecord:
+    """
+    One scraped job posting. Uses __slots__ instead of a per-instance dict, shares repeated
+    strings (company, location, dates, employment type) via interning, and keeps the
+    description zlib-compressed until `description` is read.
+    """
+
+    __slots__ = ("title", "company", "url", "_description", "location", "date_posted",
+                 "valid_through", "employment_type", "salary")
+
+    def __init__(self, title: str = None, company: str = None, url: str = None, description: str = None,
+                 location: str = None, date_posted: str = None, valid_through: str = None,
+                 employment_type: str = None, salary: str = None):
+        self.title = title
+        self.url = url
+        self.salary = salary
+        self.description = description
+        for field, value in zip(INTERNED_FIELDS, (company, location, date_posted, valid_through, employment_type)):
+            setattr(self, field, sys.intern(value) if isinstance(value, str) else value)
+
+    @property
+    def description(self) -> str:
+        value = self._description
+        return zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+
+    @description.setter
+    def description(self, text: str):
+        if text and len(text) >= COMPRESS_MIN_CHARS:
+            self._description = zlib.compress(text.encode("utf-8"))
+        else:
+            self._description = text
+
+    @classmethod
+    def from_dict(cls, job: dict) -> "JobRecord":
+        return cls(**{field: job.get(field) for field in JOB_FIELDS})
+
+    def get(self, field: str, default=None):
+        """dict-style access, so code written against job dictionaries keeps working."""
+        value = getattr(self, field, None) if field in JOB_FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        """The plain dictionary form returned by the scraping tools (unset fields omitted)."""
+        job = {}
+        for field in JOB_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                job[field] = value
+        return job
+
+    def __repr__(self) -> str:
+        return f"JobRecord(title={self.title!r}, company={self.company!r}, url={self.url!r})"
+
+
+class JobCollection:
+    """
+    Scrape results: job records in `jobs`, and failures in a separate `errors` channel
+    ({"error": message, "url": source}), so consumers iterate jobs without checking each
+    entry for an "error" key.
+    """
+
+    __slots__ = ("jobs", "errors")
+
+    def __init__(self, jobs=None):
+        self.jobs = []
+        self.errors = []
+        for job in jobs or []:
+            self.add(job)
+
+    def add(self, job) -> JobRecord:
+        record = job if isinstance(job, JobRecord) else JobRecord.from_dict(job)
+        self.jobs.append(record)
+        return record
+
+    def extend(self, jobs):
+        for job in jobs:
+            self.add(job)
+
+    def add_error(self, error: str, url: str = None):
+        self.errors.append({"error": error, "url": url} if url else {"error": error})
+
+    def merge(self, other: "JobCollection"):
+        self.jobs.extend(other.jobs)
+        self.errors.extend(other.errors)
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def __getitem__(self, index):
+        return self.jobs[index]
+
+    def to_dicts(self, include_errors: bool = True) -> list[dict]:
+        """
+        The list-of-dicts shape the scraping tools have always returned to the agent: error
+        dictionaries first (if any), then one dictionary per job.
+        """
+        return ([dict(error) for error in self.errors] if include_errors else []) + [job.to_dict() for job in self.jobs]
+
+
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+
+    # Benchmark: memory for 100k scraped jobs as plain dicts vs JobRecord/JobCollection
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    vocab = ("python sql data analytics pipeline cloud aws spark modeling dashboards stakeholders experience "
+             "team build deploy machine learning statistics communication product insights reporting etl").split()
+    companies = [f"Company {i} Inc." for i in range(500)]
+    locations = [f"City {i}, ST" for i in range(200)]
+
+    def scraped_jobs():
+        # Fresh string objects per job, as the HTML/JSON-LD parsers produce them
+        for i in range(n_jobs):
+            yield {
+                "title": f"Data Analyst {i}",
+                "company": "".join(rng.choice(companies)),
+                "url": f"https://jobs.example.com/postings/{i}",
+                "description": " ".join(rng.choice(vocab) for _ in range(220)),
+                "location": "".join(rng.choice(locations)),
+                "date_posted": "".join(f"2025-05-{rng.randint(1, 28):02d}"),
+                "employment_type": "".join("FULL_TIME"),
+            }
+
+    def measure(build):
+        rng.seed(0)
+        tracemalloc.start()
+        data = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return data, current
+
+    dicts, dict_bytes = measure(lambda: list(scraped_jobs()))
+    del dicts
+    records, record_bytes = measure(lambda: JobCollection(scraped_jobs()))
+    print(f"{n_jobs} jobs as dicts:        {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / n_jobs:7.0f} bytes/job)")
+    print(f"{n_jobs} jobs as JobCollection: {record_bytes / 2**20:8.1f} MiB ({record_bytes / n_jobs:7.0f} bytes/job)")
+    print(f"Reduction: {dict_bytes / record_bytes:.1f}x")
+    sample = records[n_jobs // 2]
+    print(f"Sample: {sample!r}, description starts {sample.description[:40]!r}")
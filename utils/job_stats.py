@@ -0,0 +1,257 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import datetime
+import threading
+
+DEFAULT_JOB_STATS_PATH = os.path.join("data", "job_stats.sqlite")
+SCORE_BUCKET_WIDTH = 10 # Histogram buckets 0-9, 10-19, ..., 90-100
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Pagination orders: (SQL sort expression, cursor column type)
+_SORTS = {"recent": ("completed", float), "score": ("COALESCE(score, -1)", float)}
+# Bulky fields kept out of the stored detail; the texts themselves live in the artifact store
+_DETAIL_EXCLUDED = ("cover_letter", "resume_suggestions")
+
+
+def _score_of(record: dict):
+    analysis = record.get("analysis")
+    score = analysis.get("compatibility_score") if isinstance(analysis, dict) else None
+    try:
+        return None if score is None else float(score)
+    except (TypeError, ValueError):
+        return None
+
+
+class JobStatsStore:
+    """
+    One row per processed job plus aggregate tables (status counts, score histogram, per-company
+    and per-day counts with LLM spend) that record() updates in the same transaction as the job
+    row. Reprocessing a job first takes its previous row back out of the aggregates, so they stay
+    exact. The dashboard reads only the aggregates and keyset-paginated pages of the job table,
+    so it stays fast with tens of thousands of jobs; rebuild_aggregates() recomputes everything
+    from the job rows if the tables are ever in doubt. Safe to share between processes (WAL).
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, company TEXT, title TEXT, source TEXT, url TEXT, status TEXT NOT NULL,
+                stage TEXT, error TEXT, score REAL, pre_score REAL, tokens INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0, elapsed_s REAL, completed REAL NOT NULL, day TEXT NOT NULL, detail TEXT);
+            CREATE INDEX IF NOT EXISTS jobs_recent ON jobs (completed DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS jobs_status_recent ON jobs (status, completed DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS jobs_company_recent ON jobs (company, completed DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS jobs_score ON jobs (COALESCE(score, -1) DESC, id DESC);
+            CREATE TABLE IF NOT EXISTS status_counts (status TEXT PRIMARY KEY, jobs INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS score_histogram (bucket INTEGER PRIMARY KEY, jobs INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS company_counts (
+                company TEXT PRIMARY KEY, jobs INTEGER NOT NULL, ok INTEGER NOT NULL, error INTEGER NOT NULL,
+                score_sum REAL NOT NULL, scored INTEGER NOT NULL, last_completed REAL);
+            CREATE INDEX IF NOT EXISTS company_counts_jobs ON company_counts (jobs DESC);
+            CREATE TABLE IF NOT EXISTS daily_counts (
+                day TEXT PRIMARY KEY, jobs INTEGER NOT NULL, ok INTEGER NOT NULL, error INTEGER NOT NULL,
+                tokens INTEGER NOT NULL, cost REAL NOT NULL);
+        """)
+
+    def _apply(self, row: tuple, sign: int):
+        """Adds (sign=1) or removes (sign=-1) one job row's contribution to every aggregate table."""
+        company, status, score, tokens, cost, completed, day = row
+        ok, error = int(status == "ok") * sign, int(status == "error") * sign
+        self._db.execute("INSERT INTO status_counts VALUES (?, ?) ON CONFLICT(status) DO UPDATE SET jobs = jobs + excluded.jobs",
+                         (status, sign))
+        if score is not None:
+            bucket = min(max(int(score) // SCORE_BUCKET_WIDTH, 0), 100 // SCORE_BUCKET_WIDTH - 1)
+            self._db.execute("INSERT INTO score_histogram VALUES (?, ?) ON CONFLICT(bucket) DO UPDATE SET jobs = jobs + excluded.jobs",
+                             (bucket, sign))
+        self._db.execute(
+            "INSERT INTO company_counts VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(company) DO UPDATE SET "
+            "jobs = jobs + excluded.jobs, ok = ok + excluded.ok, error = error + excluded.error, "
+            "score_sum = score_sum + excluded.score_sum, scored = scored + excluded.scored, "
+            "last_completed = MAX(COALESCE(last_completed, 0), COALESCE(excluded.last_completed, 0))",
+            (company, sign, ok, error, (score or 0.0) * sign, int(score is not None) * sign, completed if sign > 0 else None))
+        self._db.execute(
+            "INSERT INTO daily_counts VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(day) DO UPDATE SET "
+            "jobs = jobs + excluded.jobs, ok = ok + excluded.ok, error = error + excluded.error, "
+            "tokens = tokens + excluded.tokens, cost = cost + excluded.cost",
+            (day, sign, ok, error, tokens * sign, cost * sign))
+
+    def record(self, record: dict, completed: float = None):
+        """Adds or replaces one job result record (as produced by batch_runner.process_job)."""
+        completed = completed or time.time()
+        usage = record.get("llm_usage") or {}
+        company = record.get("company") or "(unknown)"
+        status = record.get("status") or "error"
+        score = _score_of(record)
+        tokens, cost = int(usage.get("tokens") or 0), float(usage.get("cost_usd") or 0.0)
+        day = datetime.date.fromtimestamp(completed).isoformat()
+        detail = json.dumps({key: value for key, value in record.items() if key not in _DETAIL_EXCLUDED}, default=str)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._db.execute("SELECT company, status, score, tokens, cost, completed, day FROM jobs WHERE id = ?",
+                                            (record.get("id"),)).fetchone()
+                if previous is not None:
+                    self._apply(previous, -1)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record.get("id"), company, record.get("title"), record.get("source"), record.get("url"), status,
+                     record.get("stage"), record.get("error"), score, record.get("pre_score"), tokens, cost,
+                     record.get("elapsed_s"), completed, day, detail))
+                self._apply((company, status, score, tokens, cost, completed, day), 1)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def rebuild_aggregates(self) -> int:
+        """Recomputes every aggregate table from the job rows. Returns the number of jobs."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("status_counts", "score_histogram", "company_counts", "daily_counts"):
+                    self._db.execute(f"DELETE FROM {table}")
+                rows = self._db.execute("SELECT company, status, score, tokens, cost, completed, day FROM jobs").fetchall()
+                for row in rows:
+                    self._apply(row, 1)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def overview(self, top_companies: int = 20, days: int = 30) -> dict:
+        """Everything the dashboard header shows, read from the aggregate tables only."""
+        with self._lock:
+            statuses = dict(self._db.execute("SELECT status, jobs FROM status_counts WHERE jobs > 0").fetchall())
+            histogram = dict(self._db.execute("SELECT bucket, jobs FROM score_histogram").fetchall())
+            companies = self._db.execute(
+                "SELECT company, jobs, ok, error, CASE WHEN scored > 0 THEN score_sum / scored END, last_completed "
+                "FROM company_counts WHERE jobs > 0 ORDER BY jobs DESC LIMIT ?", (top_companies,)).fetchall()
+            daily = self._db.execute("SELECT day, jobs, ok, error, tokens, cost FROM daily_counts WHERE jobs > 0 "
+                                     "ORDER BY day DESC LIMIT ?", (days,)).fetchall()
+            spend = self._db.execute("SELECT COALESCE(SUM(tokens), 0), COALESCE(SUM(cost), 0) FROM daily_counts").fetchone()
+            company_total = self._db.execute("SELECT COUNT(*) FROM company_counts WHERE jobs > 0").fetchone()[0]
+        return {
+            "jobs": sum(statuses.values()),
+            "statuses": statuses,
+            "score_histogram": [{"from": bucket * SCORE_BUCKET_WIDTH, "to": bucket * SCORE_BUCKET_WIDTH + SCORE_BUCKET_WIDTH - 1,
+                                 "jobs": histogram.get(bucket, 0)} for bucket in range(100 // SCORE_BUCKET_WIDTH)],
+            "companies": [{"company": c, "jobs": n, "ok": ok, "error": error,
+                           "avg_score": None if avg is None else round(avg, 1), "last_completed": last}
+                          for c, n, ok, error, avg, last in companies],
+            "company_total": company_total,
+            "daily": [{"day": day, "jobs": n, "ok": ok, "error": error, "tokens": tokens, "cost_usd": round(cost, 6)}
+                      for day, n, ok, error, tokens, cost in daily],
+            "llm_spend": {"tokens": spend[0], "cost_usd": round(spend[1], 6)},
+        }
+
+    def jobs_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort: str = "recent",
+                  status: str = None, company: str = None) -> dict:
+        """
+        One page of jobs, newest first (sort="recent") or best score first (sort="score"),
+        optionally filtered by status and/or company. Pages use keyset pagination: pass the
+        returned next_cursor to get the following page, which costs the same however deep it is.
+        Raises ValueError for an unknown sort or a malformed cursor or limit.
+        """
+        if sort not in _SORTS:
+            raise ValueError(f"Unknown sort {sort!r}; use one of: {', '.join(_SORTS)}.")
+        expression, cast = _SORTS[sort]
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if company:
+            where.append("company = ?")
+            params.append(company)
+        if cursor:
+            key, separator, job_id = cursor.partition("|")
+            try:
+                key = cast(key)
+            except ValueError:
+                key = None
+            if not separator or key is None or not math.isfinite(key):
+                raise ValueError(f"Malformed cursor {cursor!r}; pass a next_cursor returned by a previous page.")
+            where.append(f"({expression} < ? OR ({expression} = ? AND id < ?))")
+            params += [key, key, job_id]
+        sql = ("SELECT id, company, title, status, stage, error, score, tokens, cost, completed, " + expression +
+               " FROM jobs" + (" WHERE " + " AND ".join(where) if where else "") +
+               f" ORDER BY {expression} DESC, id DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, params + [limit + 1]).fetchall()
+        jobs = [{"id": job_id, "company": c, "title": title, "status": s, "stage": stage, "error": error, "score": score,
+                 "tokens": tokens, "cost_usd": round(cost, 6), "completed": completed}
+                for job_id, c, title, s, stage, error, score, tokens, cost, completed, _ in rows[:limit]]
+        next_cursor = f"{rows[limit - 1][-1]!r}|{rows[limit - 1][0]}" if len(rows) > limit else None
+        return {"jobs": jobs, "next_cursor": next_cursor}
+
+    def job(self, job_id: str) -> dict:
+        """The stored record of one job (without the letter/suggestion texts), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT detail, completed FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else dict(json.loads(row[0]), completed=row[1])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_job_stats() -> JobStatsStore:
+    """Process-wide store at JOB_STATS_PATH (default data/job_stats.sqlite), shared by batch runs, workers and the dashboard."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = JobStatsStore(os.getenv("JOB_STATS_PATH", DEFAULT_JOB_STATS_PATH))
+        return _stats
+
+
+if __name__ == "__main__":
+    # Benchmark: record N synthetic jobs, then time the dashboard's reads
+    import sys
+    import random
+    import tempfile
+
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(0)
+    store = JobStatsStore(os.path.join(tempfile.mkdtemp(prefix="job-stats-"), "job_stats.sqlite"))
+    now = time.time()
+    started = time.perf_counter()
+    for i in range(n_jobs):
+        ok = rng.random() < 0.9
+        store.record({"id": f"job-{i}", "company": f"Company {rng.randint(0, 999)}", "title": f"Data Analyst {i}",
+                      "status": "ok" if ok else "error", "error": None if ok else "Quota exceeded",
+                      "analysis": {"compatibility_score": rng.randint(20, 98)} if ok else None,
+                      "llm_usage": {"tokens": rng.randint(3000, 9000), "cost_usd": rng.random() / 1000}},
+                     completed=now - rng.random() * 60 * 86400)
+    print(f"Recorded {n_jobs} jobs in {time.perf_counter() - started:.1f}s "
+          f"({(time.perf_counter() - started) / n_jobs * 1000:.2f} ms/job incl. aggregates)")
+    for label, query in (("overview()", lambda: store.overview()),
+                         ("first page", lambda: store.jobs_page()),
+                         ("page 200 (keyset)", None),
+                         ("best scores, one company", lambda: store.jobs_page(sort="score", company="Company 7"))):
+        if query is None:
+            cursor = None
+            for _ in range(199):
+                cursor = store.jobs_page(cursor=cursor)["next_cursor"]
+            query = lambda: store.jobs_page(cursor=cursor)
+        started = time.perf_counter()
+        result = query()
+        print(f"  {label:26s} {(time.perf_counter() - started) * 1000:7.2f} ms")
+    started = time.perf_counter()
+    store.rebuild_aggregates()
+    print(f"  {'full rebuild (for compare)':26s} {(time.perf_counter() - started) * 1000:7.2f} ms")
@@ -0,0 +1,200 @@
+import os
+import json
+import datetime
+import threading
+import contextlib
+try:
+    import fcntl
+except ImportError: # Windows: the ledger is still merged on every write, just without a cross-process lock
+    fcntl = None
+
+DEFAULT_SPEND_LEDGER_PATH = os.path.join("data", "llm_spend.json")
+# USD per million (prompt, completion) tokens for models missing from litellm's price table
+FALLBACK_PRICES_PER_MILLION = {
+    "gemini/gemini-1.5-flash-latest": (0.075, 0.30),
+}
+
+
+class BudgetExhausted(RuntimeError):
+    """Raised instead of calling the LLM once a run or daily budget has been used up."""
+
+
+def _usage_tokens(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    return int(getattr(usage, "prompt_tokens", 0) or 0), int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of a call from litellm's price table (or FALLBACK_PRICES_PER_MILLION); 0.0 if unknown."""
+    if model in FALLBACK_PRICES_PER_MILLION:
+        prompt_price, completion_price = FALLBACK_PRICES_PER_MILLION[model]
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    try:
+        import litellm
+        prompt_cost, completion_cost = litellm.cost_per_token(model=model, prompt_tokens=prompt_tokens,
+                                                              completion_tokens=completion_tokens)
+        return float(prompt_cost + completion_cost)
+    except Exception:
+        return 0.0
+
+
+class LLMBudget:
+    """
+    Token and cost limits for LLM calls, per run and per calendar day.
+
+    Actual spend is recorded from each response's usage (see `install_budget_meter`); the per-day
+    totals are kept in a small JSON ledger so separate runs on the same day share one daily
+    budget. Each record re-reads the ledger and adds to it under a file lock, so concurrent runs
+    and worker processes never overwrite each other's spend, and daily checks pick up their
+    spend as soon as the ledger file changes. Callers that dispatch work can `reserve` an estimate before starting a job, so jobs
+    are only started while the budget can still cover them, and `release` it when the job ends.
+    Any limit left as None is unlimited.
+    """
+
+    def __init__(self, run_tokens: int = None, run_cost: float = None, daily_tokens: int = None,
+                 daily_cost: float = None, ledger_path: str = DEFAULT_SPEND_LEDGER_PATH):
+        self.limits = {"run_tokens": run_tokens, "run_cost": run_cost,
+                       "daily_tokens": daily_tokens, "daily_cost": daily_cost}
+        self.ledger_path = ledger_path
+        self._lock = threading.Lock()
+        self.run_spend = {"tokens": 0, "cost": 0.0, "calls": 0}
+        self._reserved = {"tokens": 0, "cost": 0.0}
+        self._ledger = {}
+        self._ledger_mtime = None
+        self._refresh_ledger()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.date.today().isoformat()
+
+    def _refresh_ledger(self):
+        """Reloads the ledger if the file changed since it was last read (e.g. another run recorded spend)."""
+        if not self.ledger_path:
+            return
+        try:
+            mtime = os.stat(self.ledger_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._ledger_mtime:
+            return
+        try:
+            with open(self.ledger_path, "r", encoding="utf-8") as f:
+                self._ledger = json.load(f)
+            self._ledger_mtime = mtime
+        except (OSError, json.JSONDecodeError):
+            print(f"[LLMBudget] Could not read {self.ledger_path}; starting a fresh daily ledger.")
+
+    @contextlib.contextmanager
+    def _ledger_file_lock(self):
+        if not self.ledger_path or fcntl is None:
+            yield
+            return
+        dir_name = os.path.dirname(self.ledger_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(self.ledger_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def day_spend(self) -> dict:
+        self._refresh_ledger()
+        return dict(self._ledger.get(self._today(), {"tokens": 0, "cost": 0.0, "calls": 0}))
+
+    def _save_ledger(self):
+        if not self.ledger_path:
+            return
+        dir_name = os.path.dirname(self.ledger_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp_path = f"{self.ledger_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._ledger, f, indent=2)
+        os.replace(tmp_path, self.ledger_path)
+        self._ledger_mtime = os.stat(self.ledger_path).st_mtime_ns
+
+    def remaining(self) -> dict:
+        """Headroom left under each configured limit, net of outstanding reservations."""
+        with self._lock:
+            return self._remaining_locked()
+
+    def _remaining_locked(self) -> dict:
+        day = self.day_spend()
+        spent = {"run_tokens": self.run_spend["tokens"], "run_cost": self.run_spend["cost"],
+                 "daily_tokens": day["tokens"], "daily_cost": day["cost"]}
+        reserved = {"run_tokens": self._reserved["tokens"], "run_cost": self._reserved["cost"],
+                    "daily_tokens": self._reserved["tokens"], "daily_cost": self._reserved["cost"]}
+        return {name: limit - spent[name] - reserved[name]
+                for name, limit in self.limits.items() if limit is not None}
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            day = self.day_spend()
+            spent = {"run_tokens": self.run_spend["tokens"], "run_cost": self.run_spend["cost"],
+                     "daily_tokens": day["tokens"], "daily_cost": day["cost"]}
+            return any(limit is not None and spent[name] >= limit for name, limit in self.limits.items())
+
+    def reserve(self, tokens: int, cost: float) -> bool:
+        """Sets aside an estimated spend if every limit can still cover it. Returns False if not."""
+        with self._lock:
+            remaining = self._remaining_locked()
+            needed = {"run_tokens": tokens, "run_cost": cost, "daily_tokens": tokens, "daily_cost": cost}
+            if any(remaining[name] < needed[name] for name in remaining):
+                return False
+            self._reserved["tokens"] += tokens
+            self._reserved["cost"] += cost
+            return True
+
+    def release(self, tokens: int, cost: float):
+        with self._lock:
+            self._reserved["tokens"] = max(0, self._reserved["tokens"] - tokens)
+            self._reserved["cost"] = max(0.0, self._reserved["cost"] - cost)
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int):
+        tokens = prompt_tokens + completion_tokens
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.run_spend["tokens"] += tokens
+            self.run_spend["cost"] += cost
+            self.run_spend["calls"] += 1
+            with self._ledger_file_lock():
+                self._ledger_mtime = None # Always merge into the latest ledger on disk
+                self._refresh_ledger()
+                day = self._ledger.setdefault(self._today(), {"tokens": 0, "cost": 0.0, "calls": 0})
+                day["tokens"] += tokens
+                day["cost"] += cost
+                day["calls"] += 1
+                self._save_ledger()
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"run": dict(self.run_spend), "today": self.day_spend(),
+                    "limits": {name: limit for name, limit in self.limits.items() if limit is not None}}
+
+
+def install_budget_meter(budget: LLMBudget):
+    """
+    Wraps litellm.completion process-wide so every call made by the tools is charged to `budget`,
+    and calls are refused with BudgetExhausted once a limit is reached (the tools report that as
+    an ordinary error). Returns the original function so callers can restore it.
+    """
+    import litellm
+    original = litellm.completion
+
+    def metered_completion(*args, **kwargs):
+        if budget.exhausted():
+            raise BudgetExhausted(f"LLM budget exhausted: {budget.summary()}")
+        model = kwargs.get("model") or (args[0] if args else "")
+        response = original(*args, **kwargs)
+        if kwargs.get("stream"):
+            return response # Streamed responses carry no usage block to charge
+        prompt_tokens, completion_tokens = _usage_tokens(response)
+        budget.record(model, prompt_tokens, completion_tokens)
+        return response
+
+    litellm.completion = metered_completion
+    return original
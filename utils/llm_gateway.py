@@ -0,0 +1,288 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import contextlib
+from collections import OrderedDict, deque
+import numpy as np
+import litellm
+
+from utils.text_features import embed_text, split_resume_sections
+from utils.context_cache import (RESUME_PREFIX_INSTRUCTIONS, context_caching_enabled, get_context_cache,
+                                 prefix_cache_stats, cached_tokens_from)
+from utils.llm_budget import estimate_cost, _usage_tokens
+
+LLM_MODEL_ID = "gemini/gemini-1.5-flash-latest"
+# Prompts above this many tokens are trimmed before sending. Gemini's context is far larger;
+# the limit exists to keep single requests from eating a large share of the per-minute quota.
+MAX_PROMPT_TOKENS = int(os.getenv("LLM_MAX_PROMPT_TOKENS", "30000"))
+DEFAULT_COMPLETION_TOKENS = 1000 # Assumed output size when pacing, corrected from usage afterwards
+_TOKEN_CACHE_SIZE = 4096
+
+# JD paragraphs that say nothing about the role: EEO statements, benefits lists, privacy notices...
+_BOILERPLATE_RE = re.compile(
+    r"equal (employment )?opportunity|without regard to|reasonable accommodation|e-verify|"
+    r"affirmative action|applicant privacy|privacy (notice|policy)|recruit(ment|ing) agenc|"
+    r"^\s*(about (us|the company)|benefits|perks|what we offer|why join us)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_token_cache = OrderedDict() # (model, sha1 of text) -> token count, least recently used first
+_token_cache_lock = threading.Lock()
+
+
+def count_tokens(text: str, model: str = LLM_MODEL_ID) -> int:
+    """Token count of `text` for `model`, memoized per text hash so repeated resumes/JDs are counted once."""
+    key = (model, hashlib.sha1((text or "").encode("utf-8")).hexdigest())
+    with _token_cache_lock:
+        if key in _token_cache:
+            _token_cache.move_to_end(key)
+            return _token_cache[key]
+    try:
+        tokens = litellm.token_counter(model=model, text=text or "")
+    except Exception:
+        tokens = len(text or "") // 4 # Offline fallback: ~4 characters per token
+    with _token_cache_lock:
+        _token_cache[key] = tokens
+        if len(_token_cache) > _TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return tokens
+
+
+def strip_boilerplate(job_description_text: str) -> str:
+    """Drops JD paragraphs that are legal/benefits boilerplate rather than requirements."""
+    paragraphs = re.split(r"\n\s*\n", job_description_text or "")
+    kept = [p for p in paragraphs if not _BOILERPLATE_RE.search(p)]
+    return "\n\n".join(kept) if kept else job_description_text
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    tokens = count_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    return text[:max(0, int(len(text) * max_tokens / tokens))].rstrip() + "\n[...truncated]"
+
+
+def fit_prompt(build_prompt, resume_text: str, job_description_text: str, max_tokens: int = MAX_PROMPT_TOKENS,
+               model: str = LLM_MODEL_ID) -> tuple[str, int, list[str]]:
+    """
+    Builds a prompt with build_prompt(resume_text, job_description_text) and, if it is over
+    max_tokens, trims the inputs by priority until it fits:
+      1. boilerplate paragraphs of the JD (EEO, benefits, privacy notices),
+      2. the resume sections least relevant to the JD (the header block before the first
+         ALL-CAPS heading, with the candidate's name and contact details, is always kept),
+      3. as a last resort, the tail of the JD and then of the resume.
+    Returns (prompt, prompt_tokens, trim_notes); trim_notes is empty if nothing was cut.
+    """
+    prompt = build_prompt(resume_text, job_description_text)
+    tokens = count_tokens(prompt, model)
+    notes = []
+    if tokens <= max_tokens:
+        return prompt, tokens, notes
+
+    stripped_jd = strip_boilerplate(job_description_text)
+    if stripped_jd != job_description_text:
+        job_description_text = stripped_jd
+        prompt = build_prompt(resume_text, job_description_text)
+        tokens = count_tokens(prompt, model)
+        notes.append("removed JD boilerplate")
+
+    sections = split_resume_sections(resume_text)
+    if tokens > max_tokens and len(sections) > 1:
+        jd_vector = embed_text(job_description_text)
+        relevance = {i: float(np.dot(embed_text(body), jd_vector)) for i, (_, body) in enumerate(sections)}
+        keep = set(range(len(sections)))
+        header = next((i for i, (heading, _) in enumerate(sections) if heading.isupper()), 1) or 1
+        over = tokens - max_tokens
+        for i in sorted(relevance, key=relevance.get):
+            if over <= 0:
+                break
+            if i < header:
+                continue
+            keep.discard(i)
+            over -= count_tokens(sections[i][1], model)
+            notes.append(f"dropped resume section '{sections[i][0]}'")
+        resume_text = "\n\n".join(body for i, (_, body) in enumerate(sections) if i in keep)
+        prompt = build_prompt(resume_text, job_description_text)
+        tokens = count_tokens(prompt, model)
+
+    for name in ("jd", "resume"):
+        if tokens <= max_tokens:
+            break
+        fixed = tokens - count_tokens(job_description_text if name == "jd" else resume_text, model)
+        room = max(max_tokens // 10, max_tokens - fixed) # Never cut an input below a tenth of the budget
+        if name == "jd":
+            job_description_text = _truncate_to_tokens(job_description_text, room, model)
+        else:
+            resume_text = _truncate_to_tokens(resume_text, room, model)
+        prompt = build_prompt(resume_text, job_description_text)
+        tokens = count_tokens(prompt, model)
+        notes.append(f"truncated the {'JD' if name == 'jd' else 'resume'}")
+    return prompt, tokens, notes
+
+
+class TokenRateLimiter:
+    """
+    Paces requests under a tokens-per-minute (and optionally requests-per-minute) limit using a
+    sliding 60 s window. Each request is admitted with its prompt tokens plus an estimate of its
+    output; `settle` replaces the estimate with the real usage once the response arrives.
+    A single request larger than the whole limit is admitted when the window is empty.
+    """
+
+    def __init__(self, tpm: int = None, rpm: int = None, window_seconds: float = 60.0):
+        self.tpm = tpm
+        self.rpm = rpm
+        self.window_seconds = window_seconds
+        self._events = deque() # [timestamp, tokens] per admitted request
+        self._cond = threading.Condition()
+
+    def _prune(self, now: float):
+        while self._events and now - self._events[0][0] >= self.window_seconds:
+            self._events.popleft()
+
+    def acquire(self, tokens: int) -> list:
+        """Blocks until the request fits in the window. Returns a handle for `settle`."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                used = sum(event[1] for event in self._events)
+                fits_tpm = self.tpm is None or not self._events or used + tokens <= self.tpm
+                fits_rpm = self.rpm is None or len(self._events) < self.rpm
+                if fits_tpm and fits_rpm:
+                    event = [now, tokens]
+                    self._events.append(event)
+                    return event
+                wait = self._events[0][0] + self.window_seconds - now if self._events else 0.05
+                self._cond.wait(timeout=max(0.05, wait))
+
+    def settle(self, handle: list, actual_tokens: int):
+        with self._cond:
+            handle[1] = actual_tokens
+            self._cond.notify_all()
+
+
+def _env_int(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenRateLimiter:
+    """Process-wide limiter, configured from LLM_TPM_LIMIT / LLM_RPM_LIMIT (unset means unlimited)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenRateLimiter(tpm=_env_int("LLM_TPM_LIMIT"), rpm=_env_int("LLM_RPM_LIMIT"))
+        return _limiter
+
+
+_usage_local = threading.local()
+
+
+@contextlib.contextmanager
+def track_usage():
+    """
+    Tallies the LLM calls made through completion() on this thread while the block runs, e.g. to
+    attribute spend to one job: yields {"calls", "tokens", "cost_usd"}, filled in as calls return.
+    """
+    usage = {"calls": 0, "tokens": 0, "cost_usd": 0.0}
+    previous = getattr(_usage_local, "usage", None)
+    _usage_local.usage = usage
+    try:
+        yield usage
+    finally:
+        _usage_local.usage = previous
+
+
+def completion(model: str, messages: list, prompt_tokens: int = None, **kwargs):
+    """
+    litellm.completion behind the shared rate limiter. The prompt is counted (or `prompt_tokens`
+    is used if the caller already has it) and the call waits until it fits under the TPM limit.
+
+    A leading system message holding the shared resume prefix (see utils/context_cache.py) is,
+    with GEMINI_CONTEXT_CACHE=1, replaced by a Gemini context-cache handle created once per
+    resume version. If a call using a handle fails, the handle is dropped from the registry and
+    the call is retried once with the prefix inline. Cached input tokens and latency are
+    tallied in prefix_cache_stats.
+    """
+    if prompt_tokens is None:
+        prompt_tokens = sum(count_tokens(m.get("content") or "", model) for m in messages)
+    prefix = ""
+    if messages and messages[0].get("role") == "system" and (messages[0].get("content") or "").startswith(RESUME_PREFIX_INSTRUCTIONS):
+        prefix = messages[0]["content"]
+    cache_handle = None
+    inline_messages = messages
+    if prefix and model.startswith("gemini/") and context_caching_enabled():
+        cache_handle = get_context_cache().handle_for(model, prefix)
+        if cache_handle:
+            messages = messages[1:] # The cached content already holds the prefix
+            kwargs["cached_content"] = cache_handle
+    expected = prompt_tokens + int(kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+    limiter = get_rate_limiter()
+    handle = limiter.acquire(expected)
+    started = time.perf_counter()
+    try:
+        try:
+            response = litellm.completion(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            if not cache_handle:
+                raise
+            # The cache may have expired early or been deleted on the provider's side
+            print(f"[llm_gateway] Call with context cache {cache_handle} failed ({type(e).__name__} - {e}); "
+                  "retrying with the prefix inline.")
+            get_context_cache().invalidate(model, prefix)
+            kwargs.pop("cached_content", None)
+            messages, cache_handle = inline_messages, None
+            response = litellm.completion(model=model, messages=messages, **kwargs)
+    except Exception:
+        limiter.settle(handle, prompt_tokens) # A failed call still counts its prompt against the quota
+        raise
+    tracked = getattr(_usage_local, "usage", None)
+    if kwargs.get("stream"):
+        return _settled_stream(response, model, prompt_tokens, limiter, handle, tracked)
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        limiter.settle(handle, int(usage.total_tokens))
+    cached = cached_tokens_from(response) or (count_tokens(prefix, model) if cache_handle else 0)
+    prefix_cache_stats.record(model, prompt_tokens, cached, time.perf_counter() - started)
+    if tracked is not None:
+        used_prompt, used_completion = _usage_tokens(response)
+        _track(tracked, model, used_prompt, used_completion)
+    return response
+
+
+def _track(tracked: dict, model: str, used_prompt: int, used_completion: int):
+    tracked["calls"] += 1
+    tracked["tokens"] += used_prompt + used_completion
+    tracked["cost_usd"] += estimate_cost(model, used_prompt, used_completion)
+
+
+def _settled_stream(chunks, model: str, prompt_tokens: int, limiter: TokenRateLimiter, handle: list, tracked: dict):
+    """
+    Passes a streamed response through and, once it ends or the consumer stops reading, settles the
+    limiter (and the track_usage tally of the calling thread) with the real usage: the usage block of
+    the last chunk when the provider sends one, otherwise the prompt plus the counted streamed text.
+    """
+    parts, usage = [], None
+    try:
+        for chunk in chunks:
+            usage = getattr(chunk, "usage", None) or usage
+            choices = getattr(chunk, "choices", None) or []
+            delta = getattr(choices[0], "delta", None) if choices else None
+            if getattr(delta, "content", None):
+                parts.append(delta.content)
+            yield chunk
+    finally:
+        if usage is not None and getattr(usage, "total_tokens", None):
+            used_prompt = int(getattr(usage, "prompt_tokens", 0) or 0)
+            used_completion = int(usage.total_tokens) - used_prompt
+        else:
+            used_prompt, used_completion = prompt_tokens, count_tokens("".join(parts), model)
+        limiter.settle(handle, used_prompt + used_completion)
+        if tracked is not None:
+            _track(tracked, model, used_prompt, used_completion)
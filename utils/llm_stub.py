@@ -0,0 +1,101 @@
+import json
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+
+# A canned analysis that satisfies every consumer of analyze_resume_jd_match's output
+STUB_ANALYSIS = {
+    "compatibility_score": 72,
+    "strengths": ["Relevant Python and SQL experience.", "Analytics degree matches the role."],
+    "weaknesses": ["Limited evidence of the domain-specific tooling the JD asks for."],
+    "keyword_analysis": [
+        {"keyword": "Python", "present_in_resume": True},
+        {"keyword": "SQL", "present_in_resume": True},
+        {"keyword": "NLP", "present_in_resume": False},
+    ],
+    "summary": "Stubbed analysis: good overall fit with a few gaps.",
+}
+STUB_TEXT = (
+    "Dear Hiring Manager,\n\n"
+    "This is a stubbed response generated locally for testing; no LLM was called.\n\n"
+    "Sincerely,\nThe Stub"
+)
+
+# Simulated provider prefix caching: system-message prefixes already seen (implicit caching)
+# and explicit context caches created through StubContextCacheBackend, with their token counts
+_stub_prefixes = {}
+_stub_context_caches = {}
+_stub_cache_lock = threading.Lock()
+PREFILL_LATENCY_SHARE = 0.5 # Share of `latency` spent on input tokens, which cached tokens skip
+
+
+class StubContextCacheBackend:
+    """Local stand-in for GeminiContextCacheBackend: hands out fake cache names, no network."""
+
+    def create(self, model: str, prefix: str, ttl_seconds: int) -> str:
+        name = "cachedContents/stub-" + hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:12]
+        with _stub_cache_lock:
+            _stub_context_caches[name] = len(prefix) // 4
+        return name
+
+
+def stub_completion(model: str = None, messages: list = None, stream: bool = False, latency: float = 0.0, **kwargs):
+    """
+    Drop-in stand-in for litellm.completion that never touches the network.
+
+    Prompts that ask for JSON get STUB_ANALYSIS back; everything else gets STUB_TEXT.
+    With stream=True it returns an iterator of litellm-style delta chunks. `latency`
+    (seconds) simulates provider wait time so concurrency can be exercised locally.
+    Prefix caching is simulated too: a `cached_content` handle from StubContextCacheBackend, or a
+    system message sent before, is reported in usage.prompt_tokens_details.cached_tokens and
+    shortens the simulated latency accordingly; an unknown handle raises litellm.NotFoundError.
+    """
+    messages = messages or [{}]
+    prompt = messages[-1].get("content", "")
+    system = "".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    content = json.dumps(STUB_ANALYSIS) if "JSON" in prompt else STUB_TEXT
+    with _stub_cache_lock:
+        if kwargs.get("cached_content"):
+            if kwargs["cached_content"] not in _stub_context_caches: # Expired or deleted, as the provider reports it
+                import litellm
+                raise litellm.NotFoundError(message=f"CachedContent not found: {kwargs['cached_content']}",
+                                            model=model, llm_provider="gemini")
+            cached = _stub_context_caches[kwargs["cached_content"]]
+        else:
+            key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+            cached = _stub_prefixes.get(key, 0) if system else 0
+            if system:
+                _stub_prefixes[key] = len(system) // 4
+    held_in_cache = cached if kwargs.get("cached_content") else 0 # Not part of the messages sent
+    prompt_tokens = held_in_cache + sum(len(m.get("content") or "") for m in messages) // 4
+    if latency:
+        time.sleep(latency * (1 - PREFILL_LATENCY_SHARE * cached / max(prompt_tokens, 1)))
+    if not stream:
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(content) // 4,
+                                  total_tokens=prompt_tokens + len(content) // 4,
+                                  prompt_tokens_details=SimpleNamespace(cached_tokens=cached)),
+        )
+
+    def chunks():
+        for i in range(0, len(content), 16):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 16]))])
+    return chunks()
+
+
+def install_stub(latency: float = 0.0):
+    """
+    Replaces litellm.completion process-wide with stub_completion, and creates Gemini context
+    caches (GEMINI_CONTEXT_CACHE=1) with StubContextCacheBackend. Returns the original function.
+    """
+    import os
+    import litellm
+    import utils.context_cache as context_cache
+    context_cache._registry = context_cache.ContextCacheRegistry(path=None, backend=StubContextCacheBackend())
+    original = litellm.completion
+    litellm.completion = lambda *args, **kwargs: stub_completion(*args, latency=latency, **kwargs)
+    os.environ.setdefault("GEMINI_API_KEY", "stub") # The tools refuse to run without a key
+    return original
@@ -0,0 +1,343 @@
+import os
+import re
+import math
+import time
+import struct
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.artifact_store import atomic_write_bytes
+
+DEFAULT_PROCESSED_INDEX_PATH = os.path.join("data", "processed_jobs.sqlite")
+DEFAULT_CAPACITY = 100_000 # The Bloom filter is resized (rebuilt at twice the size) once it holds more
+DEFAULT_ERROR_RATE = 0.01
+# How often a Bloom negative may look at SQLite for rows other processes added meanwhile
+DEFAULT_SYNC_INTERVAL_S = 1.0
+
+_BLOOM_HEADER = struct.Struct("<4sQdQQQ") # magic, capacity, error rate, bits, hashes, items
+_BLOOM_MAGIC = b"BLM1"
+# Query parameters that only say how a visitor got to a posting, not which posting it is
+_TRACKING_PARAM_RE = re.compile(r"^(utm_\w+|gclid|fbclid|mc_[ce]id|ref|refid|source|src|trk|trackingid|from)$", re.IGNORECASE)
+_COMPANY_SUFFIX_RE = re.compile(r"\b(inc|llc|ltd|limited|corp|corporation|co|company|gmbh|plc|pvt)\b\.?$")
+_URL_RE = re.compile(r"https?://[^\s<>\"')\]]+")
+# "--- Application prepared: Data Analyst at AnalyzeIt Inc. ---" (workflows/crew_pipeline.py) and
+# "--- Application processed: ... ---" (workflows/worker.py); other headers only start a new entry
+_ENTRY_HEADER_RE = re.compile(r"^-{2,}\s*(?P<header>.*?)\s*-{2,}$")
+_HEADER_JOB_RE = re.compile(r"^Application (?:prepared|processed):\s*(?P<title>.+?)\s+(?:at|@)\s+(?P<company>.+)$")
+_COMPANY_LINE_RE = re.compile(r"^\W*(?:company|company name|employer)\s*:\s*(?P<value>.+)$", re.IGNORECASE)
+_TITLE_LINE_RE = re.compile(r"^\W*(?:job title|title|position|role)\s*:\s*(?P<value>.+)$", re.IGNORECASE)
+
+
+def canonical_job_url(url: str) -> str:
+    """
+    The form of a posting URL used for matching: lower-case host without "www.", http folded
+    into https, no fragment, no trailing slash and no tracking parameters, remaining query
+    parameters sorted. Returns None for missing or placeholder URLs.
+    """
+    url = (url or "").strip()
+    if not url or url.upper() == "N/A":
+        return None
+    parts = urlsplit(url)
+    if not parts.scheme:
+        return None
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    netloc = netloc[4:] if netloc.startswith("www.") else netloc
+    netloc = re.sub(r":(80|443)$", "", netloc)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAM_RE.match(k)))
+    return urlunsplit((scheme, netloc, parts.path.rstrip("/") or "/", query, ""))
+
+
+def _normalize_name(value: str) -> str:
+    value = re.sub(r"[^0-9a-z]+", " ", (value or "").lower()).strip()
+    return _COMPANY_SUFFIX_RE.sub("", value).strip()
+
+
+def job_fingerprints(url: str = None, company: str = None, title: str = None) -> list[str]:
+    """
+    Fingerprints identifying a posting: "url:<canonical URL>" and "job:<hash of company + title>".
+    A job counts as processed when either is on record, so the same role reposted under a new
+    URL, or reached through a differently decorated link, is still recognised.
+    """
+    fingerprints = []
+    canonical = canonical_job_url(url)
+    if canonical:
+        fingerprints.append("url:" + canonical)
+    company, title = _normalize_name(company), _normalize_name(title)
+    if company and title:
+        fingerprints.append("job:" + hashlib.sha1(f"{company}|{title}".encode("utf-8")).hexdigest())
+    return fingerprints
+
+
+def fingerprints_for(job) -> list[str]:
+    """job_fingerprints for a job dict or JobRecord (anything with .get)."""
+    return job_fingerprints(job.get("url"), job.get("company"), job.get("title"))
+
+
+def fingerprints_from_log_text(text: str) -> list[str]:
+    """
+    Fingerprints of the jobs mentioned in Notion log text. Entries start at a "--- ... ---"
+    header line; each contributes every posting URL it contains and its company/title, taken
+    from an "Application prepared: <title> at <company>" header (or "Application processed:")
+    or from "Company:" / "Job Title:" lines.
+    """
+    fingerprints = []
+    entry = {}
+
+    def flush():
+        if entry.get("company") and entry.get("title"):
+            fingerprints.extend(job_fingerprints(company=entry["company"], title=entry["title"]))
+        entry.clear()
+
+    for line in (text or "").splitlines():
+        line = line.strip()
+        header = _ENTRY_HEADER_RE.match(line)
+        if header:
+            flush()
+            job = _HEADER_JOB_RE.match(header.group("header"))
+            if job:
+                entry.update(title=job.group("title"), company=job.group("company"))
+            continue
+        for url in _URL_RE.findall(line):
+            fingerprints.extend(job_fingerprints(url=url.rstrip(".,;:")))
+        company, title = _COMPANY_LINE_RE.match(line), _TITLE_LINE_RE.match(line)
+        if company:
+            entry["company"] = company.group("value")
+        elif title:
+            entry["title"] = title.group("value")
+    flush()
+    return list(dict.fromkeys(fingerprints))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (blake2b double hashing), serializable to bytes."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_bytes(self) -> bytes:
+        return _BLOOM_HEADER.pack(_BLOOM_MAGIC, self.capacity, self.error_rate, self.num_bits,
+                                  self.num_hashes, self.count) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        magic, capacity, error_rate, num_bits, num_hashes, count = _BLOOM_HEADER.unpack_from(data)
+        bloom = cls(capacity, error_rate)
+        bits = data[_BLOOM_HEADER.size:]
+        if magic != _BLOOM_MAGIC or (bloom.num_bits, bloom.num_hashes) != (num_bits, num_hashes) or len(bits) != len(bloom.bits):
+            raise ValueError("Not a compatible Bloom filter file.")
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        return bloom
+
+
+class ProcessedJobIndex:
+    """
+    Persistent record of jobs already processed (completed in a batch run or logged to Notion).
+
+    The exact set of fingerprints lives in SQLite (`path`); an in-memory Bloom filter saved next
+    to it (`<path without extension>.bloom`) sits in front, so checking a scraped job that was
+    never seen (the common case) costs a few hashes. Only Bloom hits are confirmed against
+    SQLite, which removes the filter's false positives. At most once per `sync_interval` seconds,
+    a negative first compares SQLite's data_version (one cheap PRAGMA) with the last one seen; if
+    another process has written since, its new rows are added to the filter. Jobs recorded by
+    other processes are therefore seen within `sync_interval` (0 checks on every negative), and
+    this process's own records immediately. If the .bloom file is missing or out of step with the
+    database (e.g. after a crash), it is rebuilt on open.
+    """
+
+    def __init__(self, path: str = DEFAULT_PROCESSED_INDEX_PATH, capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE, sync_interval: float = DEFAULT_SYNC_INTERVAL_S):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.bloom_path = os.path.splitext(path)[0] + ".bloom"
+        self._lock = threading.Lock()
+        self.stats = {"checks": 0, "bloom_negatives": 0, "exact_hits": 0, "false_positives": 0}
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS processed "
+                         "(fingerprint TEXT PRIMARY KEY, label TEXT, source TEXT, added REAL)")
+        # Bumped whenever rows are deleted, since row IDs are then reused and cannot show what is new
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.commit()
+        self._max_rowid = 0
+        self._generation = self._read_generation()
+        self._bloom = self._load_bloom(capacity, error_rate)
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        self._synced_at = time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._bloom.count
+
+    def _load_bloom(self, capacity: int, error_rate: float) -> BloomFilter:
+        count = self._db.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+        try:
+            with open(self.bloom_path, "rb") as f:
+                bloom = BloomFilter.from_bytes(f.read())
+            if bloom.count == count and count <= bloom.capacity:
+                self._max_rowid = self._db.execute("SELECT COALESCE(MAX(rowid), 0) FROM processed").fetchone()[0]
+                return bloom
+        except (OSError, ValueError, struct.error):
+            pass
+        return self._rebuild_bloom(max(capacity, count * 2), error_rate)
+
+    def _rebuild_bloom(self, capacity: int, error_rate: float) -> BloomFilter:
+        bloom = BloomFilter(capacity, error_rate)
+        self._max_rowid = 0
+        for rowid, fingerprint in self._db.execute("SELECT rowid, fingerprint FROM processed"):
+            bloom.add(fingerprint)
+            self._max_rowid = max(self._max_rowid, rowid)
+        atomic_write_bytes(self.bloom_path, bloom.to_bytes())
+        return bloom
+
+    def _read_generation(self) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _sync_locked(self, force: bool = False):
+        """Adds the fingerprints other processes recorded since the last check to the Bloom filter."""
+        now = time.monotonic()
+        if not force and now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            count = self._db.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+            self._bloom = self._rebuild_bloom(max(self._bloom.capacity, count * 2), self._bloom.error_rate)
+            return
+        for rowid, fingerprint in self._db.execute("SELECT rowid, fingerprint FROM processed WHERE rowid > ?",
+                                                   (self._max_rowid,)).fetchall():
+            self._bloom.add(fingerprint)
+            self._max_rowid = max(self._max_rowid, rowid)
+        count = self._db.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+        if count != self._bloom.count or count > self._bloom.capacity:
+            # Rows were missed (another process inserted while we did) or the filter is full
+            self._bloom = self._rebuild_bloom(max(self._bloom.capacity, count * 2), self._bloom.error_rate)
+
+    def contains_fingerprint(self, fingerprint: str) -> bool:
+        with self._lock:
+            if fingerprint not in self._bloom:
+                self._sync_locked()
+            if fingerprint not in self._bloom:
+                self.stats["bloom_negatives"] += 1
+                return False
+            found = self._db.execute("SELECT 1 FROM processed WHERE fingerprint = ?", (fingerprint,)).fetchone() is not None
+            self.stats["exact_hits" if found else "false_positives"] += 1
+            return found
+
+    def is_processed(self, job) -> bool:
+        """True if the job (dict or JobRecord) matches a processed job by canonical URL or by company + title."""
+        with self._lock:
+            self.stats["checks"] += 1
+        return any(self.contains_fingerprint(fp) for fp in fingerprints_for(job))
+
+    def partition(self, jobs) -> tuple[list, list]:
+        """Splits jobs into (new, already processed), keeping their order."""
+        new, processed = [], []
+        for job in jobs:
+            (processed if self.is_processed(job) else new).append(job)
+        return new, processed
+
+    def add_fingerprints(self, fingerprints: list[str], label: str = None, source: str = None) -> int:
+        """Records fingerprints; returns how many were not on record yet."""
+        added = 0
+        now = time.time()
+        with self._lock:
+            self._sync_locked(force=True) # So the saved filter also covers other processes' rows
+            for fingerprint in fingerprints:
+                cursor = self._db.execute("INSERT OR IGNORE INTO processed VALUES (?, ?, ?, ?)",
+                                          (fingerprint, label, source, now))
+                if cursor.rowcount:
+                    self._bloom.add(fingerprint)
+                    self._max_rowid = max(self._max_rowid, cursor.lastrowid)
+                    added += 1
+            self._db.commit()
+            if added:
+                if self._bloom.count > self._bloom.capacity:
+                    self._bloom = self._rebuild_bloom(self._bloom.capacity * 2, self._bloom.error_rate)
+                else:
+                    atomic_write_bytes(self.bloom_path, self._bloom.to_bytes())
+        return added
+
+    def mark_processed(self, job, source: str = None) -> int:
+        label = f"{job.get('title')} @ {job.get('company')}"
+        return self.add_fingerprints(fingerprints_for(job), label=label, source=source)
+
+    def add_from_log_text(self, text: str, source: str = "notion") -> int:
+        return self.add_fingerprints(fingerprints_from_log_text(text), source=source)
+
+    def rebuild_from_notion(self, page_id: str, notion=None) -> dict:
+        """
+        Replaces the index with the jobs found in the log entries on a Notion page (top-level
+        blocks, read page by page). Needs NOTION_API_KEY unless a client is passed in.
+        """
+        if notion is None:
+            import notion_client
+            notion = notion_client.Client(auth=os.environ["NOTION_API_KEY"])
+        lines, cursor = [], None
+        while True:
+            kwargs = {"block_id": page_id, "page_size": 100}
+            if cursor:
+                kwargs["start_cursor"] = cursor
+            response = notion.blocks.children.list(**kwargs)
+            for block in response.get("results", []):
+                rich_text = block.get(block.get("type"), {}).get("rich_text", [])
+                lines.append("".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in rich_text))
+            if not response.get("has_more"):
+                break
+            cursor = response.get("next_cursor")
+        fingerprints = fingerprints_from_log_text("\n".join(lines))
+        with self._lock:
+            self._db.execute("DELETE FROM processed")
+            self._db.execute("INSERT INTO meta VALUES ('generation', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1")
+            self._db.commit()
+            self._generation = self._read_generation()
+            self._bloom = self._rebuild_bloom(max(self._bloom.capacity, len(fingerprints) * 2), self._bloom.error_rate)
+        added = self.add_fingerprints(fingerprints, source="notion")
+        return {"blocks": len(lines), "fingerprints": added}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_processed_index() -> ProcessedJobIndex:
+    """Process-wide index at PROCESSED_INDEX_PATH (default data/processed_jobs.sqlite)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProcessedJobIndex(os.getenv("PROCESSED_INDEX_PATH", DEFAULT_PROCESSED_INDEX_PATH))
+        return _index
@@ -0,0 +1,223 @@
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import sysconfig
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+DEFAULT_PROFILE_DIR = os.path.join("data", "profiles")
+DEFAULT_SAMPLE_INTERVAL_S = 0.005
+DEFAULT_TOP_N = 25
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+# Wall-clock categories, matched against the frames' file paths from the innermost frame outwards,
+# so e.g. bs4 called from a scraping tool counts as HTML parsing and an import inside litellm as import.
+CATEGORY_RULES = (
+    ("import", ("<frozen importlib._bootstrap",)),
+    ("html_parsing", ("bs4/", "html/parser", "lxml/", "soupsieve/", "document_ingestion")),
+    ("llm", ("litellm/", "llm_gateway", "google/genai/", "openai/", "llms/gemini_model")),
+    ("notion_io", ("notion_client/", "tools/notion_tools")),
+    ("scraping", ("web_scraping_tools", "parallel_scraper_tool", "board_poller_tool")),
+    ("agent_code", ("smolagents/",)),
+)
+# Used only where per-thread CPU clocks are unavailable: a leaf frame in these files is a wait
+_WAIT_LEAF_MARKERS = ("socket.py", "ssl.py", "selectors.py", "threading.py", "queue.py")
+
+
+def _short_path(filename: str) -> str:
+    if "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(os.getcwd() + os.sep):
+        filename = os.path.relpath(filename)
+    elif filename.startswith(_STDLIB_DIR + os.sep):
+        filename = os.path.relpath(filename, _STDLIB_DIR)
+    return filename[:-3] if filename.endswith(".py") else filename
+
+
+def _thread_cpu_clock(thread_id: int):
+    """CPU seconds used so far by a thread, or None where per-thread clocks are unavailable (non-Linux)."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class SessionProfiler:
+    """
+    Profiles one or more agent sessions (each wrapped in `with profiler.session():`) three ways:
+      - cProfile on the calling (main) thread, for exact per-function CPU-side timings;
+      - a stack sampler over every thread, giving collapsed stacks for flamegraphs and a
+        wall-clock breakdown by category, split into local CPU and waiting (network, sleeps,
+        locks) using each thread's CPU clock;
+      - tracemalloc, for peak traced memory and the largest allocation sites.
+    tracemalloc slows Python code noticeably, so CPU shares are inflated relative to waits.
+    report() writes <stamp>.prof (pstats), <stamp>.collapsed (flamegraph.pl / speedscope input)
+    and <stamp>.txt (the top-N summary, also returned).
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, interval: float = DEFAULT_SAMPLE_INTERVAL_S,
+                 top_n: int = DEFAULT_TOP_N, trace_memory: bool = True):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.sessions = 0
+        self.wall_s = 0.0
+        self._profile = cProfile.Profile()
+        self._stacks = defaultdict(int)                       # "thread;frame;...;frame" -> samples
+        self._categories = defaultdict(lambda: [0.0, 0.0])    # (main thread?, category) -> [wall, cpu]
+        self._leaves = defaultdict(float)                     # leaf frame -> wall seconds
+        self._labels = {}                                     # code object -> frame label
+        self._stop = threading.Event()
+        self._snapshot = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{_short_path(code.co_filename)}:{code.co_name}"
+        return label
+
+    @staticmethod
+    def _category(filenames: list) -> str:
+        for filename in filenames: # innermost first
+            normalized = filename.replace(os.sep, "/")
+            for category, markers in CATEGORY_RULES:
+                if any(marker in normalized for marker in markers):
+                    return category
+        return "other"
+
+    def _sample_loop(self, main_id: int):
+        own_id = threading.get_ident()
+        last = {} # thread id -> (perf_counter, cpu clock)
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                cpu = _thread_cpu_clock(thread_id)
+                previous = last.get(thread_id)
+                last[thread_id] = (now, cpu)
+                if previous is None:
+                    continue
+                elapsed = now - previous[0]
+                filenames, labels = [], []
+                while frame is not None:
+                    filenames.append(frame.f_code.co_filename)
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if thread_id != main_id and "concurrent/futures/thread:_worker" in labels and \
+                        filenames[0].endswith(("threading.py", "queue.py")):
+                    continue # An idle pool worker waiting for work
+                if cpu is not None and previous[1] is not None:
+                    cpu_s = min(max(cpu - previous[1], 0.0), elapsed)
+                else:
+                    cpu_s = 0.0 if filenames[0].endswith(_WAIT_LEAF_MARKERS) else elapsed
+                bucket = self._categories[(thread_id == main_id, self._category(filenames))]
+                bucket[0] += elapsed
+                bucket[1] += cpu_s
+                self._leaves[labels[0]] += elapsed
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self._stacks[";".join(reversed(labels))] += 1
+
+    @contextmanager
+    def session(self):
+        """Profiles the enclosed block; may be entered repeatedly (e.g. once per interactive task)."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stop.clear()
+        sampler = threading.Thread(target=self._sample_loop, args=(threading.get_ident(),),
+                                   name="profiler-sampler", daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        self._profile.enable()
+        try:
+            yield self
+        finally:
+            self._profile.disable()
+            self.wall_s += time.perf_counter() - started
+            self.sessions += 1
+            self._stop.set()
+            sampler.join()
+            if tracemalloc.is_tracing():
+                self._snapshot = tracemalloc.take_snapshot()
+
+    def _category_table(self, main_thread: bool) -> list[str]:
+        rows = sorted(((category, wall, cpu) for (is_main, category), (wall, cpu) in self._categories.items()
+                       if is_main == main_thread), key=lambda row: -row[1])
+        total = sum(row[1] for row in rows) or 1.0
+        lines = [f"  {'category':14s} {'wall s':>8s} {'cpu s':>8s} {'wait s':>8s} {'share':>6s}"]
+        lines += [f"  {category:14s} {wall:8.2f} {cpu:8.2f} {wall - cpu:8.2f} {wall / total:6.1%}"
+                  for category, wall, cpu in rows]
+        return lines if rows else ["  (no samples)"]
+
+    def summary(self, startup_s: float = None) -> str:
+        n = self.top_n
+        lines = [f"Profile of {self.sessions} agent session(s): {self.wall_s:.2f} s wall"]
+        if startup_s is not None:
+            lines.append(f"Startup before the first task (mostly imports): {startup_s:.2f} s")
+        lines += ["", "Wall-clock by category, main thread (wait = network, sleeps, locks):"]
+        lines += self._category_table(True)
+        lines += ["", "Background threads (thread-seconds, idle pool workers excluded):"]
+        lines += self._category_table(False)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ["", f"Peak traced memory: {peak / 2**20:.1f} MiB (at end: {current / 2**20:.1f} MiB)"]
+        if self._snapshot is not None:
+            lines.append(f"Top {n} allocation sites still held at the end of the last session:")
+            lines += [f"  {stat.size / 2**10:10.1f} KiB  {stat.traceback}"
+                      for stat in self._snapshot.statistics("lineno")[:n]]
+        lines += ["", f"Top {n} stack leaves by sampled wall time (all threads, includes waits):"]
+        lines += [f"  {seconds:8.2f} s  {label}"
+                  for label, seconds in sorted(self._leaves.items(), key=lambda item: -item[1])[:n]]
+        for sort_key, title in (("cumulative", "cumulative"), ("tottime", "own")):
+            stream = io.StringIO()
+            try:
+                pstats.Stats(self._profile, stream=stream).sort_stats(sort_key).print_stats(n)
+            except TypeError: # No calls were profiled
+                continue
+            body = stream.getvalue()
+            lines += ["", f"Top {n} functions by {title} time (cProfile, main thread):",
+                      body[body.find("   ncalls"):].rstrip()]
+        return "\n".join(lines)
+
+    def report(self, startup_s: float = None) -> dict:
+        """Writes the .prof, .collapsed and .txt files and stops tracemalloc. Returns their paths and the summary."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        paths = {"pstats": base + ".prof", "collapsed": base + ".collapsed", "summary": base + ".txt"}
+        self._profile.dump_stats(paths["pstats"])
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+        text = self.summary(startup_s)
+        text += "\n\nFiles:\n" + "\n".join(f"  {kind:9s} {path}" for kind, path in paths.items())
+        with open(paths["summary"], "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return {"paths": paths, "summary": text}
+
+
+if __name__ == "__main__":
+    # Demo on a synthetic session: HTML parsing, stubbed LLM calls (latency = network wait) and local work.
+    import tempfile
+    from bs4 import BeautifulSoup
+    from utils.llm_stub import install_stub
+    from tools.compatibility_analyzer_tool import analyze_resume_jd_match
+
+    install_stub(latency=0.3)
+    with open("test_jobs.html", "r", encoding="utf-8") as f:
+        html = f.read()
+    profiler = SessionProfiler(output_dir=tempfile.mkdtemp(prefix="profile-demo-"))
+    with profiler.session():
+        for _ in range(30):
+            BeautifulSoup(html, "html.parser").find_all("a")
+        for i in range(3):
+            analyze_resume_jd_match("Python, SQL, Tableau", f"Data Analyst {i}: Python and SQL required.")
+        sum(i * i for i in range(2_000_000))
+    print(profiler.report(startup_s=None)["summary"])
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+DEFAULT_JOURNAL_PATH = os.path.join("data", "run_journal.jsonl")
+
+
+def stage_key(stage: str, inputs: dict) -> str:
+    """Content hash identifying one stage run: same stage + same inputs -> same key."""
+    basis = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of completed pipeline stages.
+
+    Each line records one successful stage result together with the hash of its inputs.
+    Before running a stage, callers look it up by (stage, inputs); on a rerun after a crash
+    or quota error, every stage that already completed for the same inputs is answered from
+    the journal and work resumes at the first stage that has no entry. Lines are flushed
+    as they are written, and a line truncated by a crash is ignored on load.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._results = {}
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._results[entry["key"]] = entry["result"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def lookup(self, stage: str, inputs: dict):
+        """Returns (True, result) if this stage already completed for these inputs, else (False, None)."""
+        key = stage_key(stage, inputs)
+        with self._lock:
+            if key in self._results:
+                return True, self._results[key]
+        return False, None
+
+    def record(self, job_id: str, stage: str, inputs: dict, result):
+        key = stage_key(stage, inputs)
+        entry = {"key": key, "job_id": job_id, "stage": stage, "ts": time.time(), "result": result}
+        with self._lock:
+            self._results[key] = result
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+
+    def run_stage(self, job_id: str, stage: str, inputs: dict, fn, succeeded=lambda result: True):
+        """
+        Returns the journaled result for (stage, inputs) if there is one; otherwise calls
+        fn(**inputs) and journals its result only when succeeded(result) is true, so failed
+        stages are retried on the next run.
+        """
+        found, result = self.lookup(stage, inputs)
+        if found:
+            print(f"[RunJournal] {job_id}: '{stage}' already completed; reusing checkpoint.")
+            return result
+        result = fn(**inputs)
+        if succeeded(result):
+            self.record(job_id, stage, inputs, result)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._file.close()
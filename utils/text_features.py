@@ -0,0 +1,58 @@
+import re
+import hashlib
+import numpy as np
+
+# Dimension of the hashed embedding. 256 float32s per posting keeps 100k postings at ~100MB
+# on disk, and a full brute-force cosine scan over them is a single matrix-vector product.
+EMBEDDING_DIM = 256
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_HEADING_RE = re.compile(r"^[A-Z][A-Z &/,\-]{2,60}$")
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embeds text into a fixed-size, L2-normalised vector using feature hashing over
+    unigrams and bigrams. Fully local and deterministic: no model download, no API call.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    tokens = [t.rstrip(".") for t in _TOKEN_RE.findall((text or "").lower())]
+    tokens = [t for t in tokens if len(t) > 1]
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts = {}
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+    for feature, count in counts.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        sign = 1.0 if (h >> 63) & 1 else -1.0
+        vec[h % dim] += sign * (1.0 + np.log(count)) # Sublinear term frequency
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def split_resume_sections(resume_text: str) -> list[tuple[str, str]]:
+    """
+    Splits a plain-text resume into (heading, body) sections. A new section starts after
+    a blank line or at an ALL-CAPS heading line such as "WORK EXPERIENCE".
+    """
+    sections = []
+    current = []
+
+    def flush():
+        block = "\n".join(current).strip()
+        if block:
+            sections.append((block.splitlines()[0].strip()[:80], block))
+        current.clear()
+
+    for line in (resume_text or "").splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        if _HEADING_RE.match(stripped) and current:
+            flush()
+        current.append(line)
+    flush()
+    return sections
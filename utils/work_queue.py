@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+DEFAULT_WORK_QUEUE_PATH = os.path.join("data", "work_queue.sqlite")
+DEFAULT_VISIBILITY_TIMEOUT_S = 600 # A leased job not acked or extended within this is handed to another worker
+DEFAULT_MAX_ATTEMPTS = 3           # Leases (including ones lost to crashed workers) before a job is given up on
+
+
+class Lease:
+    """A job handed to one worker: ack or nack it with the same lease, or extend it while still working."""
+
+    __slots__ = ("job_id", "payload", "attempts", "token")
+
+    def __init__(self, job_id: str, payload: dict, attempts: int, token: str):
+        self.job_id = job_id
+        self.payload = payload
+        self.attempts = attempts
+        self.token = token
+
+    def __repr__(self) -> str:
+        return f"Lease(job_id={self.job_id!r}, attempts={self.attempts})"
+
+
+class SQLiteWorkQueue:
+    """
+    Durable job queue in one SQLite file, safe to share between processes on a machine (WAL
+    mode; leasing runs in an IMMEDIATE transaction, so two workers never get the same job).
+
+    Jobs are leased highest priority first for `visibility_timeout` seconds. A worker that
+    crashes or hangs simply stops extending its lease; once the lease expires the job is leased
+    again, up to `max_attempts` times, after which it is marked dead. ack()/nack()/extend() only
+    act while the caller still holds the lease, so a worker that lost its lease cannot overwrite
+    the result of the worker that took the job over.
+    """
+
+    def __init__(self, path: str = DEFAULT_WORK_QUEUE_PATH, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, payload TEXT NOT NULL, priority REAL NOT NULL DEFAULT 0,
+            state TEXT NOT NULL DEFAULT 'ready', attempts INTEGER NOT NULL DEFAULT 0,
+            lease_token TEXT, lease_expires REAL, worker TEXT, result TEXT, error TEXT,
+            enqueued REAL NOT NULL, updated REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, priority DESC, enqueued)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_leased ON jobs (state, lease_expires)")
+
+    def enqueue(self, job_id: str, payload: dict, priority: float = 0.0) -> bool:
+        """Adds a job unless one with this ID is already queued (in any state). Returns True if added."""
+        return self.enqueue_many([(job_id, payload, priority)]) == 1
+
+    def enqueue_many(self, jobs) -> int:
+        """Adds (job_id, payload, priority) tuples in one transaction; returns how many were new."""
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany("INSERT OR IGNORE INTO jobs (id, payload, priority, enqueued, updated) VALUES (?, ?, ?, ?, ?)",
+                                 [(job_id, json.dumps(payload), priority, now, now) for job_id, payload, priority in jobs])
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    def lease(self, worker: str = None, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> Lease:
+        """The most important available job (ready, or whose lease expired), or None if there is none."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Leases that expired on their last allowed attempt are given up on first
+                self._db.execute("UPDATE jobs SET state = 'dead', lease_token = NULL, updated = ?, "
+                                 "error = 'Lease expired on the last attempt (worker crashed or hung).' "
+                                 "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                                 (now, now, self.max_attempts))
+                row = self._db.execute(
+                    "SELECT id, payload, attempts FROM jobs WHERE state = 'ready' OR (state = 'leased' AND lease_expires < ?) "
+                    "ORDER BY priority DESC, enqueued LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute("UPDATE jobs SET state = 'leased', attempts = attempts + 1, lease_token = ?, "
+                                 "lease_expires = ?, worker = ?, updated = ? WHERE id = ?",
+                                 (token, now + visibility_timeout, worker, now, row[0]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return Lease(row[0], json.loads(row[1]), row[2] + 1, token)
+
+    def _finish(self, lease: Lease, sql: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._db.execute(sql + " WHERE id = ? AND state = 'leased' AND lease_token = ?",
+                                      params + (lease.job_id, lease.token))
+            return cursor.rowcount == 1
+
+    def extend(self, lease: Lease, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> bool:
+        """Pushes the lease's expiry out again (a heartbeat); False if the lease was lost."""
+        now = time.time()
+        return self._finish(lease, "UPDATE jobs SET lease_expires = ?, updated = ?", (now + visibility_timeout, now))
+
+    def ack(self, lease: Lease, result: dict = None) -> bool:
+        """Marks the job done with its result; False if the lease was lost (the result is discarded)."""
+        return self._finish(lease, "UPDATE jobs SET state = 'done', result = ?, lease_token = NULL, updated = ?",
+                            (json.dumps(result), time.time()))
+
+    def nack(self, lease: Lease, error: str, retry: bool = True) -> bool:
+        """Gives the job back: ready again if retry and attempts remain, otherwise dead."""
+        state = "ready" if retry and lease.attempts < self.max_attempts else "dead"
+        return self._finish(lease, "UPDATE jobs SET state = ?, error = ?, lease_token = NULL, updated = ?",
+                            (state, error, time.time()))
+
+    def release(self, lease: Lease) -> bool:
+        """Gives the job back untouched (e.g. the worker ran out of budget): ready again, attempt not counted."""
+        return self._finish(lease, "UPDATE jobs SET state = 'ready', attempts = MAX(attempts - 1, 0), "
+                                   "lease_token = NULL, updated = ?", (time.time(),))
+
+    def stats(self) -> dict:
+        """Job counts per state ('leased' ones past their expiry are counted as 'expired')."""
+        counts = {"ready": 0, "leased": 0, "expired": 0, "done": 0, "dead": 0}
+        with self._lock:
+            rows = self._db.execute("SELECT CASE WHEN state = 'leased' AND lease_expires < ? THEN 'expired' ELSE state END, "
+                                    "COUNT(*) FROM jobs GROUP BY 1", (time.time(),)).fetchall()
+        counts.update(dict(rows))
+        return counts
+
+    def results(self) -> list[dict]:
+        """Results of done jobs, plus {"id", "status": "error", "error"} for dead ones, oldest first."""
+        with self._lock:
+            rows = self._db.execute("SELECT id, state, result, error FROM jobs WHERE state IN ('done', 'dead') "
+                                    "ORDER BY updated").fetchall()
+        return [json.loads(result) if state == "done" else {"id": job_id, "status": "error", "error": error}
+                for job_id, state, result, error in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# Redis data layout (all keys under one prefix): <p>:ready / <p>:leased / <p>:finished are sorted
+# sets scored by -priority / lease expiry / completion time; <p>:payload, <p>:priority, <p>:attempts,
+# <p>:token, <p>:result and <p>:dead are hashes keyed by job ID. Every state change is one Lua
+# script, so it is atomic.
+_REDIS_ENQUEUE = """
+if redis.call('HSETNX', KEYS[3], ARGV[1], ARGV[2]) == 0 then return 0 end
+redis.call('HSET', KEYS[4], ARGV[1], ARGV[3])
+redis.call('ZADD', KEYS[1], -tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+_REDIS_LEASE = """
+local now, timeout, max_attempts = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[4])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+  redis.call('ZREM', KEYS[2], id)
+  redis.call('HDEL', KEYS[6], id)
+  if tonumber(redis.call('HGET', KEYS[5], id) or '0') >= max_attempts then
+    redis.call('HSET', KEYS[7], id, 'Lease expired on the last attempt (worker crashed or hung).')
+    redis.call('ZADD', KEYS[9], now, id)
+  else
+    redis.call('ZADD', KEYS[1], -tonumber(redis.call('HGET', KEYS[4], id) or '0'), id)
+  end
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then return false end
+local id = popped[1]
+redis.call('ZADD', KEYS[2], now + timeout, id)
+redis.call('HSET', KEYS[6], id, ARGV[3])
+local attempts = redis.call('HINCRBY', KEYS[5], id, 1)
+return {id, redis.call('HGET', KEYS[3], id), attempts}
+"""
+_REDIS_FINISH = """
+if redis.call('HGET', KEYS[6], ARGV[1]) ~= ARGV[2] then return 0 end
+if ARGV[3] == 'extend' then
+  redis.call('ZADD', KEYS[2], 'XX', tonumber(ARGV[4]), ARGV[1])
+  return 1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[6], ARGV[1])
+if ARGV[3] == 'done' then
+  redis.call('HSET', KEYS[8], ARGV[1], ARGV[4])
+  redis.call('ZADD', KEYS[9], tonumber(ARGV[5]), ARGV[1])
+elseif ARGV[3] == 'release' then
+  redis.call('HINCRBY', KEYS[5], ARGV[1], -1)
+  redis.call('ZADD', KEYS[1], -tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0'), ARGV[1])
+elseif ARGV[3] == 'ready' then
+  redis.call('ZADD', KEYS[1], -tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0'), ARGV[1])
+else
+  redis.call('HSET', KEYS[7], ARGV[1], ARGV[4])
+  redis.call('ZADD', KEYS[9], tonumber(ARGV[5]), ARGV[1])
+end
+return 1
+"""
+
+
+class RedisWorkQueue:
+    """
+    The same queue on a Redis-compatible server (Redis, Valkey, KeyDB, ...), for workers spread
+    across machines. Needs the optional 'redis' package. Lease semantics match SQLiteWorkQueue,
+    which stands in for it on a single machine.
+    """
+
+    def __init__(self, url: str = None, prefix: str = "jobq", max_attempts: int = DEFAULT_MAX_ATTEMPTS, client=None):
+        """`client` is an existing redis.Redis-compatible client (decode_responses=True) to use instead of `url`."""
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("The Redis work queue needs the 'redis' package (pip install redis); "
+                                  "use a sqlite:/// queue URL for a local queue.")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.max_attempts = max_attempts
+        self._redis = client
+        self._keys = [f"{prefix}:{name}" for name in
+                      ("ready", "leased", "payload", "priority", "attempts", "token", "dead", "result", "finished")]
+        self._enqueue_script = self._redis.register_script(_REDIS_ENQUEUE)
+        self._lease_script = self._redis.register_script(_REDIS_LEASE)
+        self._finish_script = self._redis.register_script(_REDIS_FINISH)
+
+    def enqueue(self, job_id: str, payload: dict, priority: float = 0.0) -> bool:
+        return self._enqueue_script(keys=self._keys, args=[job_id, json.dumps(payload), priority]) == 1
+
+    def enqueue_many(self, jobs) -> int:
+        return sum(self.enqueue(job_id, payload, priority) for job_id, payload, priority in jobs)
+
+    def lease(self, worker: str = None, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> Lease:
+        token = uuid.uuid4().hex
+        leased = self._lease_script(keys=self._keys, args=[time.time(), visibility_timeout, token, self.max_attempts])
+        if not leased:
+            return None
+        job_id, payload, attempts = leased
+        return Lease(job_id, json.loads(payload), int(attempts), token)
+
+    def _finish(self, lease: Lease, action: str, value) -> bool:
+        return self._finish_script(keys=self._keys, args=[lease.job_id, lease.token, action, value, time.time()]) == 1
+
+    def extend(self, lease: Lease, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> bool:
+        return self._finish(lease, "extend", time.time() + visibility_timeout)
+
+    def ack(self, lease: Lease, result: dict = None) -> bool:
+        return self._finish(lease, "done", json.dumps(result))
+
+    def nack(self, lease: Lease, error: str, retry: bool = True) -> bool:
+        return self._finish(lease, "ready" if retry and lease.attempts < self.max_attempts else "dead", error)
+
+    def release(self, lease: Lease) -> bool:
+        return self._finish(lease, "release", "")
+
+    def stats(self) -> dict:
+        ready, leased, _, _, _, _, dead, result, _ = self._keys
+        expired = self._redis.zcount(leased, "-inf", time.time())
+        return {"ready": self._redis.zcard(ready), "leased": self._redis.zcard(leased) - expired, "expired": expired,
+                "done": self._redis.hlen(result), "dead": self._redis.hlen(dead)}
+
+    def results(self) -> list[dict]:
+        dead, results = self._redis.hgetall(self._keys[6]), self._redis.hgetall(self._keys[7])
+        finished = self._redis.zrange(self._keys[8], 0, -1) # Oldest first, like SQLiteWorkQueue
+        return [json.loads(results[job_id]) if job_id in results else {"id": job_id, "status": "error", "error": dead[job_id]}
+                for job_id in finished if job_id in results or job_id in dead]
+
+    def close(self):
+        self._redis.close()
+
+
+def open_work_queue(url: str = None):
+    """
+    Opens the queue named by `url` (default: WORK_QUEUE_URL, else the local SQLite file):
+    "sqlite:///path/to/queue.sqlite" (or a plain path) or "redis://host:port/db".
+    """
+    url = url or os.getenv("WORK_QUEUE_URL") or DEFAULT_WORK_QUEUE_PATH
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue(url)
+    return SQLiteWorkQueue(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url)
+
+
+def check_queue(queue, timeout: float = 0.3) -> list[str]:
+    """
+    Runs the lease / ack / expiry contract against an empty queue and returns the checks that
+    failed (an empty list means the backend behaves like the others). `timeout` is the short
+    visibility timeout used to exercise lease expiry. The queue's max_attempts must be 2.
+    """
+    failures = []
+
+    def expect(condition: bool, label: str):
+        if not condition:
+            failures.append(label)
+
+    expect(queue.enqueue("low", {"n": 1}, 1.0), "enqueue adds a new job")
+    expect(queue.enqueue_many([("high", {"n": 2}, 5.0), ("low", {"n": 3}, 9.0)]) == 1, "enqueue_many skips known IDs")
+    first = queue.lease("w1", timeout)
+    expect(first is not None and first.job_id == "high" and first.payload == {"n": 2} and first.attempts == 1,
+           "lease hands out the highest priority first")
+    expect(queue.extend(first, timeout), "extend succeeds while the lease is held")
+    expect(queue.ack(first, {"id": "high", "status": "ok"}), "ack succeeds while the lease is held")
+    expect(not queue.ack(first, {"id": "high"}), "a second ack is refused")
+
+    second = queue.lease("w1", timeout)
+    expect(second is not None and second.job_id == "low", "the next lease gets the remaining job")
+    expect(queue.lease("w2", timeout) is None, "a leased job is not handed out twice")
+    time.sleep(timeout * 1.5)
+    taken_over = queue.lease("w2", timeout)
+    expect(taken_over is not None and taken_over.job_id == "low" and taken_over.attempts == 2,
+           "an expired lease is handed to another worker")
+    expect(not queue.extend(second, timeout) and not queue.ack(second, {"id": "low"}),
+           "the worker that lost its lease can neither extend nor ack")
+    expect(queue.release(taken_over), "release gives the job back")
+    released = queue.lease("w2", timeout)
+    expect(released is not None and released.attempts == 2, "release does not count the attempt")
+    expect(queue.nack(released, "boom"), "nack succeeds while the lease is held")
+    expect(queue.lease("w2", timeout) is None, "a job nacked on its last attempt is dead")
+
+    stats = queue.stats()
+    expect(stats == {"ready": 0, "leased": 0, "expired": 0, "done": 1, "dead": 1}, f"stats count done and dead jobs: {stats}")
+    results = queue.results()
+    expect(results == [{"id": "high", "status": "ok"}, {"id": "low", "status": "error", "error": "boom"}],
+           f"results return acked records and dead jobs' errors, oldest first: {results}")
+    return failures
+
+
+if __name__ == "__main__":
+    # The same contract checks against the local SQLite queue and, through fakeredis (pip install
+    # "fakeredis[lua]"), against the Redis queue's Lua scripts without a Redis server.
+    import tempfile
+
+    backends = [("sqlite", lambda: SQLiteWorkQueue(os.path.join(tempfile.mkdtemp(prefix="work-queue-check-"), "queue.sqlite"),
+                                                   max_attempts=2))]
+    try:
+        import fakeredis
+        backends.append(("redis (fakeredis)", lambda: RedisWorkQueue(client=fakeredis.FakeRedis(decode_responses=True),
+                                                                     prefix="check", max_attempts=2)))
+    except ImportError:
+        print("redis (fakeredis): skipped, fakeredis is not installed")
+    for label, open_queue in backends:
+        queue = open_queue()
+        try:
+            failures = check_queue(queue)
+        finally:
+            queue.close()
+        print(f"{label}: " + ("all checks passed" if not failures else "FAILED\n  " + "\n  ".join(failures)))
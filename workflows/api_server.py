@@ -0,0 +1,236 @@
+# ai-job-application-manager/workflows/api_server.py
+import os
+import json
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from dotenv import load_dotenv
+
+from tools.resume_parser_tool import load_resume_text
+from tools.compatibility_analyzer_tool import analyze_resume_jd_match
+from tools.cover_letter_tool import draft_cover_letter, build_cover_letter_prompt
+from tools.resume_tuner_tool import suggest_resume_improvements, build_resume_suggestions_prompt
+from workflows.batch_runner import DEFAULT_RESUME_PATH
+from utils.llm_gateway import fit_prompt, completion as gateway_completion
+from utils.context_cache import prompt_messages
+
+LLM_MODEL_ID = "gemini/gemini-1.5-flash-latest"
+RESUME_DIR = "data" # resume_path must point inside this directory
+_STREAM_DONE = object()
+
+
+class JobManagerService:
+    """
+    Shared state for the HTTP service: one process keeps the tools, the litellm client and the
+    resume cache warm for every request. At most `max_in_flight` requests run at once (extra
+    ones get 429 immediately rather than queueing), and each request is bounded by
+    `request_timeout` seconds (504 on expiry). A timed-out call cannot be stopped, so its
+    worker thread keeps a slot until it actually finishes.
+    """
+
+    def __init__(self, max_in_flight: int = 8, request_timeout: float = 120.0):
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.in_flight = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm")
+        self._resume_cache = {} # path -> (mtime_ns, text)
+
+    def resume_text_for(self, payload: dict) -> str:
+        """
+        Uses payload['resume_text'] if given, else loads payload['resume_path'] (cached until the
+        file changes), which must lie inside RESUME_DIR.
+        """
+        if payload.get("resume_text"):
+            return payload["resume_text"]
+        path = payload.get("resume_path") or DEFAULT_RESUME_PATH
+        if not os.path.realpath(path).startswith(os.path.realpath(RESUME_DIR) + os.sep):
+            raise web.HTTPBadRequest(text=json.dumps({"error": f"resume_path must be a file inside {RESUME_DIR}/."}),
+                                     content_type="application/json")
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            raise web.HTTPBadRequest(text=json.dumps({"error": f"Resume file not found: {path}"}), content_type="application/json")
+        cached = self._resume_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        text = load_resume_text(path)
+        if text.startswith("Error"):
+            raise web.HTTPBadRequest(text=json.dumps({"error": text}), content_type="application/json")
+        self._resume_cache[path] = (mtime_ns, text)
+        return text
+
+    def _hold_slot_until_done(self, future):
+        """Keeps a request slot for a timed-out call that is still running in its thread."""
+        if future.cancel(): # Never started: nothing left to wait for
+            return
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+
+    def _release_slot(self):
+        self.in_flight -= 1
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        future = self.executor.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self._hold_slot_until_done(future)
+            raise
+
+    async def stream_completion(self, request: web.Request, prompt: str) -> web.StreamResponse:
+        """Streams an LLM generation to the client chunk by chunk as plain text."""
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            stream = None
+            try:
+                stream = gateway_completion(model=LLM_MODEL_ID, messages=prompt_messages(prompt), stream=True)
+                for chunk in stream:
+                    if cancelled.is_set(): # The request timed out: stop reading the stream
+                        break
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        loop.call_soon_threadsafe(chunks.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, f"\n[Error during generation: {type(e).__name__} - {str(e)}]")
+            finally:
+                if stream is not None:
+                    stream.close() # Settles the rate limiter with what was actually streamed
+                loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_DONE)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+        await response.prepare(request)
+        producer = self.executor.submit(produce)
+        deadline = loop.time() + self.request_timeout
+        while True:
+            try:
+                text = await asyncio.wait_for(chunks.get(), timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                cancelled.set()
+                self._hold_slot_until_done(producer)
+                await response.write(b"\n[Error: request timed out]")
+                break
+            if text is _STREAM_DONE:
+                break
+            await response.write(text.encode("utf-8"))
+        await response.write_eof()
+        return response
+
+
+@web.middleware
+async def limits_middleware(request: web.Request, handler):
+    service = request.app["service"]
+    if request.path == "/health":
+        return await handler(request)
+    if service.in_flight >= service.max_in_flight:
+        return web.json_response({"error": "Too many requests in flight; retry shortly."}, status=429,
+                                 headers={"Retry-After": "1"})
+    service.in_flight += 1
+    try:
+        return await handler(request)
+    except asyncio.TimeoutError:
+        return web.json_response({"error": f"Request exceeded {service.request_timeout}s timeout."}, status=504)
+    finally:
+        service.in_flight -= 1
+
+
+async def _payload(request: web.Request, *required: str) -> dict:
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": "Request body must be JSON."}), content_type="application/json")
+    if not isinstance(payload, dict):
+        raise web.HTTPBadRequest(text=json.dumps({"error": "Request body must be a JSON object."}), content_type="application/json")
+    missing = [field for field in required if not payload.get(field)]
+    if missing:
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"Missing field(s): {', '.join(missing)}"}), content_type="application/json")
+    return payload
+
+
+async def health(request: web.Request):
+    service = request.app["service"]
+    return web.json_response({"status": "ok", "in_flight": service.in_flight, "max_in_flight": service.max_in_flight})
+
+
+async def analyze(request: web.Request):
+    service = request.app["service"]
+    payload = await _payload(request, "job_description_text")
+    resume_text = service.resume_text_for(payload)
+    result = await service.run_blocking(analyze_resume_jd_match, resume_text, payload["job_description_text"])
+    return web.json_response(result, status=502 if result.get("error") else 200)
+
+
+async def draft(request: web.Request):
+    service = request.app["service"]
+    payload = await _payload(request, "job_description_text", "company_name", "job_title")
+    resume_text = service.resume_text_for(payload)
+    args = (resume_text, payload["job_description_text"], payload["company_name"], payload["job_title"],
+            payload.get("candidate_name") or "Abhay Padmanabhan", payload.get("compatibility_analysis"))
+    if payload.get("stream"):
+        prompt, _, _ = fit_prompt(lambda resume, jd: build_cover_letter_prompt(resume, jd, *args[2:]), *args[:2])
+        return await service.stream_completion(request, prompt)
+    letter = await service.run_blocking(draft_cover_letter, *args)
+    return web.json_response({"cover_letter": letter} if not letter.startswith("Error") else {"error": letter},
+                             status=502 if letter.startswith("Error") else 200)
+
+
+async def suggest(request: web.Request):
+    service = request.app["service"]
+    payload = await _payload(request, "job_description_text")
+    resume_text = service.resume_text_for(payload)
+    args = (resume_text, payload["job_description_text"], payload.get("compatibility_analysis") or {})
+    if payload.get("stream"):
+        prompt, _, _ = fit_prompt(lambda resume, jd: build_resume_suggestions_prompt(resume, jd, *args[2:]), *args[:2])
+        return await service.stream_completion(request, prompt)
+    suggestions = await service.run_blocking(suggest_resume_improvements, *args)
+    return web.json_response({"resume_suggestions": suggestions} if not suggestions.startswith("Error") else {"error": suggestions},
+                             status=502 if suggestions.startswith("Error") else 200)
+
+
+def create_app(max_in_flight: int = 8, request_timeout: float = 120.0) -> web.Application:
+    """
+    Builds the aiohttp application:
+      GET  /health   -> service status
+      POST /analyze  -> {"job_description_text", "resume_text" | "resume_path"}
+      POST /draft    -> adds "company_name", "job_title", optional "compatibility_analysis" and "stream"
+      POST /suggest  -> adds optional "compatibility_analysis" and "stream"
+    With "stream": true, /draft and /suggest stream the generation back as plain text.
+    """
+    app = web.Application(middlewares=[limits_middleware])
+    service = JobManagerService(max_in_flight=max_in_flight, request_timeout=request_timeout)
+    app["service"] = service
+    app.router.add_get("/health", health)
+    app.router.add_post("/analyze", analyze)
+    app.router.add_post("/draft", draft)
+    app.router.add_post("/suggest", suggest)
+
+    async def shutdown(app):
+        service.executor.shutdown(wait=False, cancel_futures=True)
+    app.on_shutdown.append(shutdown)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the job application tools over HTTP for concurrent users.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Concurrent requests before answering 429 (default: 8).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds (default: 120).")
+    parser.add_argument("--stub-llm", action="store_true", help="Answer with a local stub instead of calling Gemini (for testing).")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Simulated LLM latency in seconds when using --stub-llm.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.stub_llm:
+        from utils.llm_stub import install_stub
+        install_stub(latency=args.stub_latency)
+        print("[api_server] Using the local LLM stub; no requests will reach Gemini.")
+    elif not os.getenv("GEMINI_API_KEY"):
+        print("Warning: GEMINI_API_KEY not found in .env.")
+
+    web.run_app(create_app(args.max_in_flight, args.timeout), host=args.host, port=args.port)
@@ -1,5 +1,9 @@
 # ai-job-application-manager/workflows/apply_and_log.py
+import time
+_STARTED = time.perf_counter() # Before the heavy imports below, so --profile can report startup time
 import os
+import json
+import argparse
 from dotenv import load_dotenv
 
 from smolagents import LiteLLMModel
@@ -7,17 +11,148 @@ from agents.manager_agent import ManagerAgent
 
 # Import tool functions from their respective files
 from tools.file_tools import create_file
+from tools.artifact_tools import save_job_document, list_job_documents, get_job_document
+from utils.artifact_store import get_artifact_store
 from tools.web_scraping_tools import scrape_job_board
+from tools.board_poller_tool import poll_job_board
+from tools.parallel_scraper_tool import scrape_job_boards
 from tools.notion_tools import append_text_to_notion_page
 from tools.resume_parser_tool import load_resume_text
 from tools.jd_input_tool import load_text_from_file
-from tools.compatibility_analyzer_tool import analyze_resume_jd_match
+from tools.compatibility_analyzer_tool import analyze_resume_jd_match, analyze_resume_jd_matrix
 from tools.cover_letter_tool import draft_cover_letter
+from tools.cover_letter_sections_tool import draft_cover_letter_sections, revise_cover_letter_section
 from tools.resume_tuner_tool import suggest_resume_improvements
+from tools.job_index_tool import index_job_postings, index_resume_sections, find_similar_jobs
+from workflows.batch_runner import run_batch, DEFAULT_RESUME_PATH
+from utils.run_journal import DEFAULT_JOURNAL_PATH
+from utils.llm_budget import LLMBudget
+from utils.cassette import Cassette, install_cassette, uninstall_cassette
+from utils.processed_index import get_processed_index
+from utils.work_queue import open_work_queue, DEFAULT_VISIBILITY_TIMEOUT_S
+from workflows.worker import enqueue_manifest, run_workers
+from utils.profiler import SessionProfiler, DEFAULT_PROFILE_DIR, DEFAULT_TOP_N
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Job Application Manager")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                        help="Run unattended over a manifest of JD files / board URLs instead of the interactive prompt.")
+    parser.add_argument("--output", metavar="FILE",
+                        help="Batch mode: append JSONL results here (default: stdout). Rerunning skips jobs already done. "
+                             "With --work: write every result on the queue here once the workers finish.")
+    parser.add_argument("--workers", type=int, default=4, help="Batch mode: number of jobs processed concurrently; with --work, worker processes (default: 4).")
+    parser.add_argument("--resume", default=DEFAULT_RESUME_PATH, help=f"Batch and worker mode: resume file (default: {DEFAULT_RESUME_PATH}).")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH,
+                        help=f"Batch mode: per-stage checkpoint journal (default: {DEFAULT_JOURNAL_PATH}).")
+    parser.add_argument("--no-journal", action="store_true", help="Batch mode: do not read or write stage checkpoints.")
+    parser.add_argument("--cluster-suggestions", action="store_true",
+                        help="Batch mode: generate resume suggestions once per group of similar JDs, plus short per-job deltas.")
+    parser.add_argument("--reprocess", action="store_true",
+                        help="Batch mode: also run jobs already processed (completed earlier or logged to Notion).")
+    parser.add_argument("--run-token-budget", type=int, help="Batch and worker mode: stop starting jobs once this run would exceed N LLM tokens.")
+    parser.add_argument("--run-cost-budget", type=float, help="Batch and worker mode: same, as a USD limit for this run.")
+    parser.add_argument("--daily-token-budget", type=int, help="Batch and worker mode: LLM token limit shared by all runs on the same day.")
+    parser.add_argument("--daily-cost-budget", type=float, help="Batch and worker mode: USD limit shared by all runs on the same day.")
+    parser.add_argument("--task", help="Run this one task non-interactively and exit (e.g. to replay a recorded session).")
+    parser.add_argument("--cassette", metavar="FILE", help="Record or replay LLM and Notion calls with this cassette file.")
+    parser.add_argument("--cassette-mode", choices=["record", "replay", "auto"], default="replay",
+                        help="record: call live and save; replay: answer offline from the cassette; auto: replay, record misses (default: replay).")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="Replay timing as a fraction of the recorded latency (0 = instant, 1 = as recorded).")
+    parser.add_argument("--compress-drafts", type=float, metavar="DAYS",
+                        help="Gzip stored drafts older than DAYS (each job's latest draft is kept as-is) and exit.")
+    parser.add_argument("--rebuild-processed-index", action="store_true",
+                        help="Rebuild the local processed-jobs index from the Notion log page (NOTION_PAGE_ID_FOR_LOGGING) and exit.")
+    parser.add_argument("--enqueue", metavar="MANIFEST",
+                        help="Worker mode: put the manifest's jobs on the durable work queue for --work processes, then exit.")
+    parser.add_argument("--work", action="store_true",
+                        help="Worker mode: run --workers worker processes that lease jobs from the work queue until it is drained.")
+    parser.add_argument("--queue", metavar="URL",
+                        help="Worker mode: sqlite:///path or redis://host:port/db (default: WORK_QUEUE_URL, else data/work_queue.sqlite).")
+    parser.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT_S,
+                        help=f"Worker mode: seconds before a crashed worker's job is handed out again (default: {DEFAULT_VISIBILITY_TIMEOUT_S}).")
+    parser.add_argument("--keep-polling", action="store_true", help="Worker mode: keep waiting for new jobs instead of exiting when the queue is empty.")
+    parser.add_argument("--no-notion-log", action="store_true", help="Worker mode: do not log completed jobs to NOTION_PAGE_ID_FOR_LOGGING.")
+    parser.add_argument("--queue-status", action="store_true", help="Print the work queue's job counts and exit.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the agent session(s): CPU profile, wall-clock by category (network wait vs local CPU), "
+                             "peak memory; writes a flamegraph-compatible .collapsed file and a top-N summary.")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR, help=f"Where --profile writes its files (default: {DEFAULT_PROFILE_DIR}).")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP_N, help=f"Rows per table in the --profile summary (default: {DEFAULT_TOP_N}).")
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args()
     load_dotenv() 
 
+    if not args.cassette:
+        return run(args)
+    if args.work:
+        raise SystemExit("--cassette cannot be combined with --work: each worker process would need its own cassette.")
+    cassette = Cassette(args.cassette, mode=args.cassette_mode, latency_scale=args.replay_latency)
+    originals = install_cassette(cassette)
+    try:
+        return run(args)
+    finally:
+        uninstall_cassette(cassette, originals)
+
+def run(args):
+    if args.compress_drafts is not None:
+        print(f"Compressed {get_artifact_store().compress_old(args.compress_drafts)} stored draft(s).")
+        return
+
+    if args.rebuild_processed_index:
+        page_id = os.getenv("NOTION_PAGE_ID_FOR_LOGGING")
+        if not page_id or not os.getenv("NOTION_API_KEY"):
+            raise SystemExit("NOTION_API_KEY and NOTION_PAGE_ID_FOR_LOGGING must be set to rebuild the processed-jobs index.")
+        result = get_processed_index().rebuild_from_notion(page_id)
+        print(f"Rebuilt the processed-jobs index from {result['blocks']} Notion block(s): {result['fingerprints']} fingerprint(s).")
+        return
+
+    if args.queue_status:
+        queue = open_work_queue(args.queue)
+        try:
+            print(f"Work queue: {queue.stats()}")
+        finally:
+            queue.close()
+        return
+
+    if args.enqueue or args.work:
+        if args.enqueue:
+            enqueue_manifest(args.enqueue, queue_url=args.queue, resume_path=args.resume, skip_processed=not args.reprocess)
+        if args.work:
+            run_workers(args.workers, queue_url=args.queue, resume_path=args.resume, visibility_timeout=args.visibility_timeout,
+                        log_to_notion=not args.no_notion_log, keep_polling=args.keep_polling,
+                        budget_limits=(args.run_token_budget, args.run_cost_budget, args.daily_token_budget, args.daily_cost_budget))
+            if args.output:
+                queue = open_work_queue(args.queue)
+                try:
+                    results = queue.results()
+                finally:
+                    queue.close()
+                written = set()
+                if os.path.exists(args.output): # Earlier results stay; only jobs not in the file yet are added
+                    with open(args.output, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                written.add(json.loads(line).get("id"))
+                            except (json.JSONDecodeError, AttributeError):
+                                continue
+                new_results = [record for record in results if record.get("id") not in written]
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(record) + "\n" for record in new_results)
+                print(f"Appended {len(new_results)} new result(s) to {args.output} "
+                      f"({len(results) - len(new_results)} already in it).")
+        return
+
+    if args.batch:
+        limits = (args.run_token_budget, args.run_cost_budget, args.daily_token_budget, args.daily_cost_budget)
+        budget = LLMBudget(*limits) if any(limit is not None for limit in limits) else None
+        run_batch(args.batch, output_path=args.output, resume_path=args.resume, workers=args.workers,
+                  journal_path=None if args.no_journal else args.journal, budget=budget, skip_processed=not args.reprocess,
+                  cluster_suggestions=args.cluster_suggestions)
+        return
+
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     notion_api_key = os.getenv("NOTION_API_KEY") 
     notion_page_id_for_logging = os.getenv("NOTION_PAGE_ID_FOR_LOGGING")
@@ -32,13 +167,24 @@ def main():
 
     available_tools = [
         create_file,
+        save_job_document,
+        list_job_documents,
+        get_job_document,
         scrape_job_board,
+        poll_job_board,
+        scrape_job_boards,
         append_text_to_notion_page,
         load_resume_text,
         load_text_from_file,
         analyze_resume_jd_match,
+        analyze_resume_jd_matrix,
         draft_cover_letter,
+        draft_cover_letter_sections,
+        revise_cover_letter_section,
         suggest_resume_improvements, # <<< --- ADD THE NEW TOOL HERE
+        index_job_postings,
+        index_resume_sections,
+        find_similar_jobs,
     ]
 
     manager = ManagerAgent(
@@ -56,13 +202,31 @@ def main():
     # Update example task if needed
     print("-" * 50)
 
-    while True:
-        user_task = input("\nEnter your task: ")
-        if user_task.lower() in ['exit', 'quit']:
-            print("Exiting Job Application Manager.")
-            break
+    profiler = SessionProfiler(output_dir=args.profile_dir, top_n=args.profile_top) if args.profile else None
+    startup_s = time.perf_counter() - _STARTED
+
+    def run_task(task):
+        if profiler is None:
+            return manager.run_task(task)
+        with profiler.session(): # Only the task itself; time spent at the input prompt is not profiled
+            return manager.run_task(task)
+
+    try:
+        if args.task:
+            return run_task(args.task)
+
+        while True:
+            user_task = input("\nEnter your task: ")
+            if user_task.lower() in ['exit', 'quit']:
+                print("Exiting Job Application Manager.")
+                break
 
-        manager.run_task(user_task)
+            run_task(user_task)
+    finally:
+        if profiler is not None and profiler.sessions:
+            report = profiler.report(startup_s=startup_s)
+            print("-" * 50)
+            print(report["summary"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
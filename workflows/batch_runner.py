@@ -0,0 +1,348 @@
+# ai-job-application-manager/workflows/batch_runner.py
+import os
+import re
+import sys
+import json
+import time
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from tools.resume_parser_tool import load_resume_text
+from tools.jd_input_tool import load_text_from_file
+from tools.web_scraping_tools import fetch_job_board
+from tools.compatibility_analyzer_tool import analyze_resume_jd_match
+from tools.cover_letter_tool import draft_cover_letter
+from tools.cover_letter_sections_tool import draft_sectioned_cover_letter
+from tools.resume_tuner_tool import suggest_resume_improvements, ClusteredSuggestions
+from tools.job_index_tool import job_key
+from utils.run_journal import RunJournal
+from utils.artifact_store import ArtifactStore, get_artifact_store
+from utils.llm_budget import LLMBudget, install_budget_meter
+from utils.processed_index import get_processed_index
+from utils.context_cache import prefix_cache_stats
+from utils.llm_gateway import track_usage
+from utils.job_stats import get_job_stats
+from workflows.job_queue import JobPriorityQueue, estimate_job_usage
+
+DEFAULT_RESUME_PATH = "data/abhay_padmanabhan.txt"
+UNKNOWN_COMPANY = "the company"          # Placeholders for JD files that name neither; they read
+UNKNOWN_TITLE = "the advertised position" # naturally in a cover letter but identify no job
+
+
+def _guess_field(text: str, label: str, default: str) -> str:
+    """Pulls e.g. 'Company: Innovatech' out of a free-text JD; falls back to default."""
+    match = re.search(rf"^\s*{label}\s*:\s*(.+)$", text or "", re.IGNORECASE | re.MULTILINE)
+    return match.group(1).strip() if match else default
+
+
+def read_manifest(manifest_path: str) -> list[dict]:
+    """
+    Reads a batch manifest. Each non-empty line (lines starting with '#' are comments) is either:
+      - a path to a JD text file, or an http(s):// / file:// job board URL, or
+      - a JSON object with "jd_path" or "url", and optionally "id", "company", "title",
+        "date_posted" and "valid_through" (ISO dates, used to prioritize the job).
+    Returns the raw entries as dictionaries.
+    """
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    entries.append({"error": f"Manifest line {line_no} is not valid JSON: {e}", "id": f"manifest:{line_no}"})
+            elif re.match(r"^(https?|file)://", line):
+                entries.append({"url": line})
+            else:
+                entries.append({"jd_path": line})
+    return entries
+
+
+def expand_manifest(entries: list[dict]) -> list[dict]:
+    """
+    Turns manifest entries into concrete jobs ({"id", "source", "company", "title", "jd_text"},
+    plus "url" for scraped postings and "date_posted" / "valid_through" when known).
+    JD files become one job each; board URLs are scraped and expand into one job per posting.
+    Entries that cannot be loaded become jobs carrying an "error" so they are still reported.
+    """
+    jobs = []
+    for entry in entries:
+        if entry.get("error"):
+            jobs.append(entry)
+        elif entry.get("jd_path"):
+            path = entry["jd_path"]
+            jd_text = load_text_from_file(path)
+            job = {
+                "id": entry.get("id") or f"file:{path}",
+                "source": path,
+                "company": entry.get("company") or _guess_field(jd_text, "Company", UNKNOWN_COMPANY),
+                "title": entry.get("title") or _guess_field(jd_text, "Job Title", UNKNOWN_TITLE),
+                "jd_text": jd_text,
+                "date_posted": entry.get("date_posted"),
+                "valid_through": entry.get("valid_through"),
+            }
+            if jd_text.startswith("Error"):
+                job["error"] = jd_text
+            jobs.append(job)
+        elif entry.get("url"):
+            scraped = fetch_job_board(entry["url"])
+            for error in scraped.errors:
+                jobs.append({"id": entry.get("id") or entry["url"], "source": entry["url"], "error": error["error"]})
+            for posting in scraped:
+                jobs.append({
+                    "id": job_key(posting),
+                    "source": entry["url"],
+                    "url": posting.url,
+                    "company": posting.company,
+                    "title": posting.title,
+                    "jd_text": posting.description or "",
+                    "date_posted": posting.date_posted,
+                    "valid_through": posting.valid_through,
+                })
+        else:
+            jobs.append({"id": json.dumps(entry, sort_keys=True), "error": "Manifest entry has neither 'jd_path' nor 'url'."})
+    return jobs
+
+
+def _analysis_ok(analysis) -> bool:
+    return isinstance(analysis, dict) and not analysis.get("error")
+
+
+def _text_ok(text) -> bool:
+    return isinstance(text, str) and not text.startswith("Error")
+
+
+def process_job(job: dict, resume_text: str, journal: RunJournal = None, store: ArtifactStore = None,
+                suggester: ClusteredSuggestions = None) -> dict:
+    """
+    Runs analysis -> cover letter -> resume suggestions for one job and returns its result record.
+    With a journal, each stage is checkpointed and stages already completed for the same inputs
+    are reused instead of calling the LLM again. With a store, the finished cover letter and
+    suggestions are saved as the job's artifacts and their content hashes added to the record, and
+    the letter is kept section by section, so a rerun after the JD changes only rewrites the
+    sections that depend on it.
+    With a suggester, resume suggestions come from the job's cluster plus a posting-specific delta.
+    The record's llm_usage holds the LLM calls, tokens and estimated cost spent on this job.
+    """
+    record = {key: job.get(key) for key in ("id", "source", "company", "title", "url")}
+    record.update({key: job[key] for key in ("pre_score", "value") if key in job})
+    started = time.perf_counter()
+    if job.get("error"):
+        record.update(status="error", error=job["error"])
+        return record
+
+    with track_usage() as usage:
+        def run_stage(stage, fn, succeeded, **inputs):
+            if journal is None:
+                return fn(**inputs)
+            return journal.run_stage(job["id"], stage, inputs, fn, succeeded)
+
+        analysis = run_stage("analyze", analyze_resume_jd_match, _analysis_ok,
+                             resume_text=resume_text, job_description_text=job["jd_text"])
+        record["analysis"] = analysis
+        if not _analysis_ok(analysis):
+            error = analysis.get("error") if isinstance(analysis, dict) else f"Unexpected analysis result: {analysis!r}"
+            record.update(status="error", stage="analyze", error=error)
+        else:
+            draft_inputs = dict(resume_text=resume_text, job_description_text=job["jd_text"], company_name=job["company"],
+                                job_title=job["title"], compatibility_analysis=analysis)
+            if store is None:
+                letter = run_stage("draft", draft_cover_letter, _text_ok, **draft_inputs)
+            else:
+                # The sectioned draft is saved under the job's ID, so it is part of the stage's inputs
+                letter = run_stage("draft", lambda job_id, **inputs: draft_sectioned_cover_letter(job_id, store=store, **inputs),
+                                   _text_ok, job_id=job["id"], **draft_inputs)
+            record["cover_letter"] = letter
+            if not _text_ok(letter):
+                record.update(status="error", stage="draft", error=letter)
+            else:
+                if suggester is None:
+                    suggestions = run_stage("suggest", suggest_resume_improvements, _text_ok,
+                                            resume_text=resume_text, job_description_text=job["jd_text"],
+                                            compatibility_analysis=analysis)
+                else:
+                    suggestions = run_stage("suggest_clustered",
+                                            lambda job_id, resume_text, job_description_text, compatibility_analysis:
+                                                suggester.suggest(job_id, job_description_text, compatibility_analysis),
+                                            _text_ok, job_id=job["id"], resume_text=resume_text,
+                                            job_description_text=job["jd_text"], compatibility_analysis=analysis)
+                record["resume_suggestions"] = suggestions
+                if not _text_ok(suggestions):
+                    record.update(status="error", stage="suggest", error=suggestions)
+                else:
+                    record["status"] = "ok"
+                    if store is not None:
+                        record["artifacts"] = {kind: store.put(job["id"], kind, text)["hash"]
+                                               for kind, text in (("cover_letter", letter), ("resume_suggestions", suggestions))}
+    record["llm_usage"] = dict(usage, cost_usd=round(usage["cost_usd"], 6))
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def completed_job_ids(output_path: str) -> set:
+    """IDs already written with status 'ok' to an existing output file, so a rerun can skip them."""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue # A line truncated by a crash; that job will simply be redone
+            if record.get("status") == "ok":
+                done.add(record.get("id"))
+    return done
+
+
+def _identity(job: dict) -> dict:
+    """What the processed-jobs index matches a job on; placeholder company/title names are left out."""
+    return {"url": job.get("url"),
+            "company": None if job.get("company") == UNKNOWN_COMPANY else job.get("company"),
+            "title": None if job.get("title") == UNKNOWN_TITLE else job.get("title")}
+
+
+def _error_record(job: dict, error: str, status: str = "error") -> dict:
+    record = {key: job.get(key) for key in ("id", "source", "company", "title", "url")}
+    record.update({key: job[key] for key in ("pre_score", "value") if key in job})
+    record.update(status=status, error=error)
+    return record
+
+
+def record_job_stats(record: dict):
+    """Adds a finished job to the dashboard's stats store (utils/job_stats.py); a failure there never fails the job."""
+    try:
+        get_job_stats().record(record)
+    except Exception as e:
+        print(f"[batch] Could not record dashboard stats for {record.get('id')}: {type(e).__name__} - {e}")
+
+
+def run_batch(manifest_path: str, output_path: str = None, resume_path: str = DEFAULT_RESUME_PATH,
+              workers: int = 4, journal_path: str = None, budget: LLMBudget = None, skip_processed: bool = True,
+              cluster_suggestions: bool = False) -> dict:
+    """
+    Processes every job in the manifest with `workers` jobs in flight, streaming one JSON line
+    per job to output_path (or stdout) as soon as it finishes. With an output file, jobs already
+    recorded as 'ok' are skipped, so an interrupted run can be resumed by running it again.
+    With a journal_path, every completed stage is checkpointed there as well, so a job that failed
+    halfway (e.g. on quota while drafting) resumes at the failed stage instead of starting over.
+
+    Every finished cover letter and resume suggestions text is also saved to the artifact store
+    (data/artifacts) under the job's ID, deduplicated by content.
+
+    Jobs are dispatched most valuable first (local pre-score weighted by posting freshness and
+    deadline, see workflows/job_queue.py). With a budget, a job is only started while the run and
+    daily LLM budgets can still cover its estimated usage; the rest are written as 'deferred' and
+    picked up by the next run, so whatever the budget allowed went to the best opportunities.
+
+    Jobs found in the processed-jobs index (utils/processed_index.py: completed by an earlier run
+    or logged to Notion) are skipped before any analysis unless skip_processed is False, and
+    every job that completes is added to it.
+
+    With cluster_suggestions, the pending JDs are grouped by requirement similarity and resume
+    suggestions are generated once per cluster, each job getting a short posting-specific delta
+    on top (see ClusteredSuggestions in tools/resume_tuner_tool.py).
+    Returns a summary dict with counts.
+    """
+    results_stream = sys.stdout
+    # Tools log with print(); keep those on stderr so stdout stays pure JSONL
+    with contextlib.redirect_stdout(sys.stderr):
+        resume_text = load_resume_text(resume_path)
+        if resume_text.startswith("Error"):
+            raise SystemExit(resume_text)
+
+        jobs = expand_manifest(read_manifest(manifest_path))
+        done_ids = completed_job_ids(output_path)
+        pending = [job for job in jobs if job.get("id") not in done_ids]
+        processed_index = get_processed_index()
+        already_processed = []
+        if skip_processed:
+            seen = [processed_index.is_processed(_identity(job)) for job in pending]
+            already_processed = [job for job, processed in zip(pending, seen) if processed]
+            pending = [job for job, processed in zip(pending, seen) if not processed]
+        queue = JobPriorityQueue(pending, resume_text)
+        suggester = None
+        if cluster_suggestions:
+            suggester = ClusteredSuggestions(resume_text, {job["id"]: job["jd_text"] for job in pending if not job.get("error")})
+        print(f"[batch] {len(jobs)} job(s) in manifest, {len(jobs) - len(pending) - len(already_processed)} already done, "
+              f"{len(already_processed)} already processed, {len(pending)} to run with {workers} worker(s).")
+
+        journal = RunJournal(journal_path) if journal_path else None
+        if journal is not None:
+            print(f"[batch] Using checkpoint journal {journal_path} ({len(journal)} completed stage(s) on record).")
+        store = get_artifact_store()
+        original_completion = None
+        if budget is not None:
+            original_completion = install_budget_meter(budget)
+            print(f"[batch] LLM budget: {budget.summary()['limits']} (spent today so far: {budget.day_spend()}).")
+        summary = {"total": len(jobs), "skipped": len(jobs) - len(pending) - len(already_processed),
+                   "already_processed": len(already_processed), "ok": 0, "error": 0, "deferred": 0}
+        write_lock = threading.Lock()
+        prefix_cache_stats.reset()
+        out = open(output_path, "a", encoding="utf-8") if output_path else results_stream
+        started = time.perf_counter()
+
+        def emit(record):
+            summary[record.get("status", "error")] += 1
+            record_job_stats(record)
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            print(f"[batch] {summary['ok'] + summary['error'] + summary['deferred']}/{len(pending)} {record.get('status')}: "
+                  f"{record.get('title')} at {record.get('company')}")
+
+        try:
+            for job in queue.rejected:
+                emit(_error_record(job, job["error"]))
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                in_flight = {} # future -> (job, reserved tokens, reserved cost)
+                while len(queue) or in_flight:
+                    # Top up the workers with the most valuable jobs the budget can still cover
+                    while len(queue) and len(in_flight) < max(1, workers):
+                        job = queue.pop()
+                        tokens, cost = estimate_job_usage(resume_text, job.get("jd_text"))
+                        if budget is not None and not budget.reserve(tokens, cost):
+                            if in_flight:
+                                # Running jobs hand back the unused part of their reservations when
+                                # they finish; try this job again after the next one completes
+                                queue.push_back(job)
+                                break
+                            # Nothing after this job is worth more; defer the rest of the queue
+                            for deferred in [job] + queue.drain():
+                                emit(_error_record(deferred, "LLM budget exhausted before this job was reached.", status="deferred"))
+                            break
+                        in_flight[pool.submit(process_job, job, resume_text, journal, store, suggester)] = (job, tokens, cost)
+                    if not in_flight:
+                        break
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        job, tokens, cost = in_flight.pop(future)
+                        if budget is not None:
+                            budget.release(tokens, cost)
+                        try:
+                            record = future.result()
+                        except Exception as e: # A tool raising instead of returning an error string
+                            record = _error_record(job, f"{type(e).__name__} - {str(e)}")
+                        if record.get("status") == "ok":
+                            processed_index.mark_processed(_identity(job), source="batch")
+                        emit(record)
+        finally:
+            if output_path:
+                out.close()
+            if journal is not None:
+                journal.close()
+            if original_completion is not None:
+                import litellm
+                litellm.completion = original_completion
+        summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+        if budget is not None:
+            summary["llm_spend"] = budget.summary()["run"]
+        if suggester is not None:
+            summary["suggestion_clusters"] = dict(suggester.stats)
+        summary["prompt_cache"] = prefix_cache_stats.summary()
+        print(f"[batch] Finished: {summary}")
+    return summary
@@ -0,0 +1,150 @@
+# ai-job-application-manager/workflows/crew_pipeline.py
+import os
+import re
+import time
+import asyncio
+import argparse
+import datetime
+from dotenv import load_dotenv
+from crewai import Crew, Task, LLM
+
+from agents.writer import create_writer
+from agents.logger import create_logger
+from agents.scheduler import create_scheduler, get_scheduler_tools
+from tools.resume_parser_tool import load_resume_text
+from tools.jd_input_tool import load_text_from_file
+from tools.compatibility_analyzer_tool import analyze_resume_jd_match
+from tools.cover_letter_tool import get_cover_letter_tools
+from tools.notion_tools import get_notion_tools
+from workflows.batch_runner import DEFAULT_RESUME_PATH
+
+CREW_LLM_MODEL = "gemini/gemini-1.5-flash-latest"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", (text or "").lower()).strip("_")[:60] or "job"
+
+
+def build_branch_crews(resume_text: str, jd_text: str, company: str, title: str, analysis: dict,
+                       notion_page_id: str = None, reminder_time: str = None, llm=None,
+                       output_dir: str = "output_documents") -> dict:
+    """
+    Builds one single-task Crew per post-analysis branch (writer, logger, scheduler).
+    The branches share no outputs: the letter's file path is decided here up front, so the
+    Notion log entry can reference it without waiting for the writer to finish.
+    """
+    letter_path = os.path.join(output_dir, f"cover_letter_{_slug(company)}_{_slug(title)}.txt")
+    reminder_time = reminder_time or (datetime.datetime.now() + datetime.timedelta(days=7)).replace(
+        hour=9, minute=0, second=0, microsecond=0).isoformat(timespec="minutes")
+    score = analysis.get("compatibility_score", "N/A")
+    crews = {}
+
+    writer = create_writer(
+        tools=get_cover_letter_tools({"resume_text": resume_text, "job_description_text": jd_text,
+                                      "compatibility_analysis": analysis}),
+        llm=llm,
+    )
+    crews["writer"] = Crew(agents=[writer], tasks=[Task(
+        description=(f"Draft a cover letter for the '{title}' position at '{company}' with the draft_cover_letter tool "
+                     f"(company_name='{company}', job_title='{title}'). Then save the letter exactly as drafted with "
+                     f"create_file to the path '{letter_path}'."),
+        expected_output=f"The path the cover letter was saved to ({letter_path}).",
+        agent=writer,
+    )])
+
+    if notion_page_id:
+        log_entry = "\n".join([
+            f"--- Application prepared: {title} at {company} ---",
+            f"Date: {datetime.date.today().isoformat()}",
+            f"Compatibility score: {score}",
+            f"Summary: {analysis.get('summary', 'N/A')}",
+            f"Cover letter: {letter_path}",
+            f"Follow-up reminder: {reminder_time}",
+        ])
+        logger = create_logger(tools=get_notion_tools({"page_id": notion_page_id}), llm=llm)
+        crews["logger"] = Crew(agents=[logger], tasks=[Task(
+            description=("Append the following log entry to the job tracker Notion page with the "
+                         "append_text_to_notion_page tool, verbatim:\n\n" + log_entry),
+            expected_output="The tool's confirmation or error message.",
+            agent=logger,
+        )])
+    else:
+        print("[crew_pipeline] No Notion page ID given; skipping the logger branch.")
+
+    scheduler = create_scheduler(tools=get_scheduler_tools(), llm=llm)
+    crews["scheduler"] = Crew(agents=[scheduler], tasks=[Task(
+        description=(f"Create a calendar reminder titled 'Follow up: {title} at {company}' starting at {reminder_time} "
+                     f"for 30 minutes, with a description noting the compatibility score of {score} and the cover letter "
+                     f"at {letter_path}."),
+        expected_output="The tool's confirmation, including where the reminder was created.",
+        agent=scheduler,
+    )])
+    return crews
+
+
+async def _timed_kickoff(name: str, crew: Crew):
+    started = time.perf_counter()
+    try:
+        # crew.kickoff() on a worker thread; unlike kickoff_async() this skips template interpolation,
+        # so braces in job text cannot break the task descriptions.
+        output = await asyncio.to_thread(crew.kickoff)
+        result = {"status": "ok", "output": str(output)}
+    except Exception as e:
+        result = {"status": "error", "error": f"{type(e).__name__} - {str(e)}"}
+    result["elapsed_s"] = round(time.perf_counter() - started, 2)
+    print(f"[crew_pipeline] Branch '{name}' finished ({result['status']}) in {result['elapsed_s']}s.")
+    return name, result
+
+
+async def run_branches(crews: dict) -> dict:
+    """Runs all branch crews concurrently; total time is bounded by the slowest branch."""
+    results = await asyncio.gather(*(_timed_kickoff(name, crew) for name, crew in crews.items()))
+    return dict(results)
+
+
+def run_crew_pipeline(jd_path: str, company: str, title: str, resume_path: str = DEFAULT_RESUME_PATH,
+                      notion_page_id: str = None, reminder_time: str = None, llm_model: str = CREW_LLM_MODEL) -> dict:
+    """
+    Analyzes the resume against the JD, then runs the writer, logger and scheduler crews in parallel.
+    Returns {"analysis": ..., "branches": {name: result}, "elapsed_s": ...} or {"error": ...}.
+    """
+    started = time.perf_counter()
+    resume_text = load_resume_text(resume_path)
+    if resume_text.startswith("Error"):
+        return {"error": resume_text}
+    jd_text = load_text_from_file(jd_path)
+    if jd_text.startswith("Error"):
+        return {"error": jd_text}
+
+    analysis = analyze_resume_jd_match(resume_text, jd_text)
+    if not isinstance(analysis, dict) or analysis.get("error"):
+        return {"error": f"Analysis failed: {analysis.get('error') if isinstance(analysis, dict) else analysis}"}
+
+    llm = LLM(model=llm_model, is_litellm=True) # Route through litellm like the rest of the project
+    crews = build_branch_crews(resume_text, jd_text, company, title, analysis,
+                               notion_page_id=notion_page_id, reminder_time=reminder_time, llm=llm)
+    branches = asyncio.run(run_branches(crews))
+    elapsed = round(time.perf_counter() - started, 2)
+    print(f"[crew_pipeline] Done in {elapsed}s (slowest branch: {max(b['elapsed_s'] for b in branches.values())}s).")
+    return {"analysis": analysis, "branches": branches, "elapsed_s": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze a JD, then write, log and schedule in parallel with CrewAI.")
+    parser.add_argument("jd_path", help="Path to the job description text file.")
+    parser.add_argument("--company", required=True)
+    parser.add_argument("--title", required=True)
+    parser.add_argument("--resume", default=DEFAULT_RESUME_PATH)
+    parser.add_argument("--reminder", default=None, help="Reminder start time (ISO); defaults to 9:00 one week from now.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("GEMINI_API_KEY"):
+        print("Warning: GEMINI_API_KEY not found in .env.")
+    result = run_crew_pipeline(args.jd_path, args.company, args.title, resume_path=args.resume,
+                               notion_page_id=os.getenv("NOTION_PAGE_ID_FOR_LOGGING"), reminder_time=args.reminder)
+    if result.get("error"):
+        print(result["error"])
+    else:
+        for name, branch in result["branches"].items():
+            print(f"\n[{name}] {branch['status']} ({branch['elapsed_s']}s): {branch.get('output') or branch.get('error')}")
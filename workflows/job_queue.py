@@ -0,0 +1,123 @@
+# ai-job-application-manager/workflows/job_queue.py
+import heapq
+import datetime
+import itertools
+
+from tools.compatibility_analyzer_tool import local_match_matrix
+from utils.llm_budget import estimate_cost
+from utils.llm_gateway import count_tokens
+
+LLM_MODEL_ID = "gemini/gemini-1.5-flash-latest"
+FRESHNESS_HALF_LIFE_DAYS = 14 # A posting this old is worth 3/4 of a brand-new one, twice as old 5/8, ...
+URGENT_DAYS = 7               # Postings closing within this many days get an urgency boost
+URGENCY_BOOST = 1.25
+# Rough per-job LLM usage: analysis, cover letter and suggestions each send resume + JD plus instructions
+STAGES_PER_JOB = 3
+PROMPT_OVERHEAD_TOKENS = 350
+COMPLETION_TOKENS_PER_STAGE = 700
+
+
+def _parse_date(value) -> datetime.date:
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def estimate_job_usage(resume_text: str, jd_text: str, model: str = LLM_MODEL_ID) -> tuple[int, float]:
+    """(tokens, USD) a job is expected to cost across all its LLM stages."""
+    prompt_tokens = count_tokens(resume_text, model) + count_tokens(jd_text or "", model) + PROMPT_OVERHEAD_TOKENS
+    tokens = STAGES_PER_JOB * (prompt_tokens + COMPLETION_TOKENS_PER_STAGE)
+    cost = STAGES_PER_JOB * estimate_cost(model, prompt_tokens, COMPLETION_TOKENS_PER_STAGE)
+    return tokens, cost
+
+
+def job_value(pre_score: float, date_posted=None, valid_through=None, today: datetime.date = None) -> float:
+    """
+    Expected value of processing a job now, from its local pre-score (0-100), how fresh the
+    posting is and how soon it closes. Returns 0.0 for postings whose deadline has passed.
+    """
+    today = today or datetime.date.today()
+    value = float(pre_score)
+    posted = _parse_date(date_posted)
+    if posted is not None:
+        age_days = max(0, (today - posted).days)
+        value *= 0.5 + 0.5 * 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)
+    deadline = _parse_date(valid_through)
+    if deadline is not None:
+        days_left = (deadline - today).days
+        if days_left < 0:
+            return 0.0
+        if days_left <= URGENT_DAYS:
+            value *= URGENCY_BOOST
+    return round(value, 2)
+
+
+class JobPriorityQueue:
+    """
+    Pending jobs ordered by value, highest first. Every job is pre-scored locally against the
+    resume in one vectorized pass (no LLM calls), then weighted by freshness and deadline.
+    Jobs carrying an "error" and postings past their deadline are kept out of the queue and
+    reported through `rejected`.
+    """
+
+    def __init__(self, jobs: list[dict], resume_text: str, today: datetime.date = None):
+        self._heap = []
+        self._tiebreak = itertools.count() # Equal values keep manifest order
+        self.rejected = []
+        scorable = [job for job in jobs if not job.get("error")]
+        self.rejected.extend(job for job in jobs if job.get("error"))
+        if not scorable:
+            return
+        today = today or datetime.date.today()
+        pre_scores = local_match_matrix([resume_text], [job.get("jd_text") or "" for job in scorable])[0]
+        for job, pre_score in zip(scorable, pre_scores):
+            deadline = _parse_date(job.get("valid_through"))
+            if deadline is not None and deadline < today:
+                self.rejected.append(dict(job, pre_score=round(float(pre_score), 1), value=0.0,
+                                          error=f"Posting closed on {job['valid_through']}."))
+                continue
+            # A zero value (no keyword overlap at all) only sends the job to the back of the queue
+            value = job_value(pre_score, job.get("date_posted"), job.get("valid_through"), today)
+            job = dict(job, pre_score=round(float(pre_score), 1), value=value)
+            heapq.heappush(self._heap, (-value, next(self._tiebreak), job))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def pop(self) -> dict:
+        """Removes and returns the most valuable pending job."""
+        return heapq.heappop(self._heap)[2]
+
+    def push_back(self, job: dict):
+        """Returns a job taken with `pop` to the queue, ahead of any others of equal value."""
+        heapq.heappush(self._heap, (-job["value"], -next(self._tiebreak), job))
+
+    def drain(self) -> list[dict]:
+        """Removes and returns every remaining job, most valuable first."""
+        jobs = []
+        while self._heap:
+            jobs.append(self.pop())
+        return jobs
+
+
+if __name__ == "__main__":
+    today = datetime.date(2025, 6, 1)
+    resume = "Data analyst with Python, SQL, pandas and machine learning experience."
+    demo_jobs = [
+        {"id": "old-good-fit", "jd_text": "Python SQL pandas machine learning analyst", "date_posted": "2025-03-01"},
+        {"id": "fresh-good-fit", "jd_text": "Python SQL pandas machine learning analyst", "date_posted": "2025-05-30"},
+        {"id": "closing-soon", "jd_text": "Python SQL analyst", "date_posted": "2025-05-20", "valid_through": "2025-06-04"},
+        {"id": "poor-fit", "jd_text": "Registered nurse, night shifts, patient care", "date_posted": "2025-05-31"},
+        {"id": "expired", "jd_text": "Python SQL pandas analyst", "valid_through": "2025-05-15"},
+        {"id": "broken", "error": "Could not load JD."},
+    ]
+    queue = JobPriorityQueue(demo_jobs, resume, today=today)
+    print("Dispatch order:")
+    while len(queue):
+        job = queue.pop()
+        print(f"  {job['id']:<15} pre-score {job['pre_score']:>5}  value {job['value']:>6}")
+    print("Rejected:", [(job["id"], job["error"]) for job in queue.rejected])
+    print("Estimated usage for one job (tokens, USD):", estimate_job_usage(resume * 40, "Python SQL " * 300))
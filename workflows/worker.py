@@ -0,0 +1,272 @@
+# ai-job-application-manager/workflows/worker.py
+import os
+import sys
+import time
+import socket
+import threading
+import contextlib
+import multiprocessing
+
+from tools.resume_parser_tool import load_resume_text
+from tools.notion_tools import append_text_to_notion_page
+from utils.artifact_store import get_artifact_store
+from utils.llm_budget import LLMBudget, install_budget_meter
+from utils.processed_index import get_processed_index
+from utils.work_queue import open_work_queue, DEFAULT_VISIBILITY_TIMEOUT_S
+from workflows.batch_runner import (read_manifest, expand_manifest, process_job, record_job_stats, _identity,
+                                    _error_record, DEFAULT_RESUME_PATH)
+from workflows.job_queue import JobPriorityQueue, estimate_job_usage
+
+IDLE_POLL_INTERVAL_S = 2.0 # How often a --keep-polling worker checks an empty queue
+_PAYLOAD_FIELDS = ("id", "source", "company", "title", "url", "jd_text", "pre_score", "value")
+_RATE_LIMIT_ENV = ("LLM_TPM_LIMIT", "LLM_RPM_LIMIT")
+
+
+def enqueue_manifest(manifest_path: str, queue_url: str = None, resume_path: str = DEFAULT_RESUME_PATH,
+                     skip_processed: bool = True) -> dict:
+    """
+    Expands a batch manifest (scraping any board URLs once, here) and puts every job on the work
+    queue, most valuable first, for worker processes to pick up. Jobs already on the queue (by
+    ID) or in the processed-jobs index are not added again. Returns a summary dict.
+    """
+    resume_text = load_resume_text(resume_path)
+    if resume_text.startswith("Error"):
+        raise SystemExit(resume_text)
+    jobs = expand_manifest(read_manifest(manifest_path))
+    processed_index = get_processed_index()
+    pending = [job for job in jobs if not (skip_processed and processed_index.is_processed(_identity(job)))]
+    ranked = JobPriorityQueue(pending, resume_text)
+    ordered = ranked.drain()
+    queue = open_work_queue(queue_url)
+    try:
+        added = queue.enqueue_many((job["id"], {key: job.get(key) for key in _PAYLOAD_FIELDS}, job["value"])
+                                   for job in ordered)
+        stats = queue.stats()
+    finally:
+        queue.close()
+    for job in ranked.rejected:
+        print(f"[worker] Not queued: {job.get('id')}: {job['error']}")
+    summary = {"total": len(jobs), "already_processed": len(jobs) - len(pending), "rejected": len(ranked.rejected),
+               "queued": added, "already_queued": len(ordered) - added, "queue": stats}
+    print(f"[worker] Enqueued from {manifest_path}: {summary}")
+    return summary
+
+
+def notion_log_text(record: dict, url: str = None) -> str:
+    """The Notion log entry for a completed job, in the header format the processed-jobs index parses."""
+    analysis = record.get("analysis") or {}
+    lines = [f"--- Application processed: {record.get('title')} at {record.get('company')} ---",
+             f"Job Title: {record.get('title')}",
+             f"Company: {record.get('company')}"]
+    if url:
+        lines.append(f"URL: {url}")
+    if analysis.get("compatibility_score") is not None:
+        lines.append(f"Compatibility Score: {analysis['compatibility_score']}")
+    lines.append("Status: Cover letter and resume suggestions drafted (worker)")
+    return "\n".join(lines)
+
+
+class _LeaseHeartbeat:
+    """Extends a lease every third of the visibility timeout while a job is being processed."""
+
+    def __init__(self, queue, lease, visibility_timeout: float):
+        self._stop = threading.Event()
+        self.lost = False
+
+        def beat():
+            while not self._stop.wait(visibility_timeout / 3):
+                if not queue.extend(lease, visibility_timeout):
+                    self.lost = True # Another worker has it now; our ack will be refused
+                    return
+        self._thread = threading.Thread(target=beat, name=f"lease-{lease.job_id[:20]}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue_url: str = None, resume_path: str = DEFAULT_RESUME_PATH,
+               visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S, log_to_notion: bool = True,
+               keep_polling: bool = False, worker_name: str = None, budget: LLMBudget = None) -> dict:
+    """
+    One worker: leases jobs from the work queue until it is empty (or forever with keep_polling),
+    runs analysis -> cover letter -> resume suggestions on each (batch_runner.process_job, with
+    artifacts saved to the store), logs completed jobs to Notion when NOTION_PAGE_ID_FOR_LOGGING
+    is set, and acks the result record (also added to the dashboard stats). Jobs already in the
+    processed-jobs index when leased are acked as 'already_processed' without running; results
+    are only marked, logged and acked after re-confirming the lease. A failed job is
+    nacked and retried by the next free worker until the queue's attempt limit. While a job runs
+    its lease is extended periodically, so only a worker that dies or hangs lets its job be
+    handed to another worker. With a budget, every LLM call is charged to it and a job is only
+    started while the budget can still cover its estimated usage; otherwise the job is released
+    back to the queue (its attempt not counted) and the worker stops.
+    Returns this worker's counts.
+    """
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    resume_text = load_resume_text(resume_path)
+    if resume_text.startswith("Error"):
+        raise SystemExit(resume_text)
+    queue = open_work_queue(queue_url)
+    store = get_artifact_store()
+    processed_index = get_processed_index()
+    notion_page_id = os.getenv("NOTION_PAGE_ID_FOR_LOGGING") if log_to_notion else None
+    counts = {"worker": worker_name, "ok": 0, "error": 0, "lost_lease": 0, "already_processed": 0, "budget_stopped": False, "started": time.time()}
+    original_completion = install_budget_meter(budget) if budget is not None else None
+    try:
+        while True:
+            if budget is not None and budget.exhausted():
+                counts["budget_stopped"] = True
+                break
+            lease = queue.lease(worker_name, visibility_timeout)
+            if lease is None:
+                if not keep_polling:
+                    break
+                time.sleep(IDLE_POLL_INTERVAL_S)
+                continue
+            job = lease.payload
+            if processed_index.is_processed(_identity(job)):
+                # Done since it was queued (by a worker that lost its lease at the last moment, or another run)
+                queue.ack(lease, _error_record(job, "Already processed.", status="already_processed"))
+                counts["already_processed"] += 1
+                print(f"[worker {worker_name}] Skipped {job.get('id')}: already processed.")
+                continue
+            tokens, cost = estimate_job_usage(resume_text, job.get("jd_text")) if budget is not None else (0, 0.0)
+            if budget is not None and not budget.reserve(tokens, cost):
+                queue.release(lease)
+                counts["budget_stopped"] = True
+                print(f"[worker {worker_name}] LLM budget cannot cover {job.get('id')}; released it and stopping.")
+                break
+            heartbeat = _LeaseHeartbeat(queue, lease, visibility_timeout)
+            try:
+                record = process_job(job, resume_text, store=store)
+            except Exception as e: # A tool raising instead of returning an error string
+                record = _error_record(job, f"{type(e).__name__} - {str(e)}")
+            finally:
+                heartbeat.stop()
+                if budget is not None:
+                    budget.release(tokens, cost)
+            record["worker"] = worker_name
+            record["attempt"] = lease.attempts
+            # Side effects only while the lease is still ours: extend() both checks and renews it,
+            # so no other worker can be handed the job while it is marked and logged
+            if heartbeat.lost or not queue.extend(lease, visibility_timeout):
+                acked = False
+            elif record.get("status") == "ok":
+                processed_index.mark_processed(_identity(job), source="worker")
+                if notion_page_id:
+                    logged = append_text_to_notion_page(notion_page_id, notion_log_text(record, job.get("url")))
+                    record["notion"] = "logged" if not logged.startswith("Error") else logged
+                acked = queue.ack(lease, record)
+            else:
+                acked = queue.nack(lease, record.get("error") or "Unknown error")
+            if not acked:
+                counts["lost_lease"] += 1
+                print(f"[worker {worker_name}] Lost the lease on {job.get('id')}; another worker took it over.")
+            else:
+                record_job_stats(record)
+                counts["ok" if record.get("status") == "ok" else "error"] += 1
+                print(f"[worker {worker_name}] {record.get('status')} (attempt {lease.attempts}): "
+                      f"{record.get('title')} at {record.get('company')}")
+    finally:
+        if original_completion is not None:
+            import litellm
+            litellm.completion = original_completion
+        queue.close()
+    counts["finished"] = time.time()
+    if budget is not None:
+        counts["llm_spend"] = budget.summary()["run"]
+    return counts
+
+
+def _worker_process(results, initializer, initargs, kwargs, workers, budget_limits):
+    # Tools log with print(); keep stdout for the parent's summary
+    with contextlib.redirect_stdout(sys.stderr):
+        # Each process builds its own rate limiter (utils/llm_gateway.get_rate_limiter), so give each
+        # an equal share of the configured limits; together they stay within them.
+        for name in _RATE_LIMIT_ENV:
+            if os.getenv(name, "").strip().isdigit():
+                os.environ[name] = str(max(1, int(os.environ[name]) // workers))
+        if initializer is not None:
+            initializer(*initargs)
+        budget = None
+        if budget_limits is not None:
+            # Run limits are split like the rate limits; daily limits are shared through the spend ledger
+            run_tokens, run_cost, daily_tokens, daily_cost = budget_limits
+            budget = LLMBudget(run_tokens // workers if run_tokens is not None else None,
+                               run_cost / workers if run_cost is not None else None, daily_tokens, daily_cost)
+        results.put(run_worker(budget=budget, **kwargs))
+
+
+def run_workers(workers: int = 4, queue_url: str = None, resume_path: str = DEFAULT_RESUME_PATH,
+                visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S, log_to_notion: bool = True,
+                keep_polling: bool = False, initializer=None, initargs: tuple = (), budget_limits: tuple = None) -> dict:
+    """
+    Starts `workers` worker processes on this machine (more can run anywhere else that reaches
+    the same queue) and waits for them to drain it. Each process has its own interpreter, so
+    local parsing and scoring use separate cores while LLM waits overlap. `initializer(*initargs)`
+    runs first in every process (e.g. to install an LLM stub). LLM_TPM_LIMIT / LLM_RPM_LIMIT and
+    the run limits of `budget_limits` (run_tokens, run_cost, daily_tokens, daily_cost; None for
+    unlimited) are divided evenly between the processes. Returns a summary dict.
+    """
+    context = multiprocessing.get_context("spawn") # Fresh interpreters: no inherited SQLite handles or locks
+    results = context.Queue()
+    kwargs = {"queue_url": queue_url, "resume_path": resume_path, "visibility_timeout": visibility_timeout,
+              "log_to_notion": log_to_notion, "keep_polling": keep_polling}
+    workers = max(1, workers)
+    if budget_limits is not None and all(limit is None for limit in budget_limits):
+        budget_limits = None
+    started = time.perf_counter()
+    processes = [context.Process(target=_worker_process, args=(results, initializer, initargs, kwargs, workers, budget_limits),
+                                 name=f"job-worker-{i + 1}") for i in range(workers)]
+    for process in processes:
+        process.start()
+    per_worker = []
+    for process in processes:
+        process.join()
+    while not results.empty():
+        per_worker.append(results.get())
+    queue = open_work_queue(queue_url)
+    try:
+        stats = queue.stats()
+    finally:
+        queue.close()
+    summary = {"workers": len(processes), "ok": sum(w["ok"] for w in per_worker),
+               "error": sum(w["error"] for w in per_worker), "lost_lease": sum(w["lost_lease"] for w in per_worker),
+               "already_processed": sum(w["already_processed"] for w in per_worker),
+               "crashed_workers": sum(1 for p in processes if p.exitcode != 0),
+               "budget_stopped": sum(1 for w in per_worker if w.get("budget_stopped")),
+               "elapsed_s": round(time.perf_counter() - started, 3), "queue": stats}
+    if per_worker:
+        # Time from the first worker being ready (imports done, resume loaded) to the last one finishing
+        summary["drain_s"] = round(max(w["finished"] for w in per_worker) - min(w["started"] for w in per_worker), 3)
+    print(f"[worker] Finished: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    # Throughput benchmark against the local stub LLM: the same jobs drained by 1, 2 and 4 worker
+    # processes from a fresh SQLite queue each time. drain_s excludes process start-up (imports).
+    import json
+    import tempfile
+    from utils.llm_stub import install_stub
+
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    n_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    tmp = tempfile.mkdtemp(prefix="worker-bench-")
+    os.environ.update(ARTIFACT_STORE_DIR=os.path.join(tmp, "artifacts"), INGEST_CACHE_DIR=os.path.join(tmp, "ingest"))
+    manifest = os.path.join(tmp, "manifest.jsonl")
+    with open(manifest, "w", encoding="utf-8") as f:
+        for i in range(n_jobs):
+            jd_path = os.path.join(tmp, f"jd_{i}.txt")
+            with open(jd_path, "w", encoding="utf-8") as jd:
+                jd.write(f"Job Title: Data Analyst {i}\nCompany: Company {i}\nPython, SQL and Tableau for reporting.")
+            f.write(json.dumps({"jd_path": jd_path}) + "\n")
+    for n_workers in (1, 2, 4):
+        os.environ["PROCESSED_INDEX_PATH"] = os.path.join(tmp, f"processed_{n_workers}.sqlite")
+        queue_url = "sqlite:///" + os.path.join(tmp, f"queue_{n_workers}.sqlite")
+        with contextlib.redirect_stdout(sys.stderr):
+            enqueue_manifest(manifest, queue_url)
+            summary = run_workers(n_workers, queue_url, log_to_notion=False, initializer=install_stub, initargs=(latency,))
+        print(f"{n_workers} worker(s): {summary['ok']} ok, {summary['elapsed_s']:.2f}s total, "
+              f"{summary['drain_s']:.2f}s draining ({summary['ok'] / summary['drain_s']:.1f} jobs/s)")